@@ -89,10 +89,48 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # WAL: las lecturas (lesionados/sancionados) no se bloquean mientras un scraper escribe.
+            # IMMEDIATE: las transacciones de escritura toman el candado al empezar y esperan
+            # hasta 'timeout' segundos en vez de fallar con "database is locked".
+            'init_command': 'PRAGMA journal_mode=WAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
 
+# Cache compartida entre workers de gunicorn (en disco). Se usa para la lista de árbitros
+# y otros datos externos que no conviene descargar en cada petición.
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', str(BASE_DIR / '.cache')),
+        'TIMEOUT': None,
+    }
+}
+
+
+# Peticiones de pronóstico: llamadas externas en paralelo con un plazo global (segundos)
+PARALELO_MAX_WORKERS = int(os.environ.get('PARALELO_MAX_WORKERS', '8'))
+PRONOSTICO_PLAZO_SEGUNDOS = float(os.environ.get('PRONOSTICO_PLAZO_SEGUNDOS', '20'))
+
+# Sesiones HTTP compartidas (dashboard.http_client): pool por host y reintentos con backoff en GET
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '4'))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '10'))
+HTTP_REINTENTOS = int(os.environ.get('HTTP_REINTENTOS', '2'))
+HTTP_BACKOFF = float(os.environ.get('HTTP_BACKOFF', '0.5'))
+
+# Scraper de árbitros (fichajes.com): páginas de partido descargadas a la vez
+FICHAJES_MAX_WORKERS = int(os.environ.get('FICHAJES_MAX_WORKERS', '6'))
+
+# Parser HTML de los scrapers (dashboard.parseo): vacío = lxml si está instalado, si no html.parser
+SCRAPER_PARSER = os.environ.get('SCRAPER_PARSER', '')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,320 @@
+"""
+Backtest del modelo de pronóstico (python manage.py backtest).
+Repite los partidos ya jugados de la temporada con generar_pronostico_pro tal como se habría
+calculado antes de cada uno: lesionados y sancionados se reconstruyen deshaciendo el historial
+de CambioBaja hasta la hora del partido y el cansancio entre semana sale de esa fecha del
+calendario (no del próximo partido de la pareja). Los partidos anteriores a la primera
+sincronización registrada en CambioBaja se dejan fuera: de ellos no se sabe qué bajas había y
+usar las conocidas después sería mirar al futuro. Las designaciones de árbitro no tienen
+historial: se usan las actuales, que no influyen en los goles esperados.
+
+Las probabilidades 1X2 salen de la matriz Poisson de todos los partidos a la vez y se comparan
+con el resultado: log-loss, Brier, acierto y tabla de calibración. Para barrer rejillas de
+parámetros los partidos se preparan una vez y cada combinación se evalúa en un proceso del pool,
+que recibe los partidos al arrancar (_iniciar_proceso).
+"""
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+import numpy as np
+
+from .poisson import probabilidades_1x2
+
+# Parámetros del modelo que se pueden barrer: nombre -> constante de dashboard.utils
+PARAMETROS = {
+    "goles_minimos": "_GOLES_MINIMOS_POR_EQUIPO",
+    "penalizacion_maxima": "_PENALIZACION_MAXIMA_GOLES",
+    "peso_sancionado": "_PESO_SANCIONADO",
+    "penalizacion_entre_semana": "_PENALIZACION_ENTRE_SEMANA",
+    "factor_altura": "_FACTOR_VISITANTE_EN_ALTURA",
+}
+# Parámetros que multiplican todos los valores de una tabla de dashboard.utils
+ESCALAS = {
+    "escala_profundidad": "_PROFUNDIDAD_EQUIPO",
+    "escala_peso_lesionados": "_PESO_LESIONADO_POR_ESTRELLAS",
+}
+# Tramos de probabilidad de la tabla de calibración (0-10 %, 10-20 %, ...)
+TRAMOS_CALIBRACION = 10
+# Probabilidad mínima en el log-loss (un 0 daría infinito)
+_PROB_MINIMA = 1e-12
+
+# Partidos y CalendarIndex del backtest en este proceso (_cargar; los del pool en _iniciar_proceso)
+_PARTIDOS = ()
+_CALENDARIO = None
+
+
+def _marcador_sportmonks(local, visitante, fecha):
+    """(goles_local, goles_visitante) si Sportmonks da el partido por terminado; si no (None, None)."""
+    from .models import FixtureSportmonks
+    from .sportmonks_client import ESTADOS_FINALIZADOS, _fixture_id_desde_indice, get_fixture_by_id, get_team_id
+
+    fid = _fixture_id_desde_indice(local, visitante, fecha.date())
+    fila = FixtureSportmonks.objects.filter(fixture_id=fid).first() if fid else None
+    if not fila or fila.state_id not in ESTADOS_FINALIZADOS:
+        return None, None
+    data, err = get_fixture_by_id(fid, include="scores")
+    if err or not data:
+        return None, None
+    goles = {}
+    for s in data.get("scores") or []:
+        if s.get("description") == "CURRENT":
+            score = s.get("score") or {}
+            goles[score.get("participant")] = score.get("goals")
+    gl, gv = goles.get("home"), goles.get("away")
+    # El índice también encuentra la pareja al revés
+    if fila.home_team_id != get_team_id(local):
+        gl, gv = gv, gl
+    return gl, gv
+
+
+def partidos_jugados(desde=None, con_sportmonks=True):
+    """
+    Partidos ya jugados del calendario con su resultado, ordenados por fecha:
+    [(local, visitante, fecha_utc, partido, goles_local, goles_visitante)] con los nombres del selector.
+    El marcador sale del calendario; si falta, de Sportmonks cuando lo da por terminado.
+    """
+    from .calendar_api import _normalize_team, get_calendar_index, mapa_equipos
+    from .utils import obtener_datos_completos_premier
+
+    ahora = datetime.now(timezone.utc)
+    mapa = mapa_equipos(obtener_datos_completos_premier())
+    jugados = []
+    for dt, p in get_calendar_index().partidos:
+        if dt >= ahora:
+            break
+        if desde and dt < desde:
+            continue
+        local = mapa.get(_normalize_team(p.get("HomeTeam") or ""))
+        visitante = mapa.get(_normalize_team(p.get("AwayTeam") or ""))
+        if not local or not visitante:
+            continue
+        gl, gv = p.get("HomeTeamScore"), p.get("AwayTeamScore")
+        if (gl is None or gv is None) and con_sportmonks:
+            gl, gv = _marcador_sportmonks(local, visitante, dt)
+        if gl is None or gv is None:
+            continue  # aplazado o sin resultado todavía
+        jugados.append((local, visitante, dt, p, int(gl), int(gv)))
+    return jugados
+
+
+def reconstruir_bajas(fechas, ids=None):
+    """
+    Lesionados y sancionados conocidos antes de cada fecha (lista ordenada de datetimes UTC).
+    Parte de las tablas actuales y deshace, del más reciente al más antiguo, los cambios de
+    CambioBaja sincronizados en esa fecha o después. Devuelve [(lesionados, sancionados)] alineada
+    con fechas; fechas sin cambios entre medias comparten las mismas tuplas. Antes del primer
+    cambio registrado queda el estado más antiguo conocido, que no es fiable para esas fechas
+    (ver inicio_historial). ids: de equipos.ids_equipos(), para asignar equipo_ref a las filas
+    reconstruidas.
+    """
+    from .models import CambioBaja, Lesionado, Sancionado
+    from .persistencia import CAMPOS_LESIONADO, CAMPOS_SANCIONADO, _lesionado, _sancionado
+
+    estado = {
+        "lesionado": {
+            (o.equipo, o.nombre): {c: getattr(o, c) for c in CAMPOS_LESIONADO}
+            for o in Lesionado.objects.order_by("pk")
+        },
+        "sancionado": {
+            (o.equipo, o.nombre): {c: getattr(o, c) for c in CAMPOS_SANCIONADO}
+            for o in Sancionado.objects.all()
+        },
+    }
+    cambios = iter(CambioBaja.objects.order_by("-sincronizacion", "-pk").iterator())
+    cambio = next(cambios, None)
+    resultado = [None] * len(fechas)
+    bajas = None
+    for i in range(len(fechas) - 1, -1, -1):
+        while cambio is not None and cambio.sincronizacion >= fechas[i]:
+            filas = estado[cambio.tipo]
+            clave = (cambio.equipo, cambio.nombre)
+            if cambio.accion == "alta":
+                filas.pop(clave, None)
+            elif cambio.accion == "baja":
+                filas[clave] = dict(cambio.detalle)
+            elif clave in filas:
+                for campo, (antes, _) in cambio.detalle.items():
+                    filas[clave][campo] = antes
+            bajas = None
+            cambio = next(cambios, None)
+        if bajas is None:
+            bajas = (
+                tuple(_lesionado({"equipo": e, "nombre": n, **c}, ids) for (e, n), c in estado["lesionado"].items()),
+                tuple(
+                    _sancionado({"equipo": e, "nombre": n, **c}, ids)
+                    for (e, n), c in sorted(estado["sancionado"].items())
+                ),
+            )
+        resultado[i] = bajas
+    return resultado
+
+
+def inicio_historial():
+    """Primera sincronización registrada en CambioBaja (None si no hay ninguna): desde ahí hay historial de bajas."""
+    from .models import CambioBaja
+
+    return CambioBaja.objects.order_by("sincronizacion").values_list("sincronizacion", flat=True).first()
+
+
+def preparar_partidos(desde=None, con_sportmonks=True):
+    """
+    Partidos del backtest: ([(local, visitante, partido, bajas, goles_local, goles_visitante)],
+    designaciones, ids de Equipo, sin_historial) con bajas = (lesionados, sancionados) reconstruidas
+    a la fecha de cada partido. sin_historial: partidos jugados que se dejan fuera por ser anteriores
+    a inicio_historial(). Todo se puede enviar a otro proceso (pickle conserva las tuplas compartidas).
+    """
+    from .equipos import ids_equipos
+    from .models import DesignacionArbitro
+
+    jugados = partidos_jugados(desde, con_sportmonks)
+    inicio = inicio_historial()
+    con_historial = [j for j in jugados if inicio is not None and j[2] >= inicio]
+    sin_historial = len(jugados) - len(con_historial)
+    jugados = con_historial
+    ids = ids_equipos()
+    bajas = reconstruir_bajas([j[2] for j in jugados], ids)
+    # Igual que cargar_datos_pronostico: por las FK a Equipo, la más reciente si se repite el partido
+    designaciones = {
+        (local, visitante): arbitro
+        for local, visitante, arbitro in DesignacionArbitro.objects.filter(
+            local_ref__isnull=False, visitante_ref__isnull=False
+        ).order_by("fecha_actualizacion").values_list("local_ref__nombre", "visitante_ref__nombre", "arbitro_nombre")
+    }
+    partidos = [(l, v, p, b, gl, gv) for (l, v, _, p, gl, gv), b in zip(jugados, bajas)]
+    return partidos, designaciones, ids, sin_historial
+
+
+def _cargar(partidos, designaciones, ids, feed):
+    """Deja en este proceso los partidos (con un DatosPronostico por estado de bajas) y el calendario."""
+    from .calendar_api import build_calendar_index
+    from .utils import DatosPronostico
+
+    global _PARTIDOS, _CALENDARIO
+    designaciones, ids = MappingProxyType(designaciones), MappingProxyType(ids)
+    datos = {}
+    for *_, bajas, _, _ in partidos:
+        if id(bajas) not in datos:
+            datos[id(bajas)] = DatosPronostico(
+                lesionados=bajas[0], sancionados=bajas[1], designaciones=designaciones, equipos=ids
+            )
+    _PARTIDOS = tuple((l, v, p, datos[id(b)], gl, gv) for l, v, p, b, gl, gv in partidos)
+    _CALENDARIO = build_calendar_index(feed)
+
+
+def _iniciar_proceso(partidos, designaciones, ids, feed):
+    """Inicializador de cada proceso del pool: Django y los partidos del backtest una sola vez."""
+    import django
+
+    django.setup()
+    _cargar(partidos, designaciones, ids, feed)
+
+
+@contextmanager
+def parametros_modelo(parametros):
+    """Aplica parámetros de PARAMETROS/ESCALAS a las constantes de dashboard.utils y los restaura al salir."""
+    from . import utils
+
+    originales = {}
+    try:
+        for nombre, valor in parametros.items():
+            if nombre in PARAMETROS:
+                constante = PARAMETROS[nombre]
+                nuevo = valor
+            elif nombre in ESCALAS:
+                constante = ESCALAS[nombre]
+                nuevo = {k: v * valor for k, v in getattr(utils, constante).items()}
+            else:
+                raise ValueError(f"Parámetro desconocido: {nombre}")
+            originales.setdefault(constante, getattr(utils, constante))
+            setattr(utils, constante, nuevo)
+        yield
+    finally:
+        for constante, valor in originales.items():
+            setattr(utils, constante, valor)
+
+
+def metricas(probabilidades, resultados):
+    """
+    probabilidades (N, 3) de local/empate/visitante y resultados (N,) con el índice de lo ocurrido
+    (0 local, 1 empate, 2 visitante). Log-loss en nats, Brier multiclase (0 = perfecto, 2 = peor),
+    acierto del favorito y calibración por tramos sobre las 3N probabilidades.
+    """
+    n = len(resultados)
+    reales = np.eye(3)[resultados]
+    prob_real = probabilidades[np.arange(n), resultados]
+    planas, ocurridos = probabilidades.ravel(), reales.ravel()
+    tramo = np.minimum((planas * TRAMOS_CALIBRACION).astype(int), TRAMOS_CALIBRACION - 1)
+    calibracion = []
+    for t in range(TRAMOS_CALIBRACION):
+        mascara = tramo == t
+        if mascara.any():
+            calibracion.append({
+                "tramo": f"{t * 100 // TRAMOS_CALIBRACION}-{(t + 1) * 100 // TRAMOS_CALIBRACION}%",
+                "n": int(mascara.sum()),
+                "prevista": round(float(planas[mascara].mean()) * 100, 1),
+                "observada": round(float(ocurridos[mascara].mean()) * 100, 1),
+            })
+    return {
+        "partidos": n,
+        "log_loss": round(float(-np.log(np.maximum(prob_real, _PROB_MINIMA)).mean()), 4),
+        "brier": round(float(((probabilidades - reales) ** 2).sum(axis=1).mean()), 4),
+        "acierto": round(float((probabilidades.argmax(axis=1) == resultados).mean()) * 100, 1),
+        "calibracion": calibracion,
+    }
+
+
+def evaluar(parametros=None):
+    """Pronostica los partidos de este proceso con esos parámetros. Devuelve (parametros, metricas)."""
+    from .utils import generar_pronostico_pro
+
+    parametros = dict(parametros or {})
+    lam_local, lam_visitante, resultados, exactos = [], [], [], 0
+    with parametros_modelo(parametros):
+        for local, visitante, partido, datos, gl, gv in _PARTIDOS:
+            p = generar_pronostico_pro(
+                local, visitante, datos=datos, con_mercados=False, fixture=partido, calendario=_CALENDARIO
+            )
+            lam_local.append(p["goles_esperados_local"])
+            lam_visitante.append(p["goles_esperados_visitante"])
+            resultados.append(0 if gl > gv else (1 if gl == gv else 2))
+            exactos += p["marcador"] == f"{gl} - {gv}"
+    if not resultados:
+        return parametros, {"partidos": 0}
+    resultado = metricas(probabilidades_1x2(lam_local, lam_visitante), np.array(resultados))
+    resultado["acierto_marcador"] = round(exactos / len(resultados) * 100, 1)
+    return parametros, resultado
+
+
+def rejilla(valores):
+    """{nombre: [v1, v2, ...]} -> lista de combinaciones {nombre: v} (producto cartesiano)."""
+    nombres = list(valores)
+    return [dict(zip(nombres, combinacion)) for combinacion in itertools.product(*(valores[n] for n in nombres))]
+
+
+def backtest(combinaciones=None, desde=None, procesos=1, con_sportmonks=True):
+    """
+    Evalúa el modelo sobre los partidos jugados para cada combinación de parámetros
+    (None = los parámetros actuales). Devuelve [(parametros, metricas)] ordenada por log-loss;
+    metricas["sin_historial"]: partidos excluidos por ser anteriores al historial de bajas.
+    Con procesos > 1 las combinaciones se reparten entre procesos.
+    """
+    from .calendar_api import get_calendar_index
+
+    combinaciones = combinaciones or [{}]
+    partidos, designaciones, ids, sin_historial = preparar_partidos(desde, con_sportmonks)
+    feed = [p for _, p in get_calendar_index().partidos]
+    if procesos > 1 and len(combinaciones) > 1:
+        with ProcessPoolExecutor(
+            max_workers=procesos, initializer=_iniciar_proceso, initargs=(partidos, designaciones, ids, feed)
+        ) as pool:
+            resultados = list(pool.map(evaluar, combinaciones))
+    else:
+        _cargar(partidos, designaciones, ids, feed)
+        resultados = [evaluar(c) for c in combinaciones]
+    for _, m in resultados:
+        m["sin_historial"] = sin_historial
+    resultados.sort(key=lambda r: r[1].get("log_loss", float("inf")))
+    return resultados
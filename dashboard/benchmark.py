@@ -0,0 +1,232 @@
+"""
+Microbenchmarks de los scrapers sobre páginas HTML guardadas (python manage.py benchmark_scrapers).
+Compara el extractor actual de futbolfantasy (una pasada por el documento) con el anterior, que
+para cada enlace /jugadores/ subía hasta 25 ancestros llamando a get_text() y recorriendo
+hermanos. El anterior se conserva aquí como referencia: los tests comprueban que ambos dan las
+mismas filas en las páginas de dashboard/tests/fixtures y este módulo mide la aceleración.
+Compara también los parsers instalados (lxml y html.parser) sobre las mismas páginas: tiempo de
+parseo y si los extractores dan las mismas filas con uno y otro. Para livefutbol y fichajes compara
+el parseo dirigido (SoupStrainer: solo lo que se extrae) con el del documento completo: tiempo,
+pico de memoria y nodos del árbol.
+No toca la base de datos: solo parsea y extrae.
+"""
+import re
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from . import scraper, scraper_arbitros, scraper_livefutbol
+from .parseo import parser_html, parsers_disponibles, sopa
+
+
+def _equipo_por_ancestros(elemento):
+    """Versión anterior de la asignación de equipo: sube por los padres (hasta 25 niveles)."""
+    current = elemento
+    for _ in range(25):
+        if current is None:
+            break
+        direct = (current.get_text() or "").strip()
+        # Bloque tipo "Arsenal\n0%\nJugador..." -> el inicio es el equipo
+        eq = scraper._equipo_desde_texto(direct)
+        if eq:
+            return eq
+        # Cabeceras h2/h3/h4 con solo el nombre del equipo
+        for tag in current.find_all(["h2", "h3", "h4"], limit=3):
+            txt = (tag.get_text() or "").strip()
+            if len(txt) < 50 and scraper._normalizar_equipo(txt):
+                return scraper._normalizar_equipo(txt)
+        # Hermanos anteriores
+        sib = current.find_previous_sibling() if hasattr(current, "find_previous_sibling") else None
+        while sib:
+            txt = (sib.get_text() or "").strip()
+            if sib.name in ("h2", "h3", "h4") and len(txt) < 50 and scraper._normalizar_equipo(txt):
+                return scraper._normalizar_equipo(txt)
+            if scraper._equipo_desde_texto(txt):
+                return scraper._equipo_desde_texto(txt)
+            sib = sib.find_previous_sibling() if hasattr(sib, "find_previous_sibling") else None
+        current = getattr(current, "parent", None)
+    return None
+
+
+def lesionados_por_ancestros(html):
+    """Extractor anterior de lesionados (estrategias 2 y 3; la 1, div.equipo-lista, no cambió)."""
+    soup = scraper._sopa(html)
+    if soup.find_all("div", class_="equipo-lista"):
+        return scraper.extraer_lesionados(soup)
+    creados = []
+    for a in soup.find_all("a", href=re.compile(r"/jugadores/")):
+        nombre_jug = (a.get_text() or "").strip()
+        if not nombre_jug or len(nombre_jug) > 60:
+            continue
+        equipo = _equipo_por_ancestros(a)
+        if equipo:
+            tipo_lesion, retorno_esperado = scraper._extraer_tipo_y_retorno(a)
+            creados.append({
+                "nombre": nombre_jug, "equipo": equipo,
+                "tipo_lesion": tipo_lesion, "retorno_esperado": retorno_esperado,
+            })
+    if not creados:
+        # 3) Cabeceras h2/h3/h4 con nombre de equipo y enlaces en los hermanos siguientes
+        for tag in soup.find_all(["h2", "h3", "h4"]):
+            nombre_eq = scraper._normalizar_equipo(tag.get_text())
+            if not nombre_eq:
+                continue
+            siguiente = tag.find_next_sibling()
+            while siguiente and siguiente.name not in ("h2", "h3", "h4"):
+                for link in siguiente.find_all("a", href=re.compile(r"/jugadores/")):
+                    nombre_jug = (link.get_text() or "").strip()
+                    if nombre_jug and len(nombre_jug) < 60:
+                        creados.append({"nombre": nombre_jug, "equipo": nombre_eq, "tipo_lesion": "", "retorno_esperado": ""})
+                siguiente = siguiente.find_next_sibling()
+    return scraper._con_estrellas(creados)
+
+
+def sancionados_por_ancestros(html):
+    """Extractor anterior de sancionados."""
+    soup = scraper._sopa(html)
+    creados = []
+    for a in soup.find_all("a", href=re.compile(r"/jugadores/")):
+        nombre_jug = (a.get_text() or "").strip()
+        if not nombre_jug or len(nombre_jug) > 60:
+            continue
+        equipo = _equipo_por_ancestros(a)
+        if equipo:
+            creados.append({"nombre": nombre_jug, "equipo": equipo, "motivo": scraper._motivo_sancion(a)})
+    return scraper._unicos(creados)
+
+
+def medir(funcion, *args, repeticiones=5):
+    """Ejecuta funcion(*args) repeticiones veces. Devuelve (resultado, mejor tiempo en ms)."""
+    mejor = float("inf")
+    resultado = None
+    for _ in range(max(1, repeticiones)):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return resultado, mejor * 1000
+
+
+def comparar(nombre, actual, anterior, html, repeticiones=5):
+    """
+    Mide actual y anterior sobre el mismo HTML, con parseo incluido y solo la extracción sobre un
+    árbol ya parseado (ambos aceptan BeautifulSoup). Devuelve un dict con tiempos, filas y si coinciden.
+    """
+    soup, ms_parseo = medir(sopa, html, repeticiones=repeticiones)
+    filas, ms_actual = medir(actual, html, repeticiones=repeticiones)
+    filas_anterior, ms_anterior = medir(anterior, html, repeticiones=repeticiones)
+    _, ms_extraccion_actual = medir(actual, soup, repeticiones=repeticiones)
+    _, ms_extraccion_anterior = medir(anterior, soup, repeticiones=repeticiones)
+    return {
+        "nombre": nombre,
+        "parser": parser_html(),
+        "bytes": len(html),
+        "filas": len(filas),
+        "coinciden": filas == filas_anterior,
+        "ms_parseo": round(ms_parseo, 2),
+        "ms_actual": round(ms_actual, 2),
+        "ms_anterior": round(ms_anterior, 2),
+        "ms_extraccion_actual": round(ms_extraccion_actual, 2),
+        "ms_extraccion_anterior": round(ms_extraccion_anterior, 2),
+    }
+
+
+def benchmark_futbolfantasy(html_lesionados=None, html_sancionados=None, repeticiones=5):
+    """Compara extractor actual y anterior en las páginas de lesionados y/o sancionados dadas."""
+    resultados = []
+    if html_lesionados is not None:
+        resultados.append(comparar(
+            "futbolfantasy lesionados", scraper.extraer_lesionados, lesionados_por_ancestros,
+            html_lesionados, repeticiones,
+        ))
+    if html_sancionados is not None:
+        resultados.append(comparar(
+            "futbolfantasy sancionados", scraper.extraer_sancionados, sancionados_por_ancestros,
+            html_sancionados, repeticiones,
+        ))
+    return resultados
+
+
+def _arbol(html, parse_only=None):
+    """(nodos del árbol, pico de memoria en KB) de parsear el HTML una vez."""
+    tracemalloc.start()
+    try:
+        soup = sopa(html, parse_only=parse_only)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return sum(1 for _ in soup.descendants), pico / 1024
+
+
+def comparar_parseo(nombre, extractor, html, parse_only, repeticiones=5):
+    """
+    Mide extractor (que parsea solo lo que indica parse_only) frente al mismo extractor sobre el
+    documento completo ya parseado con sopa(). Devuelve un dict con tiempos, memoria, nodos y si coinciden.
+    """
+    filas, ms_dirigido = medir(extractor, html, repeticiones=repeticiones)
+    filas_completo, ms_completo = medir(lambda h: extractor(sopa(h)), html, repeticiones=repeticiones)
+    nodos_dirigido, kb_dirigido = _arbol(html, parse_only)
+    nodos_completo, kb_completo = _arbol(html)
+    return {
+        "nombre": nombre,
+        "parser": parser_html(),
+        "bytes": len(html),
+        "filas": len(filas),
+        "coinciden": filas == filas_completo,
+        "ms_dirigido": round(ms_dirigido, 2),
+        "ms_completo": round(ms_completo, 2),
+        "kb_dirigido": round(kb_dirigido),
+        "kb_completo": round(kb_completo),
+        "nodos_dirigido": nodos_dirigido,
+        "nodos_completo": nodos_completo,
+    }
+
+
+def benchmark_parseo_dirigido(html_livefutbol=None, html_fichajes=None, repeticiones=5):
+    """Compara parseo dirigido y completo en las páginas de livefutbol (árbitros) y/o fichajes (partidos)."""
+    resultados = []
+    if html_livefutbol is not None:
+        resultados.append(comparar_parseo(
+            "livefutbol árbitros", scraper_livefutbol.extraer_arbitros, html_livefutbol,
+            scraper_livefutbol.SOLO_TITULOS_Y_TABLAS, repeticiones,
+        ))
+    if html_fichajes is not None:
+        resultados.append(comparar_parseo(
+            "fichajes partidos", scraper_arbitros.extraer_partidos, html_fichajes,
+            scraper_arbitros.SOLO_ENLACES_DIRECTO, repeticiones,
+        ))
+    return resultados
+
+
+def comparar_parsers(nombre, extractor, html, repeticiones=5):
+    """
+    Parsea el HTML con cada parser instalado y pasa el árbol al extractor. Devuelve un dict con el
+    tiempo de parseo y las filas de cada parser, y si todos dan las mismas filas que html.parser.
+    """
+    por_parser = {}
+    for parser in parsers_disponibles():
+        soup, ms_parseo = medir(BeautifulSoup, html, parser, repeticiones=repeticiones)
+        por_parser[parser] = {"ms_parseo": round(ms_parseo, 2), "filas": extractor(soup)}
+    referencia = por_parser["html.parser"]["filas"]
+    return {
+        "nombre": nombre,
+        "bytes": len(html),
+        "parsers": {p: {"ms_parseo": r["ms_parseo"], "filas": len(r["filas"])} for p, r in por_parser.items()},
+        "coinciden": all(r["filas"] == referencia for r in por_parser.values()),
+    }
+
+
+def benchmark_parsers(html_lesionados=None, html_sancionados=None, html_livefutbol=None, html_fichajes=None,
+                      repeticiones=5):
+    """Compara los parsers instalados en las páginas dadas, cada una con su extractor."""
+    paginas = (
+        ("futbolfantasy lesionados", scraper.extraer_lesionados, html_lesionados),
+        ("futbolfantasy sancionados", scraper.extraer_sancionados, html_sancionados),
+        ("livefutbol árbitros", scraper_livefutbol.extraer_arbitros, html_livefutbol),
+        ("fichajes partidos", scraper_arbitros.extraer_partidos, html_fichajes),
+    )
+    return [
+        comparar_parsers(nombre, extractor, html, repeticiones)
+        for nombre, extractor, html in paginas
+        if html is not None
+    ]
@@ -0,0 +1,71 @@
+"""
+Cache compartida con stale-while-revalidate sobre el framework de cache de Django.
+Cada entrada guarda {"data": ..., "at": timestamp}. Si está fresca se devuelve tal cual;
+si ha caducado se devuelve igualmente y se refresca en un hilo en segundo plano, con un
+candado en la propia cache para que solo un worker refresque a la vez.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection
+
+# Tiempo máximo que un refresco puede tener tomado el candado (por si el hilo muere)
+LOCK_SEGUNDOS = 120
+
+
+def leer_entrada(clave):
+    """Devuelve la entrada cruda {"data", "at"} o None si no existe."""
+    entrada = cache.get(clave)
+    if not isinstance(entrada, dict) or "data" not in entrada:
+        return None
+    return entrada
+
+
+def guardar(clave, data, ttl_maximo=None):
+    """Guarda data con marca de tiempo actual. ttl_maximo: caducidad dura en la cache (None = sin caducidad)."""
+    cache.set(clave, {"data": data, "at": time.time()}, timeout=ttl_maximo)
+
+
+def invalidar(clave):
+    cache.delete(clave)
+
+
+def refrescar(clave, recargar, ttl_maximo=None):
+    """Ejecuta recargar() de forma síncrona y guarda el resultado si no es None/vacío."""
+    data = recargar()
+    if data:
+        guardar(clave, data, ttl_maximo)
+    return data
+
+
+def _refrescar_en_segundo_plano(clave, recargar, ttl_maximo):
+    lock = f"{clave}:lock"
+    if not cache.add(lock, 1, timeout=LOCK_SEGUNDOS):
+        return  # Otro worker/hilo ya está refrescando
+
+    def _tarea():
+        try:
+            refrescar(clave, recargar, ttl_maximo)
+        except Exception as e:
+            print(f"Error refrescando cache {clave}: {e}")
+        finally:
+            cache.delete(lock)
+            connection.close()
+
+    threading.Thread(target=_tarea, name=f"swr-{clave}", daemon=True).start()
+
+
+def obtener(clave, ttl, recargar, ttl_maximo=None):
+    """
+    Devuelve el valor cacheado de clave.
+    - Fresco (edad < ttl): se devuelve sin tocar la red.
+    - Caducado: se devuelve el valor viejo y se lanza un refresco en segundo plano.
+    - Sin valor: se carga de forma síncrona (solo la primera vez o tras invalidar).
+    """
+    entrada = leer_entrada(clave)
+    if entrada is None:
+        return refrescar(clave, recargar, ttl_maximo)
+    if time.time() - entrada.get("at", 0) >= ttl:
+        _refrescar_en_segundo_plano(clave, recargar, ttl_maximo)
+    return entrada["data"]
@@ -1,49 +1,43 @@
 """
 Calendario Premier League 2025/26 vía FixtureDownload API.
 Usado para: fecha del partido, partido entre semana, y mejorar pronósticos.
+
+El feed se guarda en la cache compartida de Django (en disco, común a todos los workers) y se
+revalida en segundo plano con GET condicional (ETag / If-Modified-Since): un worker recién
+arrancado parte de la copia guardada sin llamar a la red.
 """
-import requests
+import hashlib
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
+from types import MappingProxyType
+
+from . import cache_swr, http_client
+from .equipos import nombre_oficial
 
 CALENDAR_URL = "https://fixturedownload.com/feed/json/epl-2025"
-_CACHE = {"data": None, "at": None}
+# Copia en memoria del worker. data: lista cruda de partidos; indice: CalendarIndex;
+# firma: hash del contenido descargado (el índice solo se reconstruye si cambia)
+_CACHE = {"data": None, "at": None, "indice": None, "firma": None}
+# Evita que varios hilos del mismo worker lean/descarguen el calendario a la vez
+_CACHE_LOCK = threading.Lock()
+# Cache compartida: pasado CACHE_MINUTES se revalida el feed en segundo plano
+CACHE_KEY = "calendario_epl"
 CACHE_MINUTES = 10
-
-# Alias para emparejar nombres del dashboard con los de la API (canonical en minúsculas)
-TEAM_ALIASES = {
-    "afc bournemouth": "bournemouth",
-    "bournemouth": "bournemouth",
-    "man city": "manchester city",
-    "man united": "manchester united",
-    "man utd": "manchester united",
-    "spurs": "tottenham",
-    "tottenham hotspur": "tottenham",
-    "tottenham": "tottenham",
-    "west ham united": "west ham",
-    "west ham": "west ham",
-    "wolves": "wolverhampton",
-    "wolverhampton wanderers": "wolverhampton",
-    "wolverhampton": "wolverhampton",
-    "newcastle": "newcastle united",
-    "newcastle united": "newcastle united",
-    "brighton": "brighton",
-    "brighton & hove albion": "brighton",
-    "nottingham forest": "nottingham forest",
-    "crystal palace": "crystal palace",
-    "aston villa": "aston villa",
-    "leeds united": "leeds united",
-    "burnley": "burnley",
-    "sunderland": "sunderland",
-}
-
+# Cada worker usa su copia en memoria este tiempo antes de volver a mirar la cache compartida
+CACHE_LOCAL_SEGUNDOS = 60
 
 def _normalize_team(name):
-    """Devuelve nombre normalizado en minúsculas para comparar (alias aplicados)."""
+    """Nombre en minúsculas para comparar: el del selector si se reconoce (alias incluidos) o el propio."""
     if not name:
         return ""
-    s = name.strip().lower()
-    canonical = TEAM_ALIASES.get(s, name.strip())
-    return canonical.lower()
+    return (nombre_oficial(name) or name.strip()).lower()
+
+
+def mapa_equipos(equipos):
+    """{nombre normalizado -> nombre del selector}: traduce los equipos del feed a los del dashboard."""
+    return {_normalize_team(e): e for e in equipos}
 
 
 def _teams_match(api_home, api_away, our_home, our_away):
@@ -55,23 +49,124 @@ def _teams_match(api_home, api_away, our_home, our_away):
     return (n_api_h == n_our_h and n_api_a == n_our_a) or (n_api_h == n_our_a and n_api_a == n_our_h)
 
 
+def _cache_vigente(now):
+    if _CACHE["data"] is not None and _CACHE["at"] is not None:
+        return (now - _CACHE["at"]).total_seconds() < CACHE_LOCAL_SEGUNDOS
+    return False
+
+
 def _fetch_calendar():
-    """Obtiene el calendario de la API (con cache en memoria)."""
+    """Obtiene el calendario (memoria del worker -> cache compartida -> API)."""
     now = datetime.now(timezone.utc)
-    if _CACHE["data"] is not None and _CACHE["at"] is not None:
-        if (now - _CACHE["at"]).total_seconds() < CACHE_MINUTES * 60:
+    if _cache_vigente(now):
+        return _CACHE["data"]
+    with _CACHE_LOCK:
+        if _cache_vigente(now):
             return _CACHE["data"]
+        feed = cache_swr.obtener(CACHE_KEY, CACHE_MINUTES * 60, _revalidar_calendar)
+        if feed:
+            if feed.get("firma") != _CACHE["firma"]:
+                _CACHE["indice"] = build_calendar_index(feed["partidos"])
+                _CACHE["data"] = feed["partidos"]
+                _CACHE["firma"] = feed["firma"]
+            _CACHE["at"] = now
+        return _CACHE["data"] or []
+
+
+def _revalidar_calendar():
+    """
+    Descarga el feed con GET condicional respecto a la copia compartida.
+    Devuelve {"partidos", "firma", "etag", "last_modified"} (la copia previa si no cambió) o None si falla.
+    """
+    entrada = cache_swr.leer_entrada(CACHE_KEY)
+    previo = (entrada or {}).get("data") or {}
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if previo.get("etag"):
+        headers["If-None-Match"] = previo["etag"]
+    if previo.get("last_modified"):
+        headers["If-Modified-Since"] = previo["last_modified"]
     try:
-        r = requests.get(CALENDAR_URL, headers={"User-Agent": "Mozilla/5.0"}, timeout=15)
+        r = http_client.get(CALENDAR_URL, headers=headers)
+        if r.status_code == 304 and previo.get("partidos"):
+            return previo
         if r.status_code != 200:
-            return []
+            return None
+        validadores = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+        firma = hashlib.sha1(r.content).hexdigest()
+        if firma == previo.get("firma"):
+            return {**previo, **validadores}
         data = r.json()
         partidos = data if isinstance(data, list) else []
-        _CACHE["data"] = partidos
-        _CACHE["at"] = now
-        return partidos
-    except Exception:
-        return _CACHE["data"] or []
+        if not partidos:
+            return None
+        return {"partidos": partidos, "firma": firma, **validadores}
+    except Exception as e:
+        print(f"Error calendario FixtureDownload: {e}")
+        return None
+
+
+@dataclass(frozen=True)
+class CalendarIndex:
+    """
+    Calendario pre-procesado (inmutable): fechas ya parseadas y equipos normalizados.
+    - partidos: ((dt, partido), ...) ordenado por fecha.
+    - por_equipo: equipo normalizado -> ((dt, ...), (partido, ...)) ordenados por fecha.
+    - por_pareja: frozenset({local, visitante}) normalizados -> ((dt, partido), ...) ordenados.
+    - firma_fechas: huella de los partidos y sus fechas (no de los resultados); cambia si se
+      aplaza o se reprograma un partido.
+    """
+    partidos: tuple
+    por_equipo: MappingProxyType
+    por_pareja: MappingProxyType
+    firma_fechas: str
+
+
+def build_calendar_index(partidos):
+    """Construye el CalendarIndex de una lista de partidos de la API (una sola pasada + ordenación)."""
+    filas = []
+    for p in partidos or []:
+        dt = _parse_date_utc(p.get("DateUtc"))
+        if dt is None:
+            continue
+        local = _normalize_team((p.get("HomeTeam") or "").strip())
+        visitante = _normalize_team((p.get("AwayTeam") or "").strip())
+        filas.append((dt, local, visitante, p))
+    filas.sort(key=lambda x: x[0])
+    por_equipo = {}
+    por_pareja = {}
+    for dt, local, visitante, p in filas:
+        for equipo in (local, visitante):
+            por_equipo.setdefault(equipo, ([], []))
+            por_equipo[equipo][0].append(dt)
+            por_equipo[equipo][1].append(p)
+        por_pareja.setdefault(frozenset((local, visitante)), []).append((dt, p))
+    return CalendarIndex(
+        partidos=tuple((dt, p) for dt, _, _, p in filas),
+        por_equipo=MappingProxyType({k: (tuple(f), tuple(ps)) for k, (f, ps) in por_equipo.items()}),
+        por_pareja=MappingProxyType({k: tuple(v) for k, v in por_pareja.items()}),
+        firma_fechas=hashlib.sha1(
+            repr([(dt.isoformat(), local, visitante) for dt, local, visitante, _ in filas]).encode()
+        ).hexdigest()[:12],
+    )
+
+
+_INDICE_VACIO = build_calendar_index([])
+
+
+def get_calendar_index(all_matches=None):
+    """
+    Índice del calendario. Sin argumentos (o con la lista cacheada) usa el índice ya construido;
+    con otra lista de partidos construye uno nuevo para ella; un CalendarIndex se devuelve tal cual.
+    """
+    if isinstance(all_matches, CalendarIndex):
+        return all_matches
+    if all_matches is None:
+        all_matches = _fetch_calendar()
+    if all_matches is _CACHE["data"] and _CACHE["indice"] is not None:
+        return _CACHE["indice"]
+    if not all_matches:
+        return _INDICE_VACIO
+    return build_calendar_index(all_matches)
 
 
 def _parse_date_utc(s):
@@ -92,53 +187,42 @@ def get_fixture_for_match(home_team, away_team):
     o None si no se encuentra.
     Prioriza partidos futuros; si no hay, devuelve el último jugado.
     """
-    partidos = _fetch_calendar()
-    now = datetime.now(timezone.utc)
-    candidatos = []
-    for p in partidos:
-        api_h = (p.get("HomeTeam") or "").strip()
-        api_a = (p.get("AwayTeam") or "").strip()
-        if not _teams_match(api_h, api_a, home_team, away_team):
-            continue
-        dt = _parse_date_utc(p.get("DateUtc"))
-        if dt is None:
-            continue
-        candidatos.append((dt, p))
+    indice = get_calendar_index()
+    pareja = frozenset((_normalize_team(home_team), _normalize_team(away_team)))
+    candidatos = indice.por_pareja.get(pareja)
     if not candidatos:
         return None
-    # Ordenar por fecha; preferir el próximo partido (fecha >= hoy)
-    candidatos.sort(key=lambda x: x[0])
-    for dt, p in candidatos:
-        if dt >= now:
-            return p
+    # Ya vienen ordenados por fecha; preferir el próximo partido (fecha >= hoy)
+    now = datetime.now(timezone.utc)
+    i = bisect_left([dt for dt, _ in candidatos], now)
+    if i < len(candidatos):
+        return candidatos[i][1]
     # Si todos son pasados, devolver el más reciente
     return candidatos[-1][1]
 
 
+def get_fixture_date_iso(home_team, away_team):
+    """Fecha 'YYYY-MM-DD' (UTC) del partido local vs visitante en el calendario, o None."""
+    fixture = get_fixture_for_match(home_team, away_team)
+    if not fixture:
+        return None
+    dt = _parse_date_utc(fixture.get("DateUtc"))
+    return dt.strftime("%Y-%m-%d") if dt else None
+
+
 def had_midweek_match(team_name, fixture_date_utc, all_matches=None):
     """
     Indica si el equipo jugó otro partido entre 2 y 6 días antes de fixture_date_utc.
     (Partido entre semana = posible cansancio.)
-    all_matches: lista de partidos de la API; si None se usa el calendario completo.
+    all_matches: lista de partidos de la API o CalendarIndex; si None se usa el calendario completo.
     """
     if fixture_date_utc is None or not team_name:
         return False
-    if all_matches is None:
-        all_matches = _fetch_calendar()
-    team_n = _normalize_team(team_name)
+    fechas, _ = get_calendar_index(all_matches).por_equipo.get(_normalize_team(team_name), ((), ()))
     start = fixture_date_utc - timedelta(days=6)
     end = fixture_date_utc - timedelta(days=2)
-    for p in all_matches:
-        dt = _parse_date_utc(p.get("DateUtc"))
-        if dt is None:
-            continue
-        if not (start <= dt <= end):
-            continue
-        api_h = _normalize_team((p.get("HomeTeam") or "").strip())
-        api_a = _normalize_team((p.get("AwayTeam") or "").strip())
-        if api_h == team_n or api_a == team_n:
-            return True
-    return False
+    # Hay partido en [start, end] si el primer partido >= start cae antes de end
+    return bisect_right(fechas, end) > bisect_left(fechas, start)
 
 
 def format_fixture_date(date_utc):
@@ -0,0 +1,126 @@
+"""
+Equipos de la Premier (tabla Equipo) y traducción de los nombres que usan las fuentes
+(futbolfantasy, apuestas-deportivas, fichajes, Sportmonks, calendario) al nombre del selector.
+Lesionado, Sancionado y DesignacionArbitro guardan el texto de la fuente y además la FK al
+Equipo reconocido, así las consultas por equipo son exactas y van por índice.
+
+Todos los nombres y alias se compilan una vez al importar: un dict para la coincidencia exacta
+y un trie de caracteres para "el texto empieza por un equipo", de modo que resolver un texto
+cuesta O(longitud del nombre) y no O(equipos × alias). Los textos se comparan normalizados:
+minúsculas, guiones y guiones bajos como espacios y espacios seguidos como uno solo.
+"""
+from .utils import obtener_datos_completos_premier
+
+# Variantes de las fuentes (ya normalizadas) -> nombre del selector. Los nombres del selector
+# también se reconocen tal cual.
+ALIAS_EQUIPOS = {
+    "bournemouth": "AFC Bournemouth",
+    "brighton": "Brighton & Hove Albion",
+    "brighton hove albion": "Brighton & Hove Albion",  # slug de fichajes
+    "brighton and hove albion": "Brighton & Hove Albion",
+    "leeds": "Leeds United",
+    "man city": "Manchester City",
+    "man united": "Manchester United",
+    "man utd": "Manchester United",
+    "newcastle": "Newcastle United",
+    "nott'm forest": "Nottingham Forest",
+    "nottm forest": "Nottingham Forest",
+    "spurs": "Tottenham Hotspur",
+    "tottenham": "Tottenham Hotspur",
+    "west ham": "West Ham United",
+    "wolves": "Wolverhampton Wanderers",
+    "wolverhampton": "Wolverhampton Wanderers",
+}
+
+# Clave de los nodos del trie donde termina un nombre (los caracteres son cadenas de longitud 1)
+_FIN = ""
+_SEPARADORES = "-_"
+
+
+def _normalizar(texto):
+    """Minúsculas, guiones/guiones bajos como espacios y espacios seguidos como uno solo."""
+    for s in _SEPARADORES:
+        texto = texto.replace(s, " ")
+    return " ".join(texto.split()).lower()
+
+
+def _caracteres(texto):
+    """Los caracteres de _normalizar(texto) uno a uno, sin procesar más texto del que se consume."""
+    espacio = empezado = False
+    for c in texto:
+        if c.isspace() or c in _SEPARADORES:
+            espacio = empezado
+            continue
+        if espacio:
+            yield " "
+            espacio = False
+        empezado = True
+        yield c.lower()
+
+
+def _compilar():
+    exactos = {**ALIAS_EQUIPOS, **{_normalizar(e): e for e in obtener_datos_completos_premier()}}
+    trie = {}
+    for clave, equipo in exactos.items():
+        nodo = trie
+        for c in clave:
+            nodo = nodo.setdefault(c, {})
+        nodo[_FIN] = equipo
+    return exactos, trie
+
+
+_EXACTOS, _TRIE = _compilar()
+
+
+def _mas_largo(caracteres):
+    """
+    Equipo del nombre o alias más largo con el que empiezan los caracteres, o None. El nombre tiene
+    que acabar en palabra completa: detrás, fin del texto, espacio o puntuación ("Arsenalfan" no vale).
+    """
+    nodo, equipo, candidato = _TRIE, None, None
+    for c in caracteres:
+        if candidato is not None and not c.isalnum():
+            equipo = candidato
+        nodo = nodo.get(c)
+        if nodo is None:
+            return equipo
+        candidato = nodo.get(_FIN)
+    return candidato or equipo
+
+
+def nombre_oficial(texto):
+    """Nombre del selector si el texto es exactamente un nombre o alias de equipo; si no, None."""
+    return _EXACTOS.get(_normalizar(texto or ""))
+
+
+def equipo_al_inicio(texto):
+    """Equipo por el que empieza el texto (nombre o alias más largo), o None. Solo lee ese prefijo."""
+    return _mas_largo(_caracteres(texto or ""))
+
+
+def equipo_en_texto(texto):
+    """Primer equipo nombrado en el texto, empezando en un inicio de palabra; None si no hay."""
+    t = _normalizar(texto or "")
+    for i in range(len(t)):
+        if i == 0 or t[i - 1] == " ":
+            equipo = _mas_largo(t[j] for j in range(i, len(t)))
+            if equipo:
+                return equipo
+    return None
+
+
+def ids_equipos():
+    """{nombre del selector: pk de Equipo}. Crea las filas que falten (una consulta si no falta ninguna)."""
+    from .models import Equipo
+
+    ids = dict(Equipo.objects.values_list("nombre", "pk"))
+    faltan = [e for e in obtener_datos_completos_premier() if e not in ids]
+    if faltan:
+        Equipo.objects.bulk_create([Equipo(nombre=e) for e in faltan], ignore_conflicts=True)
+        ids = dict(Equipo.objects.values_list("nombre", "pk"))
+    return ids
+
+
+def equipo_id(texto, ids):
+    """pk de Equipo para el nombre de una fuente (ids de ids_equipos()), o None."""
+    return ids.get(nombre_oficial(texto))
@@ -0,0 +1,136 @@
+"""
+Sesiones HTTP compartidas por host para scrapers y clientes de API.
+Cada host tiene su requests.Session con keep-alive, pool de conexiones, reintentos con
+backoff (solo GET/HEAD, que son idempotentes) y un timeout por defecto propio.
+
+Uso: http_client.get(url, headers=..., params=...) en lugar de requests.get(...).
+Dentro de un bloque `with plazo(limite)` las peticiones del hilo no pasan de ese instante:
+timeout recortado al tiempo que queda, sin reintentos, y error inmediato si ya se agotó.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TIMEOUT_POR_DEFECTO = 15
+# Timeout (segundos) por host; se puede pasar timeout=... en la llamada para casos puntuales
+TIMEOUTS_POR_HOST = {
+    "api.sportmonks.com": 15,
+    "fixturedownload.com": 15,
+    "www.futbolfantasy.com": 15,
+    "www.apuestas-deportivas.es": 25,
+    "www.fichajes.com": 10,
+    "www.livefutbol.com": 20,
+}
+# Separación mínima (segundos) entre peticiones al mismo host, para no saturarlo al descargar en paralelo
+MIN_INTERVALO_POR_HOST = {
+    "www.fichajes.com": 0.25,
+}
+# Códigos que merecen reintento (saturación o fallo temporal del servidor)
+STATUS_REINTENTABLES = (429, 500, 502, 503, 504)
+# Espera máxima (segundos) antes de un reintento, tanto por backoff como por la cabecera Retry-After
+ESPERA_MAXIMA_REINTENTO = 5
+
+_sesiones = {}
+_lock = threading.Lock()
+# host -> instante (time.monotonic) a partir del cual puede salir la siguiente petición
+_proximo_turno = {}
+_lock_turnos = threading.Lock()
+# Plazo (time.monotonic) de las peticiones del hilo actual, si lo hay (ver plazo())
+_local = threading.local()
+
+
+class _Reintentos(Retry):
+    """Retry que nunca duerme más de ESPERA_MAXIMA_REINTENTO, aunque el servidor pida un Retry-After mayor."""
+
+    def get_backoff_time(self):
+        return min(super().get_backoff_time(), ESPERA_MAXIMA_REINTENTO)
+
+    def get_retry_after(self, response):
+        espera = super().get_retry_after(response)
+        return None if espera is None else min(espera, ESPERA_MAXIMA_REINTENTO)
+
+
+def _crear_sesion(con_reintentos=True):
+    reintentos = _Reintentos(
+        total=getattr(settings, "HTTP_REINTENTOS", 2) if con_reintentos else 0,
+        backoff_factor=getattr(settings, "HTTP_BACKOFF", 0.5),
+        status_forcelist=STATUS_REINTENTABLES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=getattr(settings, "HTTP_POOL_CONNECTIONS", 4),
+        pool_maxsize=getattr(settings, "HTTP_POOL_MAXSIZE", 10),
+        max_retries=reintentos,
+    )
+    sesion = requests.Session()
+    sesion.mount("https://", adapter)
+    sesion.mount("http://", adapter)
+    return sesion
+
+
+def get_session(host, con_reintentos=True):
+    """Devuelve (creándola la primera vez) la sesión compartida para host (con o sin reintentos)."""
+    clave = (host, con_reintentos)
+    sesion = _sesiones.get(clave)
+    if sesion is None:
+        with _lock:
+            sesion = _sesiones.get(clave)
+            if sesion is None:
+                sesion = _sesiones[clave] = _crear_sesion(con_reintentos)
+    return sesion
+
+
+@contextmanager
+def plazo(limite):
+    """Las peticiones de este hilo dentro del bloque deben terminar antes de limite (time.monotonic)."""
+    anterior = getattr(_local, "limite", None)
+    _local.limite = limite
+    try:
+        yield
+    finally:
+        _local.limite = anterior
+
+
+def _esperar_turno(host):
+    """Limita el ritmo por host: reserva el siguiente hueco libre y espera (fuera del lock) hasta él."""
+    intervalo = MIN_INTERVALO_POR_HOST.get(host)
+    if not intervalo:
+        return
+    with _lock_turnos:
+        ahora = time.monotonic()
+        turno = max(ahora, _proximo_turno.get(host, 0.0))
+        _proximo_turno[host] = turno + intervalo
+    if turno > ahora:
+        time.sleep(turno - ahora)
+
+
+def get(url, timeout=None, **kwargs):
+    """GET con la sesión del host de url y su timeout por defecto. Misma firma que requests.get."""
+    host = (urlsplit(url).hostname or "").lower()
+    _esperar_turno(host)
+    if timeout is None:
+        timeout = TIMEOUTS_POR_HOST.get(host, TIMEOUT_POR_DEFECTO)
+    limite = getattr(_local, "limite", None)
+    if limite is None:
+        return get_session(host).get(url, timeout=timeout, **kwargs)
+    # Con plazo: un solo intento y nunca más allá del plazo (reintentar no cabría en él)
+    restante = limite - time.monotonic()
+    if restante <= 0:
+        raise requests.Timeout(f"Plazo agotado antes de pedir {host}")
+    return get_session(host, con_reintentos=False).get(url, timeout=min(timeout, restante), **kwargs)
+
+
+def cerrar_sesiones():
+    """Cierra todas las sesiones (libera sockets); la próxima llamada crea sesiones nuevas."""
+    with _lock:
+        for sesion in _sesiones.values():
+            sesion.close()
+        _sesiones.clear()
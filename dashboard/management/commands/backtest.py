@@ -0,0 +1,79 @@
+"""
+Backtest del pronóstico sobre los partidos ya jugados: log-loss, Brier, acierto y calibración.
+Ejecutar: python manage.py backtest
+          python manage.py backtest --desde 2025-10-01
+          python manage.py backtest --rejilla factor_altura=0.9,0.94,1 --rejilla escala_profundidad=0.5,1,1.5 --procesos 4
+"""
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.backtest import ESCALAS, PARAMETROS, backtest, rejilla
+
+
+class Command(BaseCommand):
+    help = "Repite los partidos jugados con el modelo (bajas reconstruidas a cada fecha) y mide su calidad."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rejilla", action="append", default=[], metavar="NOMBRE=V1,V2",
+            help=f"Valores a probar de un parámetro (repetible): {', '.join([*PARAMETROS, *ESCALAS])}.",
+        )
+        parser.add_argument("--desde", help="Solo partidos desde esta fecha (AAAA-MM-DD).")
+        parser.add_argument("--procesos", type=int, default=1, help="Procesos en paralelo (por combinación).")
+        parser.add_argument("--mostrar", type=int, default=10, help="Combinaciones a listar en la rejilla.")
+        parser.add_argument("--sin-sportmonks", action="store_true", help="No completar marcadores con Sportmonks.")
+
+    def handle(self, *args, **options):
+        valores = {}
+        for opcion in options["rejilla"]:
+            nombre, _, lista = opcion.partition("=")
+            nombre = nombre.strip()
+            if nombre not in PARAMETROS and nombre not in ESCALAS:
+                raise CommandError(f"Parámetro desconocido: {nombre}")
+            try:
+                valores[nombre] = [float(v) for v in lista.split(",") if v.strip()]
+            except ValueError:
+                raise CommandError(f"Valores no numéricos en --rejilla {opcion}")
+            if not valores[nombre]:
+                raise CommandError(f"Sin valores en --rejilla {opcion}")
+        desde = None
+        if options["desde"]:
+            try:
+                desde = datetime.strptime(options["desde"], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            except ValueError:
+                raise CommandError("--desde debe tener el formato AAAA-MM-DD")
+
+        inicio = time.monotonic()
+        resultados = backtest(
+            rejilla(valores) if valores else None,
+            desde=desde,
+            procesos=options["procesos"],
+            con_sportmonks=not options["sin_sportmonks"],
+        )
+        mejor, m = resultados[0]
+        if m["sin_historial"]:
+            self.stdout.write(self.style.WARNING(
+                f"{m['sin_historial']} partidos jugados antes del historial de bajas (CambioBaja) quedan fuera."
+            ))
+        if not m["partidos"]:
+            self.stdout.write(self.style.WARNING("No hay partidos jugados con resultado e historial de bajas."))
+            return
+        self.stdout.write(
+            f"{m['partidos']} partidos, {len(resultados)} combinaciones en {time.monotonic() - inicio:.1f} s."
+        )
+        if valores:
+            for parametros, r in resultados[:options["mostrar"]]:
+                texto = ", ".join(f"{k}={v:g}" for k, v in parametros.items())
+                self.stdout.write(
+                    f"  log-loss {r['log_loss']:.4f} | Brier {r['brier']:.4f} | acierto {r['acierto']:>5}% | {texto}"
+                )
+            self.stdout.write(self.style.SUCCESS("Mejor combinación: " + ", ".join(f"{k}={v:g}" for k, v in mejor.items())))
+        self.stdout.write(
+            f"Log-loss {m['log_loss']:.4f} | Brier {m['brier']:.4f} | acierto 1X2 {m['acierto']}% | "
+            f"marcador exacto {m['acierto_marcador']}%"
+        )
+        self.stdout.write("Calibración (probabilidad prevista vs frecuencia observada):")
+        for c in m["calibracion"]:
+            self.stdout.write(f"  {c['tramo']:>8}  n={c['n']:>4}  prevista {c['prevista']:>5}%  observada {c['observada']:>5}%")
@@ -0,0 +1,107 @@
+"""
+Benchmark de los extractores de los scrapers sobre HTML guardado (sin red ni base de datos).
+Ejecutar: python manage.py benchmark_scrapers --descargar paginas/     (guarda las páginas actuales)
+          python manage.py benchmark_scrapers \
+              --lesionados dashboard/tests/fixtures/futbolfantasy_lesionados_sintetica.html \
+              --sancionados dashboard/tests/fixtures/futbolfantasy_sancionados_sintetica.html
+          python manage.py benchmark_scrapers \
+              --livefutbol dashboard/tests/fixtures/livefutbol_arbitros_sintetica.html \
+              --fichajes dashboard/tests/fixtures/fichajes_premier_sintetica.html
+Las páginas de dashboard/tests/fixtures son sintéticas (las que usan los tests); con --descargar se miden
+las reales.
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import http_client, scraper, scraper_arbitros, scraper_livefutbol
+from dashboard.benchmark import benchmark_futbolfantasy, benchmark_parseo_dirigido, benchmark_parsers
+
+# Páginas que --descargar guarda: nombre de fichero -> (URL, cabeceras)
+PAGINAS = {
+    "lesionados.html": (scraper.URL_LESIONADOS, scraper.HEADERS),
+    "sancionados.html": (scraper.URL_SANCIONADOS, scraper.HEADERS),
+    "livefutbol.html": (scraper_livefutbol.URL_REFEREES, scraper_livefutbol.HEADERS),
+    "fichajes.html": (scraper_arbitros.URL_PREMIER, scraper_arbitros.HEADERS),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide los extractores de los scrapers sobre páginas HTML guardadas: actual vs anterior "
+        "(futbolfantasy), parseo dirigido vs completo (livefutbol, fichajes) y lxml vs html.parser."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lesionados", help="HTML guardado de futbolfantasy lesionados.")
+        parser.add_argument("--sancionados", help="HTML guardado de futbolfantasy sancionados.")
+        parser.add_argument("--livefutbol", help="HTML guardado de la página de árbitros de livefutbol.")
+        parser.add_argument("--fichajes", help="HTML guardado de la portada Premier de fichajes.com.")
+        parser.add_argument("--repeticiones", type=int, default=5, help="Repeticiones (se toma la mejor).")
+        parser.add_argument("--descargar", metavar="DIR", help="Descargar las páginas actuales a DIR y salir.")
+
+    def _leer(self, ruta):
+        if not ruta:
+            return None
+        try:
+            return Path(ruta).read_bytes()
+        except OSError as e:
+            raise CommandError(f"No se pudo leer {ruta}: {e}")
+
+    def handle(self, *args, **options):
+        if options["descargar"]:
+            destino = Path(options["descargar"])
+            destino.mkdir(parents=True, exist_ok=True)
+            for fichero, (url, headers) in PAGINAS.items():
+                r = http_client.get(url, headers=headers)
+                if r.status_code != 200:
+                    self.stdout.write(self.style.WARNING(f"{url}: HTTP {r.status_code}"))
+                    continue
+                (destino / fichero).write_bytes(r.content)
+                self.stdout.write(f"Guardado {destino / fichero} ({len(r.content)} bytes)")
+            return
+
+        html = {clave: self._leer(options[clave]) for clave in ("lesionados", "sancionados", "livefutbol", "fichajes")}
+        resultados = benchmark_futbolfantasy(html["lesionados"], html["sancionados"], options["repeticiones"])
+        dirigidos = benchmark_parseo_dirigido(html["livefutbol"], html["fichajes"], options["repeticiones"])
+        if not resultados and not dirigidos:
+            raise CommandError(
+                "Indica al menos un HTML (--lesionados, --sancionados, --livefutbol, --fichajes) o --descargar DIR."
+            )
+        for r in resultados:
+            aceleracion = r["ms_anterior"] / r["ms_actual"] if r["ms_actual"] else 0
+            self.stdout.write(
+                f"{r['nombre']}: {r['bytes']} bytes, {r['filas']} filas | parseo ({r['parser']}) {r['ms_parseo']} ms | "
+                f"actual {r['ms_actual']} ms | anterior {r['ms_anterior']} ms | x{aceleracion:.1f}"
+            )
+            self.stdout.write(
+                f"  extracción sin parseo: actual {r['ms_extraccion_actual']} ms | "
+                f"anterior {r['ms_extraccion_anterior']} ms"
+            )
+            if r["coinciden"]:
+                self.stdout.write(self.style.SUCCESS("  mismo resultado que el extractor anterior"))
+            else:
+                self.stdout.write(self.style.WARNING("  el resultado difiere del extractor anterior"))
+        for r in dirigidos:
+            aceleracion = r["ms_completo"] / r["ms_dirigido"] if r["ms_dirigido"] else 0
+            self.stdout.write(
+                f"{r['nombre']} ({r['parser']}): {r['bytes']} bytes, {r['filas']} filas | "
+                f"dirigido {r['ms_dirigido']} ms | completo {r['ms_completo']} ms | x{aceleracion:.1f}"
+            )
+            self.stdout.write(
+                f"  árbol: dirigido {r['nodos_dirigido']} nodos, {r['kb_dirigido']} KB | "
+                f"completo {r['nodos_completo']} nodos, {r['kb_completo']} KB"
+            )
+            if r["coinciden"]:
+                self.stdout.write(self.style.SUCCESS("  mismo resultado que con el documento completo"))
+            else:
+                self.stdout.write(self.style.WARNING("  el resultado difiere del documento completo"))
+        for r in benchmark_parsers(**{f"html_{k}": v for k, v in html.items()}, repeticiones=options["repeticiones"]):
+            tiempos = " | ".join(f"{p} {d['ms_parseo']} ms, {d['filas']} filas" for p, d in r["parsers"].items())
+            self.stdout.write(f"{r['nombre']} por parser: {tiempos}")
+            if len(r["parsers"]) < 2:
+                self.stdout.write(self.style.WARNING("  solo está instalado html.parser: instala lxml para comparar"))
+            elif r["coinciden"]:
+                self.stdout.write(self.style.SUCCESS("  mismas filas con todos los parsers"))
+            else:
+                self.stdout.write(self.style.WARNING("  las filas difieren entre parsers"))
@@ -0,0 +1,34 @@
+"""
+Worker de la cola de tareas (TareaRefresco): ejecuta los scrapers encolados desde el dashboard.
+Ejecutar: python manage.py procesar_tareas            (bucle continuo)
+          python manage.py procesar_tareas --una-vez  (vacía la cola y termina; útil en cron)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.tareas import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = "Ejecuta las tareas de actualización (lesionados, sancionados, árbitros) encoladas desde el dashboard."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--una-vez", action="store_true", help="Procesar las pendientes y salir.")
+        parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos entre consultas a la cola.")
+
+    def handle(self, *args, **options):
+        if options["una_vez"]:
+            n = procesar_pendientes()
+            self.stdout.write(self.style.SUCCESS(f"Tareas ejecutadas: {n}"))
+            return
+        self.stdout.write("Worker de tareas iniciado (Ctrl+C para salir).")
+        try:
+            while True:
+                n = procesar_pendientes()
+                if n:
+                    self.stdout.write(f"Tareas ejecutadas: {n}")
+                else:
+                    time.sleep(options["intervalo"])
+        except KeyboardInterrupt:
+            self.stdout.write("Worker detenido.")
@@ -0,0 +1,36 @@
+"""
+Pronósticos (árbitro automático) de una jornada completa, calculados en lote.
+Ejecutar: python manage.py pronosticos               (próxima jornada)
+          python manage.py pronosticos --jornada 12
+          python manage.py pronosticos --todas --json (toda la temporada, una línea JSON por partido)
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from dashboard.pronosticos import generar_lote, partido_a_dict, partidos_jornada, partidos_temporada
+
+
+class Command(BaseCommand):
+    help = "Calcula los pronósticos de todos los partidos de una jornada (o de la temporada)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jornada", type=int, default=None, help="Número de jornada (por defecto la próxima).")
+        parser.add_argument("--todas", action="store_true", help="Todos los partidos del calendario.")
+        parser.add_argument("--json", action="store_true", help="Salida JSON (una línea por partido).")
+
+    def handle(self, *args, **options):
+        partidos = partidos_temporada() if options["todas"] else partidos_jornada(options["jornada"])
+        if not partidos:
+            raise CommandError("No hay partidos para esa jornada en el calendario.")
+        for partido, p in generar_lote(partidos):
+            if options["json"]:
+                self.stdout.write(json.dumps(partido_a_dict(partido, p), cls=DjangoJSONEncoder, ensure_ascii=False))
+                continue
+            local, visitante, _, jornada = partido
+            self.stdout.write(
+                f"J{jornada or '?'} {p.get('fecha_partido') or '':>20}  {local} {p['marcador']} {visitante}"
+                f"  | tarjetas {p['tarjetas']} ({p['arbitro_nombre']}), corners {p['corners']},"
+                f" ambos anotan {p['prob_ambos_anotan']} %"
+            )
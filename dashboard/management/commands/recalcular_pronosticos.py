@@ -0,0 +1,19 @@
+"""
+Rellena la tabla de pronósticos precalculados con los partidos próximos del calendario.
+Ejecutar: python manage.py recalcular_pronosticos          (solo los que faltan o no están vigentes)
+          python manage.py recalcular_pronosticos --todos  (todos)
+"""
+from django.core.management.base import BaseCommand
+
+from dashboard.pronosticos import recalcular_pronosticos
+
+
+class Command(BaseCommand):
+    help = "Calcula y guarda los pronósticos de los partidos próximos (árbitro automático)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todos", action="store_true", help="Recalcular también los que están vigentes.")
+
+    def handle(self, *args, **options):
+        n = recalcular_pronosticos(todos=options["todos"])
+        self.stdout.write(self.style.SUCCESS(f"Pronósticos recalculados: {n}"))
@@ -0,0 +1,45 @@
+"""
+Daemon de refresco: mantiene al día lesionados/sancionados, árbitros, calendario y datos de
+Sportmonks, cada fuente con su cadencia (ver dashboard/refresco.py). También procesa la cola de
+tareas del dashboard, así que sustituye a procesar_tareas si se ejecuta este.
+Ejecutar: python manage.py refresh_daemon
+          python manage.py refresh_daemon --una-vez                    (todas una vez y salir; cron)
+          python manage.py refresh_daemon --fuentes calendario,fixtures
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.refresco import (
+    FUNCIONES, bucle, crear_fuentes, ejecutar_fuente, renovando_candado, soltar_candado, tomar_candado,
+)
+
+
+class Command(BaseCommand):
+    help = "Refresca periódicamente las fuentes externas (scrapers, calendario, Sportmonks)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--una-vez", action="store_true", help="Ejecutar cada fuente una vez y salir.")
+        parser.add_argument(
+            "--fuentes", default="", help=f"Lista separada por comas (por defecto todas: {', '.join(FUNCIONES)})."
+        )
+
+    def handle(self, *args, **options):
+        nombres = [n.strip() for n in options["fuentes"].split(",") if n.strip()]
+        desconocidas = [n for n in nombres if n not in FUNCIONES]
+        if desconocidas:
+            raise CommandError(f"Fuentes desconocidas: {', '.join(desconocidas)}")
+        token = tomar_candado()
+        if token is None:
+            raise CommandError("Ya hay otra instancia del daemon de refresco en marcha.")
+        fuentes = crear_fuentes(nombres or None)
+        try:
+            if options["una_vez"]:
+                with renovando_candado(token):
+                    ok = sum(ejecutar_fuente(f, self.stdout.write) for f in fuentes)
+                self.stdout.write(self.style.SUCCESS(f"Fuentes refrescadas: {ok}/{len(fuentes)}"))
+                return
+            self.stdout.write(f"Daemon de refresco iniciado: {', '.join(f.nombre for f in fuentes)} (Ctrl+C para salir).")
+            bucle(fuentes, token, self.stdout.write)
+        except KeyboardInterrupt:
+            self.stdout.write("Daemon detenido.")
+        finally:
+            soltar_candado(token)
@@ -0,0 +1,35 @@
+"""
+Simulación Monte Carlo del resto de la temporada; el resultado se muestra en Estadísticas.
+Ejecutar: python manage.py simular_temporada
+          python manage.py simular_temporada --simulaciones 200000 --semilla 42 --procesos 4
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.simulacion import simular_temporada
+
+
+class Command(BaseCommand):
+    help = "Simula los partidos pendientes y guarda probabilidades de título, top 4 y descenso."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--simulaciones", type=int, default=100_000, help="Número de temporadas simuladas.")
+        parser.add_argument("--semilla", type=int, default=None, help="Semilla (para reproducir un resultado).")
+        parser.add_argument("--procesos", type=int, default=1, help="Procesos en paralelo (por bloques).")
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        sim = simular_temporada(
+            simulaciones=options["simulaciones"], semilla=options["semilla"], procesos=options["procesos"]
+        )
+        self.stdout.write(
+            f"{sim.simulaciones} simulaciones de {sim.partidos_restantes} partidos pendientes "
+            f"en {time.monotonic() - inicio:.1f} s (semilla {sim.semilla})."
+        )
+        for r in sim.resultados:
+            self.stdout.write(
+                f"  {r['equipo']:<26} {r['puntos']:>3} pts -> {r['puntos_esperados']:>5} esp. | "
+                f"título {r['titulo']:>6}% | top 4 {r['top4']:>6}% | descenso {r['descenso']:>6}%"
+            )
+        self.stdout.write(self.style.SUCCESS("Guardado: se muestra en Estadísticas."))
@@ -0,0 +1,32 @@
+"""
+Sincroniza el índice local de Sportmonks (equipos y partidos de la temporada).
+Ejecutar: python manage.py sync_sportmonks            (incremental: solo jornadas que pueden cambiar)
+          python manage.py sync_sportmonks --completo (todas las páginas de schedules/seasons)
+"""
+from django.core.management.base import BaseCommand
+
+from dashboard.sportmonks_client import _season_id, sincronizar_fixtures, sincronizar_ids_equipos
+
+
+class Command(BaseCommand):
+    help = "Sincroniza equipos (team_id) y partidos de la temporada Premier desde Sportmonks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--temporada", type=int, default=None, help="season_id (por defecto SPORTMONKS_SEASON_ID).")
+        parser.add_argument("--completo", action="store_true", help="Descargar el calendario completo en vez de incremental.")
+
+    def handle(self, *args, **options):
+        sid = options["temporada"] or _season_id()
+        self.stdout.write(f"Temporada Sportmonks: {sid}")
+
+        n_equipos, err = sincronizar_ids_equipos(sid)
+        if err:
+            self.stdout.write(self.style.WARNING(f"  Equipos: {err}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"  Equipos mapeados: {n_equipos}"))
+
+        n_partidos, err = sincronizar_fixtures(sid, completo=options["completo"])
+        if err:
+            self.stdout.write(self.style.ERROR(f"  Partidos: {err}"))
+            return
+        self.stdout.write(self.style.SUCCESS(f"  Partidos guardados/actualizados: {n_partidos}"))
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_lesionados_sancionados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipoSportmonks',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season_id', models.IntegerField()),
+                ('equipo', models.CharField(max_length=100)),
+                ('team_id', models.IntegerField()),
+                ('nombre_api', models.CharField(blank=True, max_length=120)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['season_id', 'equipo'],
+                'unique_together': {('season_id', 'equipo')},
+            },
+        ),
+    ]
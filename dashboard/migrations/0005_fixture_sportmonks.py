@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_equipo_sportmonks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FixtureSportmonks',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fixture_id', models.BigIntegerField(unique=True)),
+                ('season_id', models.IntegerField()),
+                ('round_id', models.BigIntegerField(blank=True, null=True)),
+                ('home_team_id', models.IntegerField()),
+                ('away_team_id', models.IntegerField()),
+                ('fecha', models.DateField()),
+                ('starting_at', models.DateTimeField(blank=True, null=True)),
+                ('state_id', models.IntegerField(blank=True, null=True)),
+                ('nombre', models.CharField(blank=True, max_length=150)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['starting_at'],
+                'indexes': [models.Index(fields=['home_team_id', 'away_team_id', 'fecha'], name='dashboard_f_home_te_9218d5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_fixture_sportmonks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioBaja',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('lesionado', 'Lesionado'), ('sancionado', 'Sancionado')], max_length=12)),
+                ('accion', models.CharField(choices=[('alta', 'Alta'), ('modificacion', 'Modificación'), ('baja', 'Baja')], max_length=12)),
+                ('equipo', models.CharField(max_length=100)),
+                ('nombre', models.CharField(max_length=100)),
+                ('detalle', models.JSONField(blank=True, default=dict)),
+                ('sincronizacion', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-sincronizacion', 'equipo', 'nombre'],
+                'indexes': [models.Index(fields=['tipo', 'sincronizacion'], name='dashboard_c_tipo_4dbfb7_idx')],
+            },
+        ),
+    ]
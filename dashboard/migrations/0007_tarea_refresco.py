@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_cambio_baja'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaRefresco',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('bajas', 'Lesionados y sancionados'), ('arbitros', 'Árbitros')], max_length=20)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('ok', 'Completada'), ('error', 'Error')], default='pendiente', max_length=10)),
+                ('intentos', models.IntegerField(default=0)),
+                ('max_intentos', models.IntegerField(default=3)),
+                ('resultado', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('ejecutar_desde', models.DateTimeField(default=django.utils.timezone.now)),
+                ('iniciada', models.DateTimeField(blank=True, null=True)),
+                ('finalizada', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-creada'],
+                'indexes': [models.Index(fields=['estado', 'ejecutar_desde'], name='dashboard_t_estado_a522fb_idx'), models.Index(fields=['tipo', 'estado'], name='dashboard_t_tipo_1b7ec8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_tarea_refresco'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pronostico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipo_local', models.CharField(max_length=100)),
+                ('equipo_visitante', models.CharField(max_length=100)),
+                ('fecha', models.DateTimeField(blank=True, null=True)),
+                ('jornada', models.IntegerField(blank=True, null=True)),
+                ('datos', models.JSONField(default=dict)),
+                ('version', models.CharField(max_length=16)),
+                ('vigente', models.BooleanField(default=True)),
+                ('calculado', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['fecha', 'equipo_local'],
+                'indexes': [models.Index(fields=['jornada', 'fecha'], name='dashboard_p_jornada_1af89b_idx')],
+                'unique_together': {('equipo_local', 'equipo_visitante')},
+            },
+        ),
+    ]
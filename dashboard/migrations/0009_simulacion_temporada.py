@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_pronostico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulacionTemporada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('simulaciones', models.IntegerField()),
+                ('semilla', models.BigIntegerField()),
+                ('partidos_restantes', models.IntegerField()),
+                ('version', models.CharField(max_length=16)),
+                ('resultados', models.JSONField(default=list)),
+            ],
+            options={
+                'ordering': ['-creada'],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_simulacion_temporada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Equipo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.AddField(
+            model_name='designacionarbitro',
+            name='local_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='designaciones_local', to='dashboard.equipo'),
+        ),
+        migrations.AddField(
+            model_name='designacionarbitro',
+            name='visitante_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='designaciones_visitante', to='dashboard.equipo'),
+        ),
+        migrations.AddField(
+            model_name='lesionado',
+            name='equipo_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lesionados', to='dashboard.equipo'),
+        ),
+        migrations.AddField(
+            model_name='sancionado',
+            name='equipo_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sancionados', to='dashboard.equipo'),
+        ),
+        migrations.AddIndex(
+            model_name='designacionarbitro',
+            index=models.Index(fields=['local_ref', 'visitante_ref'], name='dashboard_d_local_r_dae674_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesionado',
+            index=models.Index(fields=['equipo', 'nombre'], name='dashboard_l_equipo_3a39c6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sancionado',
+            index=models.Index(fields=['equipo', 'nombre'], name='dashboard_s_equipo_a50617_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:14
+
+from django.db import migrations
+
+# Copia congelada de los equipos del selector y de los alias de las fuentes a fecha de esta
+# migración (dashboard.equipos puede cambiar después; la migración no debe depender de ello).
+EQUIPOS = [
+    "AFC Bournemouth", "Arsenal", "Aston Villa", "Brentford", "Brighton & Hove Albion", "Burnley",
+    "Chelsea", "Crystal Palace", "Everton", "Fulham", "Leeds United", "Liverpool", "Manchester City",
+    "Manchester United", "Newcastle United", "Nottingham Forest", "Sunderland", "Tottenham Hotspur",
+    "West Ham United", "Wolverhampton Wanderers",
+]
+ALIAS = {
+    "bournemouth": "AFC Bournemouth",
+    "brighton": "Brighton & Hove Albion",
+    "brighton hove albion": "Brighton & Hove Albion",
+    "leeds": "Leeds United",
+    "man city": "Manchester City",
+    "man united": "Manchester United",
+    "man utd": "Manchester United",
+    "newcastle": "Newcastle United",
+    "nott'm forest": "Nottingham Forest",
+    "nottm forest": "Nottingham Forest",
+    "spurs": "Tottenham Hotspur",
+    "tottenham": "Tottenham Hotspur",
+    "west ham": "West Ham United",
+    "wolves": "Wolverhampton Wanderers",
+    "wolverhampton": "Wolverhampton Wanderers",
+}
+
+
+def rellenar(apps, schema_editor):
+    Equipo = apps.get_model("dashboard", "Equipo")
+    Lesionado = apps.get_model("dashboard", "Lesionado")
+    Sancionado = apps.get_model("dashboard", "Sancionado")
+    DesignacionArbitro = apps.get_model("dashboard", "DesignacionArbitro")
+
+    Equipo.objects.bulk_create([Equipo(nombre=e) for e in EQUIPOS], ignore_conflicts=True)
+    ids = dict(Equipo.objects.values_list("nombre", "pk"))
+    exactos = {**ALIAS, **{e.lower(): e for e in EQUIPOS}}
+
+    def equipo_id(texto):
+        return ids.get(exactos.get(" ".join((texto or "").replace("-", " ").split()).lower()))
+
+    for modelo in (Lesionado, Sancionado):
+        filas = list(modelo.objects.only("pk", "equipo"))
+        for f in filas:
+            f.equipo_ref_id = equipo_id(f.equipo)
+        modelo.objects.bulk_update(filas, ["equipo_ref"], batch_size=200)
+    filas = list(DesignacionArbitro.objects.only("pk", "equipo_local", "equipo_visitante"))
+    for f in filas:
+        f.local_ref_id = equipo_id(f.equipo_local)
+        f.visitante_ref_id = equipo_id(f.equipo_visitante)
+    DesignacionArbitro.objects.bulk_update(filas, ["local_ref", "visitante_ref"], batch_size=200)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_equipo'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar, migrations.RunPython.noop),
+    ]
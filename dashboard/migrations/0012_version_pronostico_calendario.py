@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_rellenar_equipos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pronostico',
+            name='version',
+            field=models.CharField(max_length=32),
+        ),
+    ]
@@ -1,4 +1,16 @@
 from django.db import models
+from django.utils import timezone
+
+
+class Equipo(models.Model):
+    """Equipo de la Premier con el nombre del selector; lesionados, sancionados y designaciones lo referencian."""
+    nombre = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ["nombre"]
+
+    def __str__(self):
+        return self.nombre
 
 
 class Lesionado(models.Model):
@@ -11,13 +23,20 @@ class Lesionado(models.Model):
     ]
     
     nombre = models.CharField(max_length=100)
-    equipo = models.CharField(max_length=100)
+    equipo = models.CharField(max_length=100)  # nombre tal cual lo da la fuente
+    # Equipo reconocido (equipos.nombre_oficial); None si el texto no es de un equipo del selector
+    equipo_ref = models.ForeignKey(
+        Equipo, null=True, blank=True, on_delete=models.SET_NULL, related_name="lesionados"
+    )
     posicion = models.CharField(max_length=3, choices=POSICIONES, default='NA')
     estrellas = models.IntegerField(default=1)  # 1, 2 o 3 estrellas
     tipo_lesion = models.CharField(max_length=120, blank=True)   # ej. "Lesión de tobillo"
     retorno_esperado = models.CharField(max_length=120, blank=True)  # ej. "Duda", "Baja confirmada"
     fecha_actualizacion = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["equipo", "nombre"])]
+
     def __str__(self):
         return f"{self.nombre} ({self.get_posicion_display()}) - {self.estrellas}⭐"
 
@@ -25,13 +44,17 @@ class Lesionado(models.Model):
 class Sancionado(models.Model):
     """Jugador sancionado (expulsión, acumulación de tarjetas, etc.) que baja el rendimiento del equipo."""
     nombre = models.CharField(max_length=100)
-    equipo = models.CharField(max_length=100)
+    equipo = models.CharField(max_length=100)  # nombre tal cual lo da la fuente
+    equipo_ref = models.ForeignKey(
+        Equipo, null=True, blank=True, on_delete=models.SET_NULL, related_name="sancionados"
+    )
     motivo = models.CharField(max_length=150, blank=True)  # ej. "5.ª amarilla", "Expulsión"
     jornada = models.CharField(max_length=20, blank=True)  # ej. "Jornada 25"
     fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["equipo", "nombre"]
+        indexes = [models.Index(fields=["equipo", "nombre"])]
 
     def __str__(self):
         return f"{self.nombre} ({self.equipo}) - {self.motivo or 'Sancionado'}"
@@ -41,12 +64,155 @@ class DesignacionArbitro(models.Model):
     """Árbitro asignado a un partido (actualizable con botón desde fichajes u otra fuente)."""
     equipo_local = models.CharField(max_length=120)
     equipo_visitante = models.CharField(max_length=120)
+    local_ref = models.ForeignKey(
+        Equipo, null=True, blank=True, on_delete=models.SET_NULL, related_name="designaciones_local"
+    )
+    visitante_ref = models.ForeignKey(
+        Equipo, null=True, blank=True, on_delete=models.SET_NULL, related_name="designaciones_visitante"
+    )
     arbitro_nombre = models.CharField(max_length=100)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
+        # unique_together ya crea el índice compuesto (equipo_local, equipo_visitante)
         unique_together = [["equipo_local", "equipo_visitante"]]
         ordering = ["-fecha_actualizacion"]
+        indexes = [models.Index(fields=["local_ref", "visitante_ref"])]
+
+    def __str__(self):
+        return f"{self.equipo_local} vs {self.equipo_visitante} → {self.arbitro_nombre}"
+
+
+class EquipoSportmonks(models.Model):
+    """ID de Sportmonks de cada equipo del selector, por temporada (se construye una vez por temporada)."""
+    season_id = models.IntegerField()
+    equipo = models.CharField(max_length=100)  # nombre como en el selector (ej. "Tottenham Hotspur")
+    team_id = models.IntegerField()
+    nombre_api = models.CharField(max_length=120, blank=True)  # nombre tal cual lo devuelve Sportmonks
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [["season_id", "equipo"]]
+        ordering = ["season_id", "equipo"]
+
+    def __str__(self):
+        return f"{self.equipo} → {self.team_id} (temporada {self.season_id})"
+
+
+class FixtureSportmonks(models.Model):
+    """Partido de la temporada según Sportmonks: índice local para resolver fixture_id sin llamar a la API."""
+    fixture_id = models.BigIntegerField(unique=True)
+    season_id = models.IntegerField()
+    round_id = models.BigIntegerField(null=True, blank=True)
+    home_team_id = models.IntegerField()
+    away_team_id = models.IntegerField()
+    fecha = models.DateField()  # día del partido (UTC), como en fixtures/date
+    starting_at = models.DateTimeField(null=True, blank=True)
+    state_id = models.IntegerField(null=True, blank=True)  # 5 = finalizado
+    nombre = models.CharField(max_length=150, blank=True)  # ej. "Arsenal vs Chelsea"
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["starting_at"]
+        indexes = [models.Index(fields=["home_team_id", "away_team_id", "fecha"])]
+
+    def __str__(self):
+        return f"{self.nombre or self.fixture_id} ({self.fecha})"
+
+
+class CambioBaja(models.Model):
+    """Cambio en lesionados/sancionados detectado en una sincronización (alta, modificación o baja)."""
+    TIPOS = [
+        ('lesionado', 'Lesionado'),
+        ('sancionado', 'Sancionado'),
+    ]
+    ACCIONES = [
+        ('alta', 'Alta'),
+        ('modificacion', 'Modificación'),
+        ('baja', 'Baja'),
+    ]
+
+    tipo = models.CharField(max_length=12, choices=TIPOS)
+    accion = models.CharField(max_length=12, choices=ACCIONES)
+    equipo = models.CharField(max_length=100)
+    nombre = models.CharField(max_length=100)
+    detalle = models.JSONField(default=dict, blank=True)  # campo -> [antes, después] o valores de la fila
+    sincronizacion = models.DateTimeField()  # mismo valor para todos los cambios de una pasada
+
+    class Meta:
+        ordering = ["-sincronizacion", "equipo", "nombre"]
+        indexes = [models.Index(fields=["tipo", "sincronizacion"])]
+
+    def __str__(self):
+        return f"{self.get_accion_display()} {self.get_tipo_display().lower()}: {self.nombre} ({self.equipo})"
+
+
+class TareaRefresco(models.Model):
+    """Actualización (scraper) encolada desde el dashboard; la ejecuta `python manage.py procesar_tareas`."""
+    TIPOS = [
+        ('bajas', 'Lesionados y sancionados'),
+        ('arbitros', 'Árbitros'),
+    ]
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_curso', 'En curso'),
+        ('ok', 'Completada'),
+        ('error', 'Error'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='pendiente')
+    intentos = models.IntegerField(default=0)
+    max_intentos = models.IntegerField(default=3)
+    resultado = models.JSONField(default=dict, blank=True)  # ej. {"mensaje": "...", "lesionados": 40}
+    error = models.TextField(blank=True)
+    creada = models.DateTimeField(auto_now_add=True)
+    ejecutar_desde = models.DateTimeField(default=timezone.now)  # se retrasa al reintentar (backoff)
+    iniciada = models.DateTimeField(null=True, blank=True)
+    finalizada = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-creada"]
+        indexes = [
+            models.Index(fields=["estado", "ejecutar_desde"]),
+            models.Index(fields=["tipo", "estado"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} ({self.get_estado_display()})"
+
+
+class Pronostico(models.Model):
+    """Pronóstico precalculado (árbitro automático) de un partido; lo mantiene dashboard/pronosticos.py."""
+    equipo_local = models.CharField(max_length=100)
+    equipo_visitante = models.CharField(max_length=100)
+    fecha = models.DateTimeField(null=True, blank=True)  # inicio del partido (UTC) según el calendario
+    jornada = models.IntegerField(null=True, blank=True)
+    datos = models.JSONField(default=dict)  # dict devuelto por generar_pronostico_pro
+    version = models.CharField(max_length=32)  # pronosticos.version_pronosticos() con la que se calculó
+    vigente = models.BooleanField(default=True)  # False = cambiaron sus datos de entrada; hay que recalcular
+    calculado = models.DateTimeField()
+
+    class Meta:
+        unique_together = [["equipo_local", "equipo_visitante"]]
+        ordering = ["fecha", "equipo_local"]
+        indexes = [models.Index(fields=["jornada", "fecha"])]
+
+    def __str__(self):
+        return f"J{self.jornada or '?'} {self.equipo_local} vs {self.equipo_visitante}: {self.datos.get('marcador', '')}"
+
+
+class SimulacionTemporada(models.Model):
+    """Resultado de una simulación Monte Carlo del resto de temporada (manage.py simular_temporada)."""
+    creada = models.DateTimeField(auto_now_add=True)
+    simulaciones = models.IntegerField()
+    semilla = models.BigIntegerField()  # con la misma semilla y datos se obtiene el mismo resultado
+    partidos_restantes = models.IntegerField()
+    version = models.CharField(max_length=16)  # firma_modelo() usada para los goles esperados
+    resultados = models.JSONField(default=list)  # una fila por equipo (titulo, top4, descenso, posiciones...)
+
+    class Meta:
+        ordering = ["-creada"]
 
     def __str__(self):
-        return f"{self.equipo_local} vs {self.equipo_visitante} → {self.arbitro_nombre}"
\ No newline at end of file
+        return f"Simulación {self.creada:%Y-%m-%d %H:%M} ({self.simulaciones} sims, {self.partidos_restantes} partidos)"
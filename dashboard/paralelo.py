@@ -0,0 +1,53 @@
+"""
+Ejecución concurrente de llamadas externas independientes (Sportmonks, calendario, Head2Head)
+con un plazo global por petición: la latencia queda acotada por la llamada más lenta, no por la suma.
+Las llamadas HTTP de cada tarea se hacen con http_client.plazo(): no reintentan ni esperan más allá
+del plazo, así que una tarea abandonada deja libre su hilo del pool poco después y no acumula trabajo.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connection
+
+from . import http_client
+
+# Pool compartido por todas las peticiones del worker (los hilos se reutilizan)
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=getattr(settings, "PARALELO_MAX_WORKERS", 8),
+    thread_name_prefix="premier-io",
+)
+
+
+def _ejecutar(func, limite):
+    try:
+        with http_client.plazo(limite):
+            return func()
+    finally:
+        # Cada hilo abre su propia conexión a la DB; cerrarla para no dejarla colgada
+        connection.close()
+
+
+def ejecutar_en_paralelo(tareas, plazo):
+    """
+    tareas: dict nombre -> callable sin argumentos (usar functools.partial para pasarlos).
+    plazo: segundos máximos que se espera al conjunto.
+    Devuelve dict nombre -> (resultado, error). error es None si terminó bien,
+    "timeout" si no terminó a tiempo o el texto de la excepción si falló.
+    Las que aún no habían empezado se cancelan; las que están en curso no se esperan y su siguiente
+    llamada HTTP falla al haber pasado el plazo.
+    """
+    limite = time.monotonic() + plazo
+    futuros = {nombre: _EXECUTOR.submit(_ejecutar, func, limite) for nombre, func in tareas.items()}
+    wait(list(futuros.values()), timeout=max(0, limite - time.monotonic()))
+    resultados = {}
+    for nombre, futuro in futuros.items():
+        if not futuro.done():
+            futuro.cancel()
+            resultados[nombre] = (None, "timeout")
+            continue
+        try:
+            resultados[nombre] = (futuro.result(), None)
+        except Exception as e:
+            resultados[nombre] = (None, f"{type(e).__name__}: {e}")
+    return resultados
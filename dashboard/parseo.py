@@ -0,0 +1,37 @@
+"""
+Parseo de HTML común a todos los scrapers: elige una vez el tree builder de BeautifulSoup
+(lxml si está instalado, que es varias veces más rápido; si no, html.parser de la biblioteca
+estándar) y cada scraper parsea su respuesta una sola vez con sopa().
+Se puede forzar uno con el setting SCRAPER_PARSER (ej. "html.parser"), que core/settings.py
+lee de la variable de entorno del mismo nombre.
+"""
+from functools import lru_cache
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+from django.conf import settings
+
+# Por orden de preferencia; html.parser siempre está disponible
+PARSERS_PREFERIDOS = ("lxml", "html.parser")
+
+
+def parsers_disponibles():
+    """Parsers de PARSERS_PREFERIDOS instalados, en orden de preferencia."""
+    return tuple(nombre for nombre in PARSERS_PREFERIDOS if builder_registry.lookup(nombre) is not None)
+
+
+@lru_cache(maxsize=1)
+def parser_html():
+    """Nombre del tree builder a usar: el de SCRAPER_PARSER si está instalado, o el primero disponible."""
+    forzado = (getattr(settings, "SCRAPER_PARSER", "") or "").strip()
+    for nombre in ((forzado,) if forzado else ()) + PARSERS_PREFERIDOS:
+        if builder_registry.lookup(nombre) is not None:
+            return nombre
+    return "html.parser"
+
+
+def sopa(html, parse_only=None):
+    """BeautifulSoup del HTML (bytes o str) con el parser elegido; si ya viene parseado se usa tal cual."""
+    if isinstance(html, BeautifulSoup):
+        return html
+    return BeautifulSoup(html, parser_html(), parse_only=parse_only)
@@ -0,0 +1,171 @@
+"""
+Sincronización incremental de lesionados y sancionados scrapeados.
+Se compara lo scrapeado con lo guardado por (equipo, nombre) y solo se aplican las altas,
+modificaciones y bajas, cada una registrada en CambioBaja. Los objetos se preparan fuera de la
+transacción y las escrituras van en bloque (bulk_create/bulk_update), así el bloqueo de
+escritura de SQLite dura lo mínimo y las filas sin cambios conservan su fecha_actualizacion.
+Los pronósticos precalculados de los equipos con cambios se invalidan al terminar, también los de
+los equipos a los que pasa (o de los que sale) una fila que solo cambia de FK al reconocer un alias.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .equipos import equipo_id, ids_equipos
+from .models import CambioBaja, Lesionado, Sancionado
+
+# Filas por INSERT/UPDATE (SQLite admite hasta 32766 parámetros por sentencia; 200 filas va sobrado)
+BATCH_SIZE = 200
+
+# Campos que se comparan para decidir si una fila existente cambió
+CAMPOS_LESIONADO = ("posicion", "estrellas", "tipo_lesion", "retorno_esperado")
+CAMPOS_SANCIONADO = ("motivo", "jornada")
+
+
+def _lesionado(item, ids=None):
+    return Lesionado(
+        nombre=item["nombre"],
+        equipo=item["equipo"],
+        equipo_ref_id=equipo_id(item["equipo"], ids) if ids else None,
+        posicion=item.get("posicion", "NA"),
+        estrellas=item.get("estrellas", 1),
+        tipo_lesion=item.get("tipo_lesion", ""),
+        retorno_esperado=item.get("retorno_esperado", ""),
+    )
+
+
+def _sancionado(item, ids=None):
+    return Sancionado(
+        nombre=item["nombre"],
+        equipo=item["equipo"],
+        equipo_ref_id=equipo_id(item["equipo"], ids) if ids else None,
+        # Sin motivo se guarda vacío, como hacía el scraper de futbolfantasy (apuestas-deportivas siempre lo trae)
+        motivo=item.get("motivo", ""),
+        jornada=item.get("jornada", ""),
+    )
+
+
+def _por_clave(objetos):
+    """{(equipo, nombre): obj}; si la fuente repite jugador se queda el primero."""
+    resultado = {}
+    for o in objetos:
+        resultado.setdefault((o.equipo, o.nombre), o)
+    return resultado
+
+
+def _reconciliar(modelo, tipo, nuevos, campos, ahora, reasignados):
+    """
+    Aplica el diff entre nuevos (lista de objetos sin guardar) y la tabla. Devuelve {accion: n}.
+    reasignados: set al que se añaden los pk de Equipo (anterior y nuevo) de las filas que solo cambian de FK.
+    """
+    nuevos = _por_clave(nuevos)
+    existentes = {}
+    sobrantes = []  # duplicados antiguos de la misma clave: se borran sin registrar cambio
+    for o in modelo.objects.all():
+        if (o.equipo, o.nombre) in existentes:
+            sobrantes.append(o.pk)
+        else:
+            existentes[(o.equipo, o.nombre)] = o
+
+    altas, modificados, cambios = [], [], []
+    solo_equipo = 0  # filas que solo cambian de FK (se guardan pero no cuentan como modificación)
+    for clave, nuevo in nuevos.items():
+        viejo = existentes.get(clave)
+        if viejo is None:
+            altas.append(nuevo)
+            cambios.append(CambioBaja(
+                tipo=tipo, accion="alta", equipo=nuevo.equipo, nombre=nuevo.nombre,
+                detalle={c: getattr(nuevo, c) for c in campos}, sincronizacion=ahora,
+            ))
+            continue
+        diff = {c: [getattr(viejo, c), getattr(nuevo, c)] for c in campos if getattr(viejo, c) != getattr(nuevo, c)}
+        if diff:
+            for c in campos:
+                setattr(viejo, c, getattr(nuevo, c))
+            viejo.fecha_actualizacion = ahora
+            cambios.append(CambioBaja(
+                tipo=tipo, accion="modificacion", equipo=viejo.equipo, nombre=viejo.nombre,
+                detalle=diff, sincronizacion=ahora,
+            ))
+        # Un equipo reconocido de nuevo (alias añadido) solo actualiza la FK, sin registrar cambio
+        if diff or viejo.equipo_ref_id != nuevo.equipo_ref_id:
+            if not diff:
+                solo_equipo += 1
+                reasignados.update({viejo.equipo_ref_id, nuevo.equipo_ref_id} - {None})
+            viejo.equipo_ref_id = nuevo.equipo_ref_id
+            modificados.append(viejo)
+    bajas = [o for clave, o in existentes.items() if clave not in nuevos]
+    for o in bajas:
+        cambios.append(CambioBaja(
+            tipo=tipo, accion="baja", equipo=o.equipo, nombre=o.nombre,
+            detalle={c: getattr(o, c) for c in campos}, sincronizacion=ahora,
+        ))
+
+    if bajas or sobrantes:
+        modelo.objects.filter(pk__in=[o.pk for o in bajas] + sobrantes).delete()
+    if altas:
+        modelo.objects.bulk_create(altas, batch_size=BATCH_SIZE)
+    if modificados:
+        modelo.objects.bulk_update(modificados, [*campos, "equipo_ref", "fecha_actualizacion"], batch_size=BATCH_SIZE)
+    if cambios:
+        CambioBaja.objects.bulk_create(cambios, batch_size=BATCH_SIZE)
+    return {"altas": len(altas), "modificaciones": len(modificados) - solo_equipo, "bajas": len(bajas)}
+
+
+def sincronizar_bajas(lesionados=None, sancionados=None):
+    """
+    Sincroniza Lesionado y/o Sancionado con los items scrapeados (listas de dicts).
+    None = no tocar esa tabla. Todo en una única transacción corta.
+    Devuelve {"lesionados": {altas, modificaciones, bajas}, "sancionados": {...}} (solo las tocadas).
+    """
+    ids = ids_equipos()
+    objs_les = [_lesionado(i, ids) for i in lesionados] if lesionados is not None else None
+    objs_san = [_sancionado(i, ids) for i in sancionados] if sancionados is not None else None
+    ahora = timezone.now()
+    resumen = {}
+    reasignados = set()
+    with transaction.atomic():
+        if objs_les is not None:
+            resumen["lesionados"] = _reconciliar(
+                Lesionado, "lesionado", objs_les, CAMPOS_LESIONADO, ahora, reasignados
+            )
+        if objs_san is not None:
+            resumen["sancionados"] = _reconciliar(
+                Sancionado, "sancionado", objs_san, CAMPOS_SANCIONADO, ahora, reasignados
+            )
+    nombres = {pk: nombre for nombre, pk in ids.items()}
+    _invalidar_pronosticos(ahora, {nombres[pk] for pk in reasignados if pk in nombres})
+    return resumen
+
+
+def _invalidar_pronosticos(sincronizacion, reasignados=()):
+    """
+    Los pronósticos precalculados de los equipos con cambios en esta sincronización dejan de valer,
+    y los de reasignados (equipos de filas que solo cambiaron de FK, sin CambioBaja).
+    """
+    from .pronosticos import equipos_afectados_por_bajas, invalidar_pronosticos
+
+    equipos = set(CambioBaja.objects.filter(sincronizacion=sincronizacion).values_list("equipo", flat=True))
+    equipos.update(reasignados)
+    if equipos:
+        invalidar_pronosticos(equipos=equipos_afectados_por_bajas(equipos))
+
+
+def sincronizar_lesionados(items):
+    return sincronizar_bajas(lesionados=items).get("lesionados")
+
+
+def sincronizar_sancionados(items):
+    return sincronizar_bajas(sancionados=items).get("sancionados")
+
+
+def cambios_ultima_sincronizacion(tipo):
+    """Cambios (CambioBaja) de la última sincronización con cambios para tipo ('lesionado'/'sancionado')."""
+    ultima = (
+        CambioBaja.objects.filter(tipo=tipo)
+        .order_by("-sincronizacion")
+        .values_list("sincronizacion", flat=True)
+        .first()
+    )
+    if ultima is None:
+        return CambioBaja.objects.none()
+    return CambioBaja.objects.filter(tipo=tipo, sincronizacion=ultima)
@@ -0,0 +1,103 @@
+"""
+Motor de marcadores con Poisson independiente (NumPy).
+A partir de los goles esperados de local y visitante construye la matriz completa de
+probabilidades local×visitante y de ella saca los mercados: 1X2, más/menos goles, marcador
+exacto, ambos anotan, porterías a cero y hándicap asiático. Trabaja en lote: los partidos de
+una jornada se calculan en una sola operación sobre arrays (N, G+1, G+1).
+
+La salida de cada partido tiene la misma forma que procesar_probabilidades_sportmonks
+(top_marcadores, total_goals, btts_partido_pct) más fulltime_result y over_under_25 como en
+la vista de Sportmonks, para poder comparar ambos lado a lado.
+"""
+import numpy as np
+
+# Goles máximos por equipo en la matriz; la masa por encima (<0.01 % con λ≈3) se reparte al normalizar
+MAX_GOLES = 10
+# Líneas de más/menos goles y de hándicap asiático (sobre el local) que se calculan
+LINEAS_GOLES = (0.5, 1.5, 2.5, 3.5, 4.5)
+LINEAS_HANDICAP = (-1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5)
+TOP_MARCADORES = 5
+# λ mínimo (evita log(0) con equipos sin goles esperados)
+_LAMBDA_MINIMO = 1e-6
+
+_GOLES = np.arange(MAX_GOLES + 1)
+_LOG_FACTORIAL = np.concatenate(([0.0], np.cumsum(np.log(_GOLES[1:]))))
+_DIFERENCIA = np.subtract.outer(_GOLES, _GOLES)  # [h, a] -> h - a
+_TOTAL = np.add.outer(_GOLES, _GOLES)  # [h, a] -> h + a
+
+
+def _pmf(lambdas):
+    """(N,) -> (N, G+1): P(X = k) de una Poisson(λ) para k = 0..MAX_GOLES."""
+    lam = np.maximum(np.asarray(lambdas, dtype=float), _LAMBDA_MINIMO)[:, None]
+    return np.exp(_GOLES * np.log(lam) - lam - _LOG_FACTORIAL)
+
+
+def matrices_marcador(lambdas_local, lambdas_visitante):
+    """(N,), (N,) -> (N, G+1, G+1) con P[i, h, a] = prob. de que el partido i acabe h-a (suma 1)."""
+    matrices = _pmf(lambdas_local)[:, :, None] * _pmf(lambdas_visitante)[:, None, :]
+    return matrices / matrices.sum(axis=(1, 2), keepdims=True)
+
+
+def probabilidades_1x2(lambdas_local, lambdas_visitante):
+    """(N,), (N,) -> (N, 3) con las probabilidades de local, empate y visitante (sin redondear)."""
+    m = matrices_marcador(lambdas_local, lambdas_visitante)
+    return np.stack([_suma(m, _DIFERENCIA > 0), _suma(m, _DIFERENCIA == 0), _suma(m, _DIFERENCIA < 0)], axis=1)
+
+
+def _pct(p):
+    return round(float(p) * 100, 1)
+
+
+def _suma(matrices, mascara):
+    return (matrices * mascara).sum(axis=(1, 2))
+
+
+def mercados_lote(lambdas_local, lambdas_visitante, top=TOP_MARCADORES):
+    """Mercados de N partidos (listas de goles esperados). Devuelve una lista de dicts en porcentaje."""
+    m = matrices_marcador(lambdas_local, lambdas_visitante)
+    n = m.shape[0]
+    local = _suma(m, _DIFERENCIA > 0)
+    empate = _suma(m, _DIFERENCIA == 0)
+    visitante = _suma(m, _DIFERENCIA < 0)
+    ambos = _suma(m, (_GOLES[:, None] > 0) & (_GOLES[None, :] > 0))
+    cero_local = m[:, :, 0].sum(axis=1)  # el visitante no marca
+    cero_visitante = m[:, 0, :].sum(axis=1)
+    mas = {linea: _suma(m, _TOTAL > linea) for linea in LINEAS_GOLES}
+    totales = np.stack([_suma(m, _TOTAL == t) for t in range(2 * MAX_GOLES + 1)], axis=1)
+    handicap = {
+        linea: (_suma(m, _DIFERENCIA + linea > 0), _suma(m, _DIFERENCIA + linea == 0))
+        for linea in LINEAS_HANDICAP
+    }
+    planas = m.reshape(n, -1)
+    orden = np.argsort(-planas, axis=1)[:, :top]
+
+    resultado = []
+    for i in range(n):
+        total_goals = [(t, _pct(p)) for t, p in enumerate(totales[i]) if _pct(p) > 0]
+        total_goals.sort(key=lambda x: -x[1])
+        resultado.append({
+            "top_marcadores": [
+                (f"{k // (MAX_GOLES + 1)}-{k % (MAX_GOLES + 1)}", _pct(planas[i, k])) for k in orden[i]
+            ],
+            "total_goals": total_goals,
+            "btts_partido_pct": _pct(ambos[i]),
+            "fulltime_result": {"home": _pct(local[i]), "draw": _pct(empate[i]), "away": _pct(visitante[i])},
+            "over_under_25": {"yes": _pct(mas[2.5][i]), "no": _pct(1 - mas[2.5][i])},
+            "over_under": {str(linea): {"yes": _pct(p[i]), "no": _pct(1 - p[i])} for linea, p in mas.items()},
+            "clean_sheet": {"home": _pct(cero_local[i]), "away": _pct(cero_visitante[i])},
+            "asian_handicap": [
+                {
+                    "linea": linea,
+                    "gana": _pct(gana[i]),
+                    "devuelve": _pct(nulo[i]),
+                    "pierde": _pct(1 - gana[i] - nulo[i]),
+                }
+                for linea, (gana, nulo) in handicap.items()
+            ],
+        })
+    return resultado
+
+
+def mercados_partido(lambda_local, lambda_visitante, top=TOP_MARCADORES):
+    """Mercados de un único partido (atajo de mercados_lote)."""
+    return mercados_lote([lambda_local], [lambda_visitante], top=top)[0]
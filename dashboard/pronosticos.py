@@ -0,0 +1,208 @@
+"""
+Pronósticos precalculados (tabla Pronostico) de los partidos próximos del calendario.
+Los partidos de una jornada son los mismos para todos los usuarios: se calculan en lote
+(recalcular_pronosticos, desde el daemon de refresco o `manage.py recalcular_pronosticos`)
+y la vista los lee con una consulta por (local, visitante). Cuando cambian lesionados,
+sancionados o designaciones de árbitro, las filas afectadas dejan de estar vigentes; cuando
+cambian los parámetros del modelo o las fechas del calendario (version_pronosticos), dejan de
+estarlo todas. Se recalculan en el siguiente lote o en la primera lectura.
+"""
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+from django.db.models import Q
+from django.utils import timezone as dj_timezone
+
+from .calendar_api import (
+    _normalize_team,
+    _parse_date_utc,
+    get_calendar_index,
+    get_fixture_for_match,
+    mapa_equipos,
+)
+from .equipos import nombre_oficial
+from .models import Pronostico
+from .poisson import mercados_lote
+from .utils import cargar_datos_pronostico, firma_modelo, generar_pronostico_pro, obtener_datos_completos_premier
+
+BATCH_SIZE = 200
+
+
+def _jornada(partido):
+    try:
+        return int(partido.get("RoundNumber"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _con_nombres_selector(filas):
+    """
+    [(dt, partido)] del calendario -> [(local, visitante, fecha_utc, jornada, partido)] con los nombres
+    del selector. El dict del partido va con la tupla: la pareja sola no distingue ida y vuelta.
+    """
+    mapa = mapa_equipos(obtener_datos_completos_premier())
+    resultado = []
+    for dt, p in filas:
+        local = mapa.get(_normalize_team(p.get("HomeTeam") or ""))
+        visitante = mapa.get(_normalize_team(p.get("AwayTeam") or ""))
+        if local and visitante:
+            resultado.append((local, visitante, dt, _jornada(p), p))
+    return resultado
+
+
+def partidos_proximos(desde=None):
+    """
+    Partidos del calendario desde `desde` (por defecto ahora), con los nombres del selector:
+    [(local, visitante, fecha_utc, jornada, partido)]. Se omiten los equipos que no se reconocen.
+    """
+    desde = desde or datetime.now(timezone.utc)
+    indice = get_calendar_index()
+    i = bisect_left([dt for dt, _ in indice.partidos], desde)
+    return _con_nombres_selector(indice.partidos[i:])
+
+
+def partidos_temporada():
+    """Todos los partidos del calendario (jugados o no), ordenados por fecha."""
+    return _con_nombres_selector(get_calendar_index().partidos)
+
+
+def partidos_jornada(jornada=None):
+    """Partidos de la jornada (jugados o no); None = la próxima jornada con partidos pendientes."""
+    if jornada is None:
+        proximos = partidos_proximos()
+        if not proximos:
+            return []
+        jornada = proximos[0][3]
+    return _con_nombres_selector(
+        (dt, p) for dt, p in get_calendar_index().partidos if _jornada(p) == jornada
+    )
+
+
+def generar_lote(partidos, datos=None):
+    """
+    Genera (partido, pronóstico) para cada (local, visitante, fecha, jornada, partido del calendario)
+    de partidos; el pronóstico es el de ese partido (fecha, cansancio), no el de la próxima cita de la pareja.
+    Lesionados, sancionados y designaciones se cargan una sola vez para todo el lote y los
+    mercados Poisson de todos los partidos se calculan en una sola operación con arrays.
+    """
+    partidos = list(partidos)
+    if not partidos:
+        return
+    if datos is None:
+        datos = cargar_datos_pronostico()
+    resultados = [
+        generar_pronostico_pro(p[0], p[1], datos=datos, con_mercados=False, fixture=p[4]) for p in partidos
+    ]
+    mercados = mercados_lote(
+        [r["goles_esperados_local"] for r in resultados],
+        [r["goles_esperados_visitante"] for r in resultados],
+    )
+    for partido, pronostico, m in zip(partidos, resultados, mercados):
+        pronostico["mercados"] = m
+        yield partido, pronostico
+
+
+def partido_a_dict(partido, pronostico):
+    local, visitante, fecha, jornada, _ = partido
+    return {
+        "jornada": jornada,
+        "fecha": fecha.isoformat() if fecha else None,
+        "local": local,
+        "visitante": visitante,
+        "pronostico": pronostico,
+    }
+
+
+def _guardar(filas):
+    Pronostico.objects.bulk_create(
+        filas,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["equipo_local", "equipo_visitante"],
+        update_fields=["fecha", "jornada", "datos", "version", "vigente", "calculado"],
+    )
+
+
+def version_pronosticos(indice=None):
+    """
+    Versión con la que se guardan las filas: firma_modelo() más la huella de fechas del calendario,
+    que también entra en el pronóstico (fecha del partido, cansancio por partido entre semana).
+    """
+    return f"{firma_modelo()}-{get_calendar_index(indice).firma_fechas}"
+
+
+def recalcular_pronosticos(todos=False):
+    """
+    Calcula los pronósticos de los partidos próximos que faltan o no están vigentes
+    (todos=True: todos). Los cálculos van fuera de la transacción con los datos cargados
+    una vez para el lote; la escritura es un único upsert en bloque. Devuelve cuántos se guardaron.
+    """
+    version = version_pronosticos()
+    ahora = dj_timezone.now()
+    al_dia = set()
+    if not todos:
+        al_dia = set(
+            Pronostico.objects.filter(vigente=True, version=version).values_list("equipo_local", "equipo_visitante")
+        )
+    pendientes = [p for p in partidos_proximos() if p[:2] not in al_dia]
+    if not pendientes:
+        return 0
+    filas = [
+        Pronostico(
+            equipo_local=local,
+            equipo_visitante=visitante,
+            fecha=fecha,
+            jornada=jornada,
+            datos=pronostico,
+            version=version,
+            vigente=True,
+            calculado=ahora,
+        )
+        for (local, visitante, fecha, jornada, _), pronostico in generar_lote(pendientes)
+    ]
+    _guardar(filas)
+    return len(filas)
+
+
+def obtener_pronostico(local, visitante):
+    """
+    Pronóstico (árbitro automático) de local vs visitante: la fila precalculada si está vigente;
+    si no, se calcula, se guarda y se devuelve. Equipos fuera del selector no se guardan.
+    """
+    fila = Pronostico.objects.filter(equipo_local=local, equipo_visitante=visitante).first()
+    version = version_pronosticos()
+    if fila and fila.vigente and fila.version == version:
+        return fila.datos
+    datos = generar_pronostico_pro(local, visitante)
+    equipos = obtener_datos_completos_premier()
+    if local in equipos and visitante in equipos:
+        # Misma búsqueda de partido que usa generar_pronostico_pro para la fecha
+        fixture = get_fixture_for_match(local, visitante) or {}
+        _guardar([Pronostico(
+            equipo_local=local,
+            equipo_visitante=visitante,
+            fecha=_parse_date_utc(fixture.get("DateUtc")),
+            jornada=_jornada(fixture),
+            datos=datos,
+            version=version,
+            vigente=True,
+            calculado=dj_timezone.now(),
+        )])
+    return datos
+
+
+def equipos_afectados_por_bajas(equipos_bajas):
+    """
+    Equipos del selector cuyo pronóstico usa bajas de equipos_bajas (textos de la fuente).
+    Mismo criterio que la FK equipo_ref de lesionados y sancionados: equipos.nombre_oficial.
+    """
+    afectados = {nombre_oficial(e) for e in equipos_bajas}
+    return [t for t in obtener_datos_completos_premier() if t in afectados]
+
+
+def invalidar_pronosticos(equipos=(), partidos=()):
+    """Marca como no vigentes los pronósticos de esos equipos y de esos partidos (en cualquier orden)."""
+    q = Q(equipo_local__in=list(equipos)) | Q(equipo_visitante__in=list(equipos))
+    for local, visitante in partidos:
+        q |= Q(equipo_local=local, equipo_visitante=visitante) | Q(equipo_local=visitante, equipo_visitante=local)
+    return Pronostico.objects.filter(q, vigente=True).update(vigente=False)
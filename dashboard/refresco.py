@@ -0,0 +1,242 @@
+"""
+Refresco programado de las fuentes externas (python manage.py refresh_daemon).
+Cada fuente tiene su cadencia; cada ejecución se desplaza con jitter para no coincidir en ráfagas,
+los fallos se reintentan con backoff exponencial y un candado en la cache compartida impide que
+dos instancias scrapeen a la vez. Lesionados/sancionados y árbitros pasan por la cola de tareas
+(tareas.py), así nunca se solapan con una actualización pedida desde el dashboard.
+"""
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import cache_swr
+
+# Segundos entre ejecuciones de cada fuente (se puede ajustar con settings.REFRESCO_CADENCIAS)
+CADENCIAS = {
+    "bajas": 2 * 3600,
+    "arbitros": 6 * 3600,
+    "calendario": 30 * 60,
+    "fixtures": 6 * 3600,
+    # Por debajo del TTL de predictions/probabilities/ en la cache de Sportmonks (30 min), jitter incluido,
+    # para que la precarga siga viva hasta la siguiente ejecución
+    "predicciones": 25 * 60,
+    "pronosticos": 15 * 60,
+}
+# Variación aleatoria (±10 %) de cada espera
+JITTER = 0.1
+# Al arrancar, cada fuente empieza en un instante aleatorio de este margen (no todas a la vez)
+ARRANQUE_ESCALONADO_SEGUNDOS = 120
+# Tras un fallo se reintenta a los 60 s, 120 s, 240 s... sin pasar de la cadencia normal
+BACKOFF_BASE_SEGUNDOS = 60
+# Cada cuánto se despierta el bucle (renovar candado, vaciar la cola de tareas)
+TICK_SEGUNDOS = 5
+# Predicciones Sportmonks: se precargan las de los partidos de los próximos días
+DIAS_PREDICCIONES = 7
+
+LOCK_CLAVE = "refresh_daemon:lock"
+# Caducidad del candado: si el proceso muere, otra instancia puede tomarlo pasado este tiempo.
+# Mientras una fuente se ejecuta, un hilo lo renueva cada LOCK_SEGUNDOS / 3 (ver renovando_candado)
+LOCK_SEGUNDOS = 600
+
+
+@dataclass
+class Fuente:
+    """Fuente programada: ejecutar() devuelve un texto para el log o lanza excepción si falla."""
+    nombre: str
+    cadencia: float
+    ejecutar: object
+    fallos: int = 0
+    proxima: float = 0.0  # time.monotonic() de la próxima ejecución
+
+
+def _via_cola(tipo):
+    """Encola la tarea (o reutiliza la activa) y vacía la cola en este proceso."""
+    from .tareas import encolar, procesar_pendientes
+
+    tarea, _ = encolar(tipo)
+    procesar_pendientes()
+    tarea.refresh_from_db()
+    if tarea.estado == "ok":
+        return (tarea.resultado or {}).get("mensaje", "")
+    if tarea.estado == "en_curso":
+        return f"tarea {tarea.pk} en curso en otro proceso"
+    raise RuntimeError(tarea.error or f"tarea {tarea.pk} en estado {tarea.estado}")
+
+
+def _refrescar_bajas():
+    return _via_cola("bajas")
+
+
+def _refrescar_arbitros():
+    return _via_cola("arbitros")
+
+
+def _refrescar_calendario():
+    from .calendar_api import CACHE_KEY, _revalidar_calendar
+
+    feed = cache_swr.refrescar(CACHE_KEY, _revalidar_calendar)
+    if not feed:
+        raise RuntimeError("No se pudo descargar el calendario de FixtureDownload.")
+    return f"{len(feed['partidos'])} partidos en el calendario"
+
+
+def _refrescar_fixtures():
+    from .sportmonks_client import sincronizar_fixtures
+
+    n, err = sincronizar_fixtures()
+    if err:
+        raise RuntimeError(err)
+    return f"{n} partidos Sportmonks guardados/actualizados"
+
+
+def _refrescar_predicciones():
+    """Precarga en la cache de respuestas las predicciones de los próximos partidos (índice local)."""
+    from .models import FixtureSportmonks
+    from .sportmonks_client import get_fixture_by_id, get_probabilities_by_fixture_id
+
+    ahora = timezone.now()
+    ids = list(
+        FixtureSportmonks.objects.filter(
+            starting_at__gte=ahora, starting_at__lt=ahora + timedelta(days=DIAS_PREDICCIONES)
+        ).values_list("fixture_id", flat=True)
+    )
+    con_datos = 0
+    for fixture_id in ids:
+        # Mismo orden que get_prediction_for_match: probabilities y, si falla, fixture con predictions
+        prob, err = get_probabilities_by_fixture_id(fixture_id)
+        if err or not prob:
+            _, err = get_fixture_by_id(fixture_id, include="predictions")
+        if not err:
+            con_datos += 1
+    if ids and not con_datos:
+        raise RuntimeError(f"Ninguna predicción disponible para {len(ids)} partidos próximos.")
+    return f"predicciones precargadas: {con_datos}/{len(ids)} partidos"
+
+
+def _refrescar_pronosticos():
+    from .pronosticos import recalcular_pronosticos
+
+    return f"{recalcular_pronosticos()} pronósticos recalculados"
+
+
+FUNCIONES = {
+    "bajas": _refrescar_bajas,
+    "arbitros": _refrescar_arbitros,
+    "calendario": _refrescar_calendario,
+    "fixtures": _refrescar_fixtures,
+    "predicciones": _refrescar_predicciones,
+    "pronosticos": _refrescar_pronosticos,
+}
+
+
+def crear_fuentes(nombres=None):
+    """Fuentes programadas (nombres filtra; None = todas) con arranque escalonado."""
+    cadencias = {**CADENCIAS, **getattr(settings, "REFRESCO_CADENCIAS", {})}
+    ahora = time.monotonic()
+    fuentes = []
+    for nombre, func in FUNCIONES.items():
+        if nombres and nombre not in nombres:
+            continue
+        cadencia = cadencias[nombre]
+        inicio = ahora + random.uniform(0, min(ARRANQUE_ESCALONADO_SEGUNDOS, cadencia))
+        fuentes.append(Fuente(nombre=nombre, cadencia=cadencia, ejecutar=func, proxima=inicio))
+    return fuentes
+
+
+def _programar(fuente, ok):
+    """Calcula la próxima ejecución: cadencia normal si fue bien, backoff si falló (ambas con jitter)."""
+    if ok:
+        fuente.fallos = 0
+        espera = fuente.cadencia
+    else:
+        fuente.fallos += 1
+        espera = min(fuente.cadencia, BACKOFF_BASE_SEGUNDOS * 2 ** (fuente.fallos - 1))
+    fuente.proxima = time.monotonic() + espera * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def ejecutar_fuente(fuente, log=print):
+    """Ejecuta una fuente, registra el resultado y la reprograma. Devuelve True si fue bien."""
+    close_old_connections()
+    try:
+        msg = fuente.ejecutar()
+    except Exception as e:
+        _programar(fuente, ok=False)
+        # RuntimeError = fallo ya descrito por la propia fuente; el resto, con su tipo
+        detalle = str(e) if isinstance(e, RuntimeError) else f"{type(e).__name__}: {e}"
+        log(f"[{fuente.nombre}] ERROR ({fuente.fallos} seguidos): {detalle}")
+        return False
+    _programar(fuente, ok=True)
+    log(f"[{fuente.nombre}] OK: {msg}")
+    return True
+
+
+def tomar_candado():
+    """Intenta tomar el candado del daemon. Devuelve un token o None si otra instancia lo tiene."""
+    token = uuid.uuid4().hex
+    return token if cache.add(LOCK_CLAVE, token, timeout=LOCK_SEGUNDOS) else None
+
+
+def renovar_candado(token):
+    """Alarga la caducidad del candado si sigue siendo nuestro. Devuelve False si se perdió."""
+    if cache.get(LOCK_CLAVE) != token:
+        return False
+    cache.set(LOCK_CLAVE, token, timeout=LOCK_SEGUNDOS)
+    return True
+
+
+def soltar_candado(token):
+    if cache.get(LOCK_CLAVE) == token:
+        cache.delete(LOCK_CLAVE)
+
+
+@contextmanager
+def renovando_candado(token):
+    """Renueva el candado en segundo plano durante el bloque: una fuente lenta no lo deja caducar."""
+    parar = threading.Event()
+
+    def _latido():
+        while not parar.wait(LOCK_SEGUNDOS / 3):
+            if not renovar_candado(token):
+                return
+
+    hilo = threading.Thread(target=_latido, name="refresh-daemon-candado", daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        hilo.join()
+
+
+def bucle(fuentes, token, log=print):
+    """
+    Bucle del daemon: ejecuta cada fuente cuando le toca y, entre medias, las tareas encoladas
+    desde el dashboard. Termina si pierde el candado.
+    """
+    from .tareas import procesar_pendientes
+
+    while True:
+        if not renovar_candado(token):
+            log("Candado del daemon perdido (¿otra instancia?); se detiene.")
+            return
+        for fuente in sorted(fuentes, key=lambda f: f.proxima):
+            if fuente.proxima > time.monotonic():
+                break
+            with renovando_candado(token):
+                ejecutar_fuente(fuente, log)
+            if not renovar_candado(token):
+                log("Candado del daemon perdido (¿otra instancia?); se detiene.")
+                return
+        close_old_connections()
+        with renovando_candado(token):
+            procesar_pendientes()
+        time.sleep(TICK_SEGUNDOS)
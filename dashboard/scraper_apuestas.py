@@ -3,11 +3,11 @@ Scraper de lesionados y sancionados desde apuestas-deportivas.es (Premier League
 Fuente: https://www.apuestas-deportivas.es/premier-league-inglaterra-jugadores-lesionados-y-sancionados/
 """
 import re
-import requests
-from bs4 import BeautifulSoup
-from django.db import transaction
 
-from .models import Lesionado, Sancionado
+from . import http_client
+from .equipos import equipo_en_texto, nombre_oficial
+from .parseo import sopa
+from .persistencia import sincronizar_bajas
 
 URL = "https://www.apuestas-deportivas.es/premier-league-inglaterra-jugadores-lesionados-y-sancionados/"
 HEADERS = {
@@ -21,55 +21,16 @@ HEADERS = {
     "Upgrade-Insecure-Requests": "1",
 }
 
-# Nombre en la web -> nombre en nuestra app
-EQUIPO_APUESTAS_A_OFICIAL = {
-    "arsenal": "Arsenal",
-    "aston villa": "Aston Villa",
-    "bournemouth": "AFC Bournemouth",
-    "brentford": "Brentford",
-    "brighton": "Brighton & Hove Albion",
-    "burnley": "Burnley",
-    "chelsea": "Chelsea",
-    "crystal palace": "Crystal Palace",
-    "everton": "Everton",
-    "fulham": "Fulham",
-    "leeds": "Leeds United",
-    "liverpool": "Liverpool",
-    "manchester city": "Manchester City",
-    "man city": "Manchester City",
-    "manchester united": "Manchester United",
-    "man united": "Manchester United",
-    "newcastle united": "Newcastle United",
-    "newcastle": "Newcastle United",
-    "nottingham forest": "Nottingham Forest",
-    "sunderland": "Sunderland",
-    "tottenham": "Tottenham Hotspur",
-    "tottenham hotspur": "Tottenham Hotspur",
-    "west ham": "West Ham United",
-    "west ham united": "West Ham United",
-    "wolves": "Wolverhampton Wanderers",
-    "wolverhampton wanderers": "Wolverhampton Wanderers",
-    "wolverhampton": "Wolverhampton Wanderers",
-}
-
-
 def _normalizar_equipo(texto):
     if not texto:
         return None
     # Quitar números, entidades HTML y caracteres raros
     t = re.sub(r"^#+\s*", "", texto)
-    t = re.sub(r"\s+", " ", t).strip().lower()
     t = t.replace("\u8211", "").replace("\u2013", "").strip()  # guiones unicode
     if not t:
         return None
-    # Coincidencia exacta
-    if t in EQUIPO_APUESTAS_A_OFICIAL:
-        return EQUIPO_APUESTAS_A_OFICIAL[t]
-    # Coincidencia parcial: si el título contiene el nombre del equipo
-    for key, oficial in EQUIPO_APUESTAS_A_OFICIAL.items():
-        if key in t or t in key:
-            return oficial
-    return None
+    # Coincidencia exacta o, si no, el equipo que nombre el título
+    return nombre_oficial(t) or equipo_en_texto(t)
 
 
 def _extraer_texto(el):
@@ -139,48 +100,57 @@ def _columnas_fila(celdas):
     )
 
 
+def _nuevo_estado():
+    """Estado del recorrido de filas de un equipo: último sancionado (filas de continuación) y lesionados vistos."""
+    return {"ultimo_sancionado": None, "lesionados": 0}
+
+
+def _procesar_filas(table, equipo, estado, lesionados, sancionados):
+    """Filas de una tabla de bajas del equipo: Suspensión -> sancionados, resto -> lesionados (con estrellas)."""
+    for tr in table.find_all("tr"):
+        celdas = tr.find_all(["td", "th"])
+        col = _columnas_fila(celdas)
+        if not col:
+            continue
+        c0, c1_raw, c2, c3 = col
+        c1 = c1_raw.lower()
+
+        # Cabecera de tabla de suspensiones
+        if c0.lower() == "jugador" and ("suspensión" in c1 or "suspension" in c1):
+            continue
+        # Fila de suspensión: col1 = "Suspensión" o un partido (ej. "Sunderland-Liverpool")
+        if "suspensión" in c1 or "suspension" in c1 or (c1 and "-" in c1 and len(c1) < 60):
+            nombre = (c0 or estado["ultimo_sancionado"] or "Jugador")[:100]
+            if c0:
+                estado["ultimo_sancionado"] = c0
+            motivo = (c1 + " " + c2).strip()[:150] if (c1 or c2) else "Suspensión"
+            if nombre and nombre.lower() != "jugador" and _es_nombre_jugador(nombre):
+                sancionados.append({"nombre": nombre, "equipo": equipo, "motivo": motivo})
+        else:
+            # Lesión: Jugador | Lesión | Fecha | Rendimiento
+            if not c0 or c0.lower() in ("jugador", "lesión", "lesion") or not _es_nombre_jugador(c0):
+                continue
+            if not _celda_es_lesion_o_suspension(c1_raw):
+                continue
+            estado["lesionados"] += 1
+            n = estado["lesionados"]
+            estrellas = 3 if n == 1 else (2 if n <= 3 else 1)
+            lesionados.append({
+                "nombre": c0[:100],
+                "equipo": equipo,
+                "tipo_lesion": c1_raw[:120],
+                "retorno_esperado": c3[:120],
+                "estrellas": estrellas,
+            })
+
+
 def _procesar_tabla_equipo(tag, equipo, lesionados, sancionados):
     """Procesa todas las tablas que pertenecen a este h2 (hasta el siguiente h2)."""
-    last_sancionado_player = None
-    count_lesionados_equipo = 0
-
+    estado = _nuevo_estado()
     for table in tag.find_all_next("table"):
         if table.find_previous(["h2", "h3", "h4"]) != tag:
             break
-        for tr in table.find_all("tr"):
-            celdas = tr.find_all(["td", "th"])
-            col = _columnas_fila(celdas)
-            if not col:
-                continue
-            c0, c1_raw, c2, c3 = col
-            c1 = c1_raw.lower()
-
-            # Cabecera de tabla de suspensiones
-            if c0.lower() == "jugador" and ("suspensión" in c1 or "suspension" in c1):
-                continue
-            # Fila de suspensión: col1 = "Suspensión" o un partido (ej. "Sunderland-Liverpool")
-            if "suspensión" in c1 or "suspension" in c1 or (c1 and "-" in c1 and len(c1) < 60):
-                nombre = (c0 or last_sancionado_player or "Jugador")[:100]
-                if c0:
-                    last_sancionado_player = c0
-                motivo = (c1 + " " + c2).strip()[:150] if (c1 or c2) else "Suspensión"
-                if nombre and nombre.lower() != "jugador" and _es_nombre_jugador(nombre):
-                    sancionados.append({"nombre": nombre, "equipo": equipo, "motivo": motivo})
-            else:
-                # Lesión: Jugador | Lesión | Fecha | Rendimiento
-                if not c0 or c0.lower() in ("jugador", "lesión", "lesion") or not _es_nombre_jugador(c0):
-                    continue
-                if not _celda_es_lesion_o_suspension(c1_raw):
-                    continue
-                count_lesionados_equipo += 1
-                estrellas = 3 if count_lesionados_equipo == 1 else (2 if count_lesionados_equipo <= 3 else 1)
-                lesionados.append({
-                    "nombre": c0[:100],
-                    "equipo": equipo,
-                    "tipo_lesion": c1_raw[:120],
-                    "retorno_esperado": c3[:120],
-                    "estrellas": estrellas,
-                })
+        _procesar_filas(table, equipo, estado, lesionados, sancionados)
 
 
 def _fila_es_lesion_o_sancion(celdas):
@@ -199,84 +169,36 @@ def _fila_es_lesion_o_sancion(celdas):
     return False
 
 
-def _parsear_desde_texto(html_text, lesionados, sancionados):
-    """Último recurso: en HTML crudo, buscar h2/h3 con nombre de equipo y la siguiente tabla."""
-    # Posiciones de cada <h2> o <h3> con su equipo normalizado
-    titulos = []
-    for m in re.finditer(r"<h[234][^>]*>([^<]+)</h[234]>", html_text, re.I):
-        titulo_limpio = re.sub(r"\s+", " ", m.group(1).strip())
-        equipo = _normalizar_equipo(titulo_limpio)
-        if equipo:
-            titulos.append((m.start(), m.end(), equipo))
-    if not titulos:
-        return
-    # Para cada título, tomar la porción de HTML hasta el siguiente título (o fin) y extraer tablas
-    for i, (t_start, t_end, equipo) in enumerate(titulos):
-        fin_bloque = titulos[i + 1][0] if i + 1 < len(titulos) else len(html_text)
-        bloque = html_text[t_end:fin_bloque]
-        # Tablas simples (sin anidar): <table ...> ... </table>
-        pos = 0
-        while True:
-            table_start = bloque.find("<table", pos)
-            if table_start == -1:
-                break
-            table_end = bloque.find("</table>", table_start)
-            if table_end == -1:
-                break
-            table_end += len("</table>")
-            fragmento = bloque[table_start:table_end]
-            sub = BeautifulSoup(fragmento, "html.parser")
-            table = sub.find("table")
-            if not table:
-                pos = table_end
-                continue
-            # Comprobar que la tabla tiene al menos una fila válida (jugador + lesión/suspensión)
-            tiene_valida = False
-            for tr in table.find_all("tr"):
-                celdas = tr.find_all(["td", "th"])
-                col = _columnas_fila(celdas)
-                if not col:
-                    continue
-                c0, c1, *_ = col
-                if _es_nombre_jugador(c0) and _celda_es_lesion_o_suspension(c1):
-                    tiene_valida = True
-                    break
-            if not tiene_valida:
-                pos = table_end
-                continue
-            last_sancionado_player = None
-            count_lesionados_equipo = 0
-            for tr in table.find_all("tr"):
-                celdas = tr.find_all(["td", "th"])
-                col = _columnas_fila(celdas)
-                if not col:
-                    continue
-                c0, c1_raw, c2, c3 = col
-                c1 = c1_raw.lower()
-                if c0.lower() == "jugador" and ("suspensión" in c1 or "suspension" in c1):
-                    continue
-                if "suspensión" in c1 or "suspension" in c1 or (c1 and "-" in c1 and len(c1) < 60):
-                    nombre = (c0 or last_sancionado_player or "Jugador")[:100]
-                    if c0:
-                        last_sancionado_player = c0
-                    motivo = (c1 + " " + c2).strip()[:150] if (c1 or c2) else "Suspensión"
-                    if nombre and nombre.lower() != "jugador" and _es_nombre_jugador(nombre):
-                        sancionados.append({"nombre": nombre, "equipo": equipo, "motivo": motivo})
-                else:
-                    if not c0 or c0.lower() in ("jugador", "lesión", "lesion") or not _es_nombre_jugador(c0):
-                        continue
-                    if not _celda_es_lesion_o_suspension(c1_raw):
-                        continue
-                    count_lesionados_equipo += 1
-                    estrellas = 3 if count_lesionados_equipo == 1 else (2 if count_lesionados_equipo <= 3 else 1)
-                    lesionados.append({
-                        "nombre": c0[:100],
-                        "equipo": equipo,
-                        "tipo_lesion": c1_raw[:120],
-                        "retorno_esperado": c3[:120],
-                        "estrellas": estrellas,
-                    })
-            pos = table_end
+def _tiene_fila_valida(rows):
+    """True si alguna fila tiene un nombre que parece jugador y una columna de lesión/suspensión."""
+    for tr in rows:
+        col = _columnas_fila(tr.find_all(["td", "th"]))
+        if not col:
+            continue
+        c0, c1, *_ = col
+        if _es_nombre_jugador(c0) and _celda_es_lesion_o_suspension(c1):
+            return True
+    return False
+
+
+def _parsear_por_titulos(soup, lesionados, sancionados):
+    """
+    Último recurso: recorrer en orden del documento los h2/h3/h4 con nombre de equipo y las tablas,
+    asignando cada tabla al último título de equipo visto aunque haya otros títulos en medio.
+    """
+    equipo = None
+    for el in soup.find_all(["h2", "h3", "h4", "table"]):
+        if el.name != "table":
+            # Solo títulos de texto plano (sin etiquetas dentro), como hacía la versión sobre texto
+            if el.find(True) is None:
+                equipo = _normalizar_equipo(re.sub(r"\s+", " ", _extraer_texto(el))) or equipo
+            continue
+        # Tablas simples: las anidadas se procesan con la tabla que las contiene
+        if not equipo or el.find_parent("table") is not None:
+            continue
+        if not _tiene_fila_valida(el.find_all("tr")):
+            continue
+        _procesar_filas(el, equipo, _nuevo_estado(), lesionados, sancionados)
 
 
 def _procesar_tabla_equipo_fallback(soup, lesionados, sancionados):
@@ -287,17 +209,7 @@ def _procesar_tabla_equipo_fallback(soup, lesionados, sancionados):
         if not any(len(tr.find_all(["td", "th"])) >= 2 and _fila_es_lesion_o_sancion(tr.find_all(["td", "th"])) for tr in rows):
             continue
         # Y que alguna fila tenga col1 tipo lesión/suspensión y nombre que parezca jugador
-        tiene_fila_valida = False
-        for tr in rows:
-            celdas = tr.find_all(["td", "th"])
-            col = _columnas_fila(celdas)
-            if not col:
-                continue
-            c0, c1, *_ = col
-            if _es_nombre_jugador(c0) and _celda_es_lesion_o_suspension(c1):
-                tiene_fila_valida = True
-                break
-        if not tiene_fila_valida:
+        if not _tiene_fila_valida(rows):
             continue
         prev = table.find_previous(["h2", "h3", "h4"])
         if not prev:
@@ -306,38 +218,52 @@ def _procesar_tabla_equipo_fallback(soup, lesionados, sancionados):
         equipo = _normalizar_equipo(titulo)
         if not equipo:
             continue
-        last_sancionado_player = None
-        count_lesionados_equipo = 0
-        for tr in table.find_all("tr"):
-            celdas = tr.find_all(["td", "th"])
-            col = _columnas_fila(celdas)
-            if not col:
-                continue
-            c0, c1_raw, c2, c3 = col
-            c1 = c1_raw.lower()
-            if c0.lower() == "jugador" and ("suspensión" in c1 or "suspension" in c1):
+        _procesar_filas(table, equipo, _nuevo_estado(), lesionados, sancionados)
+
+
+def extraer_bajas(html):
+    """
+    Lesionados y sancionados de la página (str, bytes o BeautifulSoup ya parseado), sin tocar la DB.
+    El HTML se parsea una vez y todas las estrategias, de la más estricta al último recurso, usan ese árbol.
+    Devuelve (lesionados, sancionados).
+    """
+    soup = sopa(html)
+    lesionados = []
+    sancionados = []
+
+    def _extraer_con_root(raiz):
+        for tag in raiz.find_all(["h2", "h3", "h4"]):
+            titulo = _extraer_texto(tag)
+            equipo = _normalizar_equipo(titulo)
+            if not equipo:
                 continue
-            if "suspensión" in c1 or "suspension" in c1 or (c1 and "-" in c1 and len(c1) < 60):
-                nombre = (c0 or last_sancionado_player or "Jugador")[:100]
-                if c0:
-                    last_sancionado_player = c0
-                motivo = (c1 + " " + c2).strip()[:150] if (c1 or c2) else "Suspensión"
-                if nombre and nombre.lower() != "jugador" and _es_nombre_jugador(nombre):
-                    sancionados.append({"nombre": nombre, "equipo": equipo, "motivo": motivo})
-            else:
-                if not c0 or c0.lower() in ("jugador", "lesión", "lesion") or not _es_nombre_jugador(c0):
-                    continue
-                if not _celda_es_lesion_o_suspension(c1_raw):
-                    continue
-                count_lesionados_equipo += 1
-                estrellas = 3 if count_lesionados_equipo == 1 else (2 if count_lesionados_equipo <= 3 else 1)
-                lesionados.append({
-                    "nombre": c0[:100],
-                    "equipo": equipo,
-                    "tipo_lesion": c1_raw[:120],
-                    "retorno_esperado": c3[:120],
-                    "estrellas": estrellas,
-                })
+            _procesar_tabla_equipo(tag, equipo, lesionados, sancionados)
+
+    # Buscar contenido principal (WordPress: article, main, .entry-content) para no coger tablas del sidebar
+    root = (
+        soup.find("article")
+        or soup.find("main")
+        or soup.find(class_=re.compile(r"entry-content|post-content|content", re.I))
+        or soup.find(id=re.compile(r"content|main", re.I))
+        or soup
+    )
+    raices = (root, soup) if root is not soup else (soup,)
+
+    for raiz in raices:
+        # Si no se encontró nada en el contenido principal, intentar con la página completa
+        if not lesionados and not sancionados:
+            _extraer_con_root(raiz)
+
+    # Fallback: tablas con título anterior
+    for raiz in raices:
+        if not lesionados and not sancionados:
+            _procesar_tabla_equipo_fallback(raiz, lesionados, sancionados)
+
+    # Último recurso: títulos y tablas en orden del documento (por si la estructura es rara)
+    if not lesionados and not sancionados:
+        _parsear_por_titulos(soup, lesionados, sancionados)
+
+    return lesionados, sancionados
 
 
 def ejecutar_scraper_apuestas_lesionados_sancionados():
@@ -346,67 +272,14 @@ def ejecutar_scraper_apuestas_lesionados_sancionados():
     Busca secciones por equipo (h2/h3/h4) y tablas siguientes; filas Suspensión -> Sancionado, resto -> Lesionado.
     """
     try:
-        response = requests.get(URL, headers=HEADERS, timeout=25)
+        response = http_client.get(URL, headers=HEADERS)
         response.raise_for_status()
         # Usar UTF-8 con reemplazo para evitar fallos de codificación en entornos (ej. Render)
         if response.encoding is None or response.encoding.lower() in ("iso-8859-1", "latin-1"):
             response.encoding = "utf-8"
         html_str = response.content.decode("utf-8", errors="replace")
-        soup = BeautifulSoup(html_str, "html.parser")
-        lesionados = []
-        sancionados = []
-
-        def _extraer_con_root(raiz):
-            for tag in raiz.find_all(["h2", "h3", "h4"]):
-                titulo = _extraer_texto(tag)
-                equipo = _normalizar_equipo(titulo)
-                if not equipo:
-                    continue
-                _procesar_tabla_equipo(tag, equipo, lesionados, sancionados)
-
-        # Buscar contenido principal (WordPress: article, main, .entry-content) para no coger tablas del sidebar
-        root = (
-            soup.find("article")
-            or soup.find("main")
-            or soup.find(class_=re.compile(r"entry-content|post-content|content", re.I))
-            or soup.find(id=re.compile(r"content|main", re.I))
-            or soup
-        )
-        _extraer_con_root(root)
-
-        # Si no se encontró nada, intentar con la página completa (por si el contenido no está en article/main)
-        if not lesionados and not sancionados:
-            _extraer_con_root(soup)
-
-        # Fallback: tablas con título anterior
-        if not lesionados and not sancionados:
-            _procesar_tabla_equipo_fallback(root, lesionados, sancionados)
-        if not lesionados and not sancionados:
-            _procesar_tabla_equipo_fallback(soup, lesionados, sancionados)
-
-        # Último recurso: parsear el HTML como texto (por si las tablas son divs o estructura rara)
-        if not lesionados and not sancionados:
-            _parsear_desde_texto(html_str, lesionados, sancionados)
-
-        with transaction.atomic():
-            Lesionado.objects.all().delete()
-            for item in lesionados:
-                Lesionado.objects.create(
-                    nombre=item["nombre"],
-                    equipo=item["equipo"],
-                    posicion="NA",
-                    estrellas=item.get("estrellas", 1),
-                    tipo_lesion=item.get("tipo_lesion", ""),
-                    retorno_esperado=item.get("retorno_esperado", ""),
-                )
-            Sancionado.objects.all().delete()
-            for item in sancionados:
-                Sancionado.objects.create(
-                    nombre=item["nombre"],
-                    equipo=item["equipo"],
-                    motivo=item.get("motivo", "Suspensión"),
-                    jornada="",
-                )
+        lesionados, sancionados = extraer_bajas(html_str)
+        sincronizar_bajas(lesionados=lesionados, sancionados=sancionados)
         return True, len(lesionados), len(sancionados)
     except Exception as e:
         print(f"Error scraper apuestas-deportivas: {e}")
@@ -2,52 +2,28 @@
 Scraper de árbitros: obtiene partidos de fichajes.com y opcionalmente el árbitro
 de la página de cada partido (cuando la designación se publica 1-2 días antes).
 Fuente: https://www.fichajes.com/futbol-tele/inglaterra/premier-league
+
+Las páginas de partido se descargan y parsean en paralelo (pool acotado, ritmo limitado por host
+en http_client) y las designaciones se guardan al final en un único upsert en bloque.
 """
 import re
-import requests
-from bs4 import BeautifulSoup
-from django.db import transaction
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4 import SoupStrainer
+from django.conf import settings
 
+from . import http_client
+from .equipos import equipo_id, ids_equipos, nombre_oficial
 from .models import DesignacionArbitro
+from .parseo import sopa
+from .pronosticos import invalidar_pronosticos
 
 URL_PREMIER = "https://www.fichajes.com/futbol-tele/inglaterra/premier-league"
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
 
-# Slug en URL fichajes -> nombre exacto en nuestro selector (todos los equipos Premier)
-SLUG_A_EQUIPO = {
-    "manchester-united": "Manchester United",
-    "tottenham-hotspur": "Tottenham Hotspur",
-    "tottenham": "Tottenham Hotspur",
-    "bournemouth": "AFC Bournemouth",
-    "aston-villa": "Aston Villa",
-    "fulham": "Fulham",
-    "everton": "Everton",
-    "arsenal": "Arsenal",
-    "sunderland": "Sunderland",
-    "wolverhampton-wanderers": "Wolverhampton Wanderers",
-    "wolverhampton": "Wolverhampton Wanderers",
-    "chelsea": "Chelsea",
-    "burnley": "Burnley",
-    "west-ham-united": "West Ham United",
-    "west-ham": "West Ham United",
-    "newcastle-united": "Newcastle United",
-    "newcastle": "Newcastle United",
-    "brentford": "Brentford",
-    "brighton-hove-albion": "Brighton & Hove Albion",
-    "brighton": "Brighton & Hove Albion",
-    "crystal-palace": "Crystal Palace",
-    "liverpool": "Liverpool",
-    "manchester-city": "Manchester City",
-    "man-city": "Manchester City",
-    "leeds-united": "Leeds United",
-    "leeds": "Leeds United",
-    "nottingham-forest": "Nottingham Forest",
-}
-
-
 def _slug_a_equipo(slug):
-    s = (slug or "").strip().lower().replace("_", "-")
-    return SLUG_A_EQUIPO.get(s) or slug
+    """Slug de fichajes (ej. "brighton-hove-albion") -> nombre del selector; si no se reconoce, el slug."""
+    return nombre_oficial(slug) or slug
 
 
 def _parsear_directo_url(href):
@@ -66,7 +42,7 @@ def _extraer_arbitro_de_pagina(html_text):
     """Busca en el HTML el nombre del árbitro (patrones: 'Árbitro:', 'Referee:', labels, etc.)."""
     if not html_text:
         return None
-    soup = BeautifulSoup(html_text, "html.parser")
+    soup = sopa(html_text)
     # 1) Buscar en etiquetas que suelen llevar "Árbitro" / "Referee" (dt, label, span, div)
     for tag in soup.find_all(["dt", "label", "span", "div", "th", "td", "p"]):
         txt = (tag.get_text() or "").strip()
@@ -101,6 +77,59 @@ def _extraer_arbitro_de_pagina(html_text):
     return None
 
 
+def _url_partido(href):
+    url = href.strip()
+    if url.startswith("http"):
+        return url
+    return ("https://www.fichajes.com" + url) if url.startswith("/") else "https://www.fichajes.com/" + url
+
+
+def _arbitro_de_partido(href):
+    """Descarga la página del partido y devuelve el árbitro, o None (sin tocar la DB)."""
+    try:
+        r = http_client.get(_url_partido(href), headers=HEADERS)
+        if r.status_code == 200:
+            return _extraer_arbitro_de_pagina(r.text)
+    except Exception:
+        pass
+    return None
+
+
+def _es_enlace_directo(href):
+    return bool(href) and "/directo/" in href
+
+
+# De la portada solo interesan los enlaces a partidos (/directo/...); el resto no se construye
+SOLO_ENLACES_DIRECTO = SoupStrainer("a", href=_es_enlace_directo)
+
+
+def extraer_partidos(html):
+    """
+    Partidos de la portada de fichajes (str, bytes o BeautifulSoup ya parseado), sin duplicados:
+    [{"local", "visitante", "href"}]. Solo se construyen los enlaces /directo/ (SOLO_ENLACES_DIRECTO).
+    """
+    soup = sopa(html, parse_only=SOLO_ENLACES_DIRECTO)
+    partidos = []
+    for a in soup.find_all("a", href=True):
+        href = a.get("href", "")
+        if "/directo/" in href and "vs" in href:
+            text = (a.get_text() or "").strip()
+            if not text or len(text) > 80:
+                continue
+            local, visitante = _parsear_directo_url(href)
+            if local and visitante:
+                partidos.append({"local": local, "visitante": visitante, "href": href})
+    # Quitar duplicados por (local, visitante)
+    vistos = set()
+    unicos = []
+    for p in partidos:
+        k = (p["local"], p["visitante"])
+        if k not in vistos:
+            vistos.add(k)
+            unicos.append(p)
+    return unicos
+
+
 def ejecutar_scraper_arbitros_fichajes(obtener_pagina_partido=True):
     """
     Scrape fichajes.com Premier League: lista de partidos y, si obtener_pagina_partido,
@@ -108,50 +137,38 @@ def ejecutar_scraper_arbitros_fichajes(obtener_pagina_partido=True):
     Devuelve (num_partidos, num_arbitros_actualizados).
     """
     try:
-        r = requests.get(URL_PREMIER, headers=HEADERS, timeout=15)
+        r = http_client.get(URL_PREMIER, headers=HEADERS, timeout=15)
         if r.status_code != 200:
             return 0, 0
-        soup = BeautifulSoup(r.content, "html.parser")
-        partidos = []
-        for a in soup.find_all("a", href=True):
-            href = a.get("href", "")
-            if "/directo/" in href and "vs" in href:
-                text = (a.get_text() or "").strip()
-                if not text or len(text) > 80:
-                    continue
-                local, visitante = _parsear_directo_url(href)
-                if local and visitante:
-                    partidos.append({"local": local, "visitante": visitante, "href": href})
-        # Quitar duplicados por (local, visitante)
-        vistos = set()
-        unicos = []
-        for p in partidos:
-            k = (p["local"], p["visitante"])
-            if k not in vistos:
-                vistos.add(k)
-                unicos.append(p)
-        partidos = unicos
-        actualizados = 0
-        with transaction.atomic():
-            for p in partidos:
-                arbitro_nombre = None
-                if obtener_pagina_partido and p.get("href"):
-                    try:
-                        url_partido = p["href"].strip()
-                        if not url_partido.startswith("http"):
-                            url_partido = ("https://www.fichajes.com" + url_partido) if url_partido.startswith("/") else "https://www.fichajes.com/" + url_partido
-                        r2 = requests.get(url_partido, headers=HEADERS, timeout=10)
-                        if r2.status_code == 200:
-                            arbitro_nombre = _extraer_arbitro_de_pagina(r2.text)
-                    except Exception:
-                        pass
-                if arbitro_nombre:
-                    DesignacionArbitro.objects.update_or_create(
-                        equipo_local=p["local"],
-                        equipo_visitante=p["visitante"],
-                        defaults={"arbitro_nombre": arbitro_nombre},
-                    )
-                    actualizados += 1
+        partidos = extraer_partidos(r.content)
+        if not obtener_pagina_partido:
+            return len(partidos), 0
+        hrefs = [p["href"] for p in partidos if p.get("href")]
+        max_workers = min(getattr(settings, "FICHAJES_MAX_WORKERS", 6), len(hrefs)) or 1
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fichajes") as pool:
+            arbitros = dict(zip(hrefs, pool.map(_arbitro_de_partido, hrefs)))
+        ids = ids_equipos()
+        designaciones = [
+            DesignacionArbitro(
+                equipo_local=p["local"],
+                equipo_visitante=p["visitante"],
+                local_ref_id=equipo_id(p["local"], ids),
+                visitante_ref_id=equipo_id(p["visitante"], ids),
+                arbitro_nombre=arbitros[p["href"]],
+            )
+            for p in partidos
+            if arbitros.get(p.get("href"))
+        ]
+        if designaciones:
+            # Un solo INSERT ... ON CONFLICT DO UPDATE (transacción corta, al final)
+            DesignacionArbitro.objects.bulk_create(
+                designaciones,
+                update_conflicts=True,
+                unique_fields=["equipo_local", "equipo_visitante"],
+                update_fields=["local_ref", "visitante_ref", "arbitro_nombre", "fecha_actualizacion"],
+            )
+            invalidar_pronosticos(partidos=[(d.equipo_local, d.equipo_visitante) for d in designaciones])
+        actualizados = len(designaciones)
         return len(partidos), actualizados
     except Exception as e:
         print(f"Error scraper árbitros: {e}")
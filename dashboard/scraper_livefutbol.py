@@ -2,9 +2,13 @@
 Scraper de árbitros Premier League desde livefutbol.com (estadísticas por árbitro).
 Fuente: https://www.livefutbol.com/competition/co91/inglaterra-premier-league/referees/
 Devuelve lista con nombre y tarjetas por partido (Amarillo + Amarillo Rojo + Rojo) / Juegos.
+La lista se guarda en la cache compartida de Django (stale-while-revalidate): las vistas nunca
+esperan al scrape salvo la primera vez o tras limpiar_cache_arbitros().
 """
-import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+
+from . import cache_swr, http_client
+from .parseo import sopa
 
 URL_REFEREES = "https://www.livefutbol.com/competition/co91/inglaterra-premier-league/referees/"
 HEADERS = {
@@ -13,8 +17,13 @@ HEADERS = {
     "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
 }
 
-# Cache en memoria para no hacer request en cada carga del formulario
-_cache_arbitros = None
+# Cache compartida entre workers: clave y tiempos (la lista cambia como mucho una vez por jornada)
+CACHE_KEY = "arbitros_livefutbol"
+CACHE_TTL_SEGUNDOS = 60 * 60  # pasado este tiempo se refresca en segundo plano
+CACHE_TTL_MAXIMO = 7 * 24 * 60 * 60  # después de esto se descarta y se vuelve a scrapear
+
+# Lo único que se lee de la página: el h2 "Árbitro" y la tabla que le sigue
+SOLO_TITULOS_Y_TABLAS = SoupStrainer(["h2", "table"])
 
 
 def _int_val(text, default=0):
@@ -24,76 +33,100 @@ def _int_val(text, default=0):
         return default
 
 
-def obtener_arbitros_livefutbol():
+def extraer_arbitros(html):
+    """
+    Tabla de árbitros (no asistentes) de la página (str, bytes o BeautifulSoup ya parseado).
+    Solo se construyen los h2 y las tablas (SOLO_TITULOS_Y_TABLAS): el resto de la página no se usa.
+    """
+    soup = sopa(html, parse_only=SOLO_TITULOS_Y_TABLAS)
+    # Buscar la sección "Árbitro" (no "Árbitros asistentes")
+    arbitros = []
+    for h2 in soup.find_all("h2"):
+        if "árbitro" in (h2.get_text() or "").lower() and "asistentes" not in (h2.get_text() or "").lower():
+            table = h2.find_next("table")
+            if not table:
+                continue
+            for tr in table.find_all("tr"):
+                cells = tr.find_all(["td", "th"])
+                if len(cells) < 6:
+                    continue
+                # Nombre: enlace con /person/ (puede ser celda con texto o con imagen; si no hay texto, usar slug del URL)
+                nombre = None
+                idx_name = -1
+                for i, cell in enumerate(cells):
+                    for a in cell.find_all("a", href=True):
+                        href = a.get("href") or ""
+                        if "/person/" not in href:
+                            continue
+                        txt = (a.get_text() or "").strip()
+                        if txt:
+                            nombre = txt
+                        else:
+                            parts = href.rstrip("/").split("/")
+                            if parts:
+                                slug = parts[-1]
+                                nombre = slug.replace("-", " ").title() if slug else None
+                        if nombre:
+                            idx_name = i
+                            break
+                    if idx_name >= 0:
+                        break
+                if not nombre or idx_name < 0:
+                    continue
+                # Columnas: [#], (imagen?), Apellido, Nacionalidad, Juegos, Amarillo, Amarillo Rojo, Rojo
+                off = idx_name + 2  # país, luego juegos
+                if off + 4 > len(cells):
+                    continue
+                juegos = _int_val(cells[off].get_text(), 1)
+                amarillo = _int_val(cells[off + 1].get_text(), 0)
+                amarillo_rojo = _int_val(cells[off + 2].get_text(), 0)
+                rojo = _int_val(cells[off + 3].get_text(), 0)
+                if juegos <= 0:
+                    juegos = 1
+                total_tarjetas = amarillo + amarillo_rojo + rojo
+                tarjetas_promedio = round(total_tarjetas / juegos, 1) if juegos else 3.8
+                arbitros.append({
+                    "nombre": nombre[:80],
+                    "tarjetas_promedio": tarjetas_promedio,
+                    "nota": f"{juegos} partidos (livefutbol)",
+                })
+            break  # Solo primera tabla de árbitros
+    return arbitros
+
+
+def _scrapear_arbitros_livefutbol():
     """
     Scrape la tabla de árbitros (no asistentes). Devuelve lista de dicts:
     [{"nombre": "Michael Oliver", "tarjetas_promedio": 2.85, "nota": "20 partidos"}, ...]
+    o lista vacía si falla (la cache conserva entonces el valor anterior).
     """
-    global _cache_arbitros
     try:
-        r = requests.get(URL_REFEREES, headers=HEADERS, timeout=20)
+        r = http_client.get(URL_REFEREES, headers=HEADERS)
         if r.status_code != 200:
-            return _cache_arbitros or []
-        soup = BeautifulSoup(r.content, "html.parser")
-        # Buscar la sección "Árbitro" (no "Árbitros asistentes")
-        arbitros = []
-        for h2 in soup.find_all("h2"):
-            if "árbitro" in (h2.get_text() or "").lower() and "asistentes" not in (h2.get_text() or "").lower():
-                table = h2.find_next("table")
-                if not table:
-                    continue
-                for tr in table.find_all("tr"):
-                    cells = tr.find_all(["td", "th"])
-                    if len(cells) < 6:
-                        continue
-                    # Nombre: enlace con /person/ (puede ser celda con texto o con imagen; si no hay texto, usar slug del URL)
-                    nombre = None
-                    idx_name = -1
-                    for i, cell in enumerate(cells):
-                        for a in cell.find_all("a", href=True):
-                            href = a.get("href") or ""
-                            if "/person/" not in href:
-                                continue
-                            txt = (a.get_text() or "").strip()
-                            if txt:
-                                nombre = txt
-                            else:
-                                parts = href.rstrip("/").split("/")
-                                if parts:
-                                    slug = parts[-1]
-                                    nombre = slug.replace("-", " ").title() if slug else None
-                            if nombre:
-                                idx_name = i
-                                break
-                        if idx_name >= 0:
-                            break
-                    if not nombre or idx_name < 0:
-                        continue
-                    # Columnas: [#], (imagen?), Apellido, Nacionalidad, Juegos, Amarillo, Amarillo Rojo, Rojo
-                    off = idx_name + 2  # país, luego juegos
-                    if off + 4 > len(cells):
-                        continue
-                    juegos = _int_val(cells[off].get_text(), 1)
-                    amarillo = _int_val(cells[off + 1].get_text(), 0)
-                    amarillo_rojo = _int_val(cells[off + 2].get_text(), 0)
-                    rojo = _int_val(cells[off + 3].get_text(), 0)
-                    if juegos <= 0:
-                        juegos = 1
-                    total_tarjetas = amarillo + amarillo_rojo + rojo
-                    tarjetas_promedio = round(total_tarjetas / juegos, 1) if juegos else 3.8
-                    arbitros.append({
-                        "nombre": nombre[:80],
-                        "tarjetas_promedio": tarjetas_promedio,
-                        "nota": f"{juegos} partidos (livefutbol)",
-                    })
-                break  # Solo primera tabla de árbitros
-        _cache_arbitros = arbitros
-        return arbitros
+            return []
+        return extraer_arbitros(r.content)
     except Exception as e:
         print(f"Error scraper livefutbol árbitros: {e}")
-        return _cache_arbitros or []
+        return []
+
+
+def obtener_arbitros_livefutbol(forzar=False):
+    """
+    Lista de árbitros desde la cache compartida (ver _scrapear_arbitros_livefutbol para el formato).
+    Si la cache está caducada se devuelve igualmente y se refresca en segundo plano.
+    forzar=True: scrape síncrono (botón «Actualizar árbitros»); si falla, se devuelve lo cacheado.
+    """
+    if forzar:
+        lista = cache_swr.refrescar(CACHE_KEY, _scrapear_arbitros_livefutbol, CACHE_TTL_MAXIMO)
+        if lista:
+            return lista
+        entrada = cache_swr.leer_entrada(CACHE_KEY)
+        return entrada["data"] if entrada else []
+    return cache_swr.obtener(
+        CACHE_KEY, CACHE_TTL_SEGUNDOS, _scrapear_arbitros_livefutbol, CACHE_TTL_MAXIMO
+    ) or []
 
 
 def limpiar_cache_arbitros():
-    global _cache_arbitros
-    _cache_arbitros = None
+    """Invalida la lista cacheada: la próxima lectura volverá a scrapear livefutbol."""
+    cache_swr.invalidar(CACHE_KEY)
@@ -0,0 +1,171 @@
+"""
+Simulación Monte Carlo de lo que queda de temporada (python manage.py simular_temporada).
+Parte de la clasificación actual (resultados del calendario de FixtureDownload) y simula los
+partidos pendientes con los goles esperados de generar_pronostico_pro como medias de Poisson.
+Todo va en arrays simulaciones×partidos por bloques; los bloques pueden repartirse entre
+procesos y cada uno tiene su propia semilla derivada de la principal (SeedSequence), así el
+resultado es el mismo con o sin pool de procesos.
+
+Este módulo no importa Django al cargarse: los procesos del pool solo ejecutan _simular_bloque.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Simulaciones por bloque (acota la memoria: cada array bloque×partidos ocupa unos 8-15 MB)
+TAMANO_BLOQUE = 5_000
+# Plazas que cuentan para cada probabilidad
+PLAZAS_CHAMPIONS = 4
+PLAZAS_DESCENSO = 3
+
+
+def _simular_bloque(args):
+    """
+    Simula n temporadas. Devuelve (conteo_posiciones[equipo, posición], suma_puntos[equipo]).
+    Desempate: puntos, diferencia de goles, goles a favor y, si sigue el empate, al azar.
+    """
+    semilla, n, lam_local, lam_visitante, idx_local, idx_visitante, base = args
+    puntos0, favor0, contra0 = base
+    n_equipos = len(puntos0)
+    rng = np.random.default_rng(semilla)
+    goles_l = rng.poisson(lam_local, size=(n, len(lam_local)))
+    goles_v = rng.poisson(lam_visitante, size=(n, len(lam_visitante)))
+    # Matrices de incidencia partido -> equipo para sumar por equipo con un producto de matrices
+    # (float32: enteros pequeños exactos y la mitad de memoria que float64)
+    inc_local = np.zeros((len(idx_local), n_equipos), dtype=np.float32)
+    inc_local[np.arange(len(idx_local)), idx_local] = 1
+    inc_visitante = np.zeros((len(idx_visitante), n_equipos), dtype=np.float32)
+    inc_visitante[np.arange(len(idx_visitante)), idx_visitante] = 1
+
+    pts_l = np.where(goles_l > goles_v, 3, np.where(goles_l == goles_v, 1, 0)).astype(np.float32)
+    pts_v = np.where(goles_v > goles_l, 3, np.where(goles_l == goles_v, 1, 0)).astype(np.float32)
+    goles_l = goles_l.astype(np.float32)
+    goles_v = goles_v.astype(np.float32)
+    puntos = puntos0 + pts_l @ inc_local + pts_v @ inc_visitante
+    favor = favor0 + goles_l @ inc_local + goles_v @ inc_visitante
+    contra = contra0 + goles_v @ inc_local + goles_l @ inc_visitante
+
+    clave = puntos * 1e6 + (favor - contra + 1000) * 1e3 + favor + rng.random((n, n_equipos)) * 0.5
+    orden = np.argsort(-clave, axis=1)  # [sim, posición] -> equipo
+    conteo = np.stack([np.bincount(orden[:, pos], minlength=n_equipos) for pos in range(n_equipos)], axis=1)
+    return conteo, puntos.sum(axis=0)
+
+
+def simular(lam_local, lam_visitante, idx_local, idx_visitante, base, simulaciones, semilla, procesos=1):
+    """
+    Ejecuta las simulaciones por bloques (en procesos si procesos > 1).
+    Devuelve (probabilidad_posiciones[equipo, posición], puntos_esperados[equipo]).
+    """
+    n_equipos = len(base[0])
+    n_bloques = max(1, math.ceil(simulaciones / TAMANO_BLOQUE))
+    semillas = np.random.SeedSequence(semilla).spawn(n_bloques)
+    tamanos = [TAMANO_BLOQUE] * (n_bloques - 1) + [simulaciones - TAMANO_BLOQUE * (n_bloques - 1)]
+    lam_local, lam_visitante = np.asarray(lam_local, float), np.asarray(lam_visitante, float)
+    idx_local, idx_visitante = np.asarray(idx_local), np.asarray(idx_visitante)
+    base = tuple(np.asarray(b, float) for b in base)
+    tareas = [
+        (s, t, lam_local, lam_visitante, idx_local, idx_visitante, base) for s, t in zip(semillas, tamanos)
+    ]
+    if procesos > 1 and n_bloques > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(_simular_bloque, tareas))
+    else:
+        resultados = [_simular_bloque(t) for t in tareas]
+    conteo = np.zeros((n_equipos, n_equipos))
+    puntos = np.zeros(n_equipos)
+    for c, p in resultados:
+        conteo += c
+        puntos += p
+    return conteo / simulaciones, puntos / simulaciones
+
+
+def preparar_temporada():
+    """
+    Lee el calendario y separa jugados de pendientes.
+    Devuelve (equipos, base=(puntos, goles_favor, goles_contra, jugados), pendientes=[(local, visitante, partido)]),
+    con el dict del partido del calendario: ida y vuelta tienen fechas (y cansancio) distintas.
+    """
+    from .calendar_api import _normalize_team, get_calendar_index, mapa_equipos
+    from .utils import obtener_datos_completos_premier
+
+    equipos = list(obtener_datos_completos_premier())
+    indice = {e: i for i, e in enumerate(equipos)}
+    mapa = mapa_equipos(equipos)
+    puntos, favor, contra, jugados = (np.zeros(len(equipos)) for _ in range(4))
+    pendientes = []
+    for _, p in get_calendar_index().partidos:
+        local = mapa.get(_normalize_team(p.get("HomeTeam") or ""))
+        visitante = mapa.get(_normalize_team(p.get("AwayTeam") or ""))
+        if not local or not visitante:
+            continue
+        gl, gv = p.get("HomeTeamScore"), p.get("AwayTeamScore")
+        if gl is None or gv is None:
+            pendientes.append((local, visitante, p))  # incluye aplazados
+            continue
+        il, iv = indice[local], indice[visitante]
+        favor[il] += gl
+        contra[il] += gv
+        favor[iv] += gv
+        contra[iv] += gl
+        jugados[il] += 1
+        jugados[iv] += 1
+        puntos[il] += 3 if gl > gv else (1 if gl == gv else 0)
+        puntos[iv] += 3 if gv > gl else (1 if gl == gv else 0)
+    return equipos, (puntos, favor, contra, jugados), pendientes
+
+
+def simular_temporada(simulaciones=100_000, semilla=None, procesos=1):
+    """
+    Simula lo que queda de temporada y guarda el resultado en SimulacionTemporada.
+    Los goles esperados de cada partido salen de generar_pronostico_pro (datos cargados una vez).
+    """
+    from .models import SimulacionTemporada
+    from .utils import cargar_datos_pronostico, firma_modelo, generar_pronostico_pro
+
+    if semilla is None:
+        semilla = int(np.random.default_rng().integers(2**62))
+    equipos, (puntos, favor, contra, jugados), pendientes = preparar_temporada()
+    indice = {e: i for i, e in enumerate(equipos)}
+    datos = cargar_datos_pronostico()
+    lam_local, lam_visitante = [], []
+    for local, visitante, partido in pendientes:
+        p = generar_pronostico_pro(local, visitante, datos=datos, con_mercados=False, fixture=partido)
+        lam_local.append(p["goles_esperados_local"])
+        lam_visitante.append(p["goles_esperados_visitante"])
+    if pendientes:
+        prob, puntos_esperados = simular(
+            lam_local, lam_visitante,
+            [indice[l] for l, _, _ in pendientes], [indice[v] for _, v, _ in pendientes],
+            (puntos, favor, contra), simulaciones, semilla, procesos,
+        )
+    else:
+        # Temporada terminada: la clasificación es la definitiva
+        clave = puntos * 1e6 + (favor - contra + 1000) * 1e3 + favor
+        prob = np.zeros((len(equipos), len(equipos)))
+        prob[np.argsort(-clave), np.arange(len(equipos))] = 1
+        puntos_esperados = puntos
+
+    n = len(equipos)
+    resultados = [
+        {
+            "equipo": e,
+            "jugados": int(jugados[i]),
+            "puntos": int(puntos[i]),
+            "puntos_esperados": round(float(puntos_esperados[i]), 1),
+            "posicion_media": round(float((prob[i] * np.arange(1, n + 1)).sum()), 2),
+            "titulo": round(float(prob[i, 0]) * 100, 2),
+            "top4": round(float(prob[i, :PLAZAS_CHAMPIONS].sum()) * 100, 2),
+            "descenso": round(float(prob[i, n - PLAZAS_DESCENSO:].sum()) * 100, 2),
+            "posiciones": [round(float(x) * 100, 2) for x in prob[i]],
+        }
+        for i, e in enumerate(equipos)
+    ]
+    resultados.sort(key=lambda r: (r["posicion_media"], -r["puntos_esperados"]))
+    return SimulacionTemporada.objects.create(
+        simulaciones=simulaciones,
+        semilla=semilla,
+        partidos_restantes=len(pendientes),
+        version=firma_modelo(),
+        resultados=resultados,
+    )
@@ -7,10 +7,18 @@ Variables de entorno:
   SPORTMONKS_API_TOKEN  - Tu API key (obligatoria).
   SPORTMONKS_SEASON_ID  - ID de la temporada Premier League (ej. 2025/26). Opcional; si no está, algunas funciones requieren pasar season_id.
 """
+import hashlib
+import json
 import os
-from datetime import date
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
 
 import requests
+from django.core.cache import cache
+
+from . import http_client
+from .equipos import equipo_al_inicio, nombre_oficial
 
 BASE_URL = "https://api.sportmonks.com/v3/football"
 # Premier League: IDs en Sportmonks (verificar en https://my.sportmonks.com/resources/id-finder)
@@ -30,28 +38,105 @@ def _season_id():
     return PREMIER_SEASON_ID_DEFAULT
 
 
-def _get(path, params=None, timeout=15):
-    """GET a la API con api_token en query."""
+# ------ Cache de respuestas ------
+
+# TTL (segundos) por familia de endpoint: se usa el primer prefijo de path que coincida.
+# Equipos/árbitros de una temporada casi no cambian; probabilidades y partidos del día sí.
+CACHE_TTL_POR_ENDPOINT = (
+    ("teams/seasons/", 24 * 60 * 60),
+    ("referees/seasons/", 24 * 60 * 60),
+    ("schedules/seasons/", 6 * 60 * 60),
+    ("standings/seasons/", 60 * 60),
+    ("fixtures/head-to-head/", 12 * 60 * 60),
+    ("fixtures/date/", 10 * 60),
+    ("predictions/probabilities/", 30 * 60),
+    ("fixtures/", 10 * 60),
+    ("teams/", 60 * 60),
+)
+# Partidos de fechas ya pasadas: el resultado no cambia
+CACHE_TTL_FECHA_PASADA = 24 * 60 * 60
+# Cache negativa: un 403/404 no se reintenta contra la API durante este tiempo
+CACHE_TTL_NEGATIVO = 15 * 60
+CACHE_PREFIX = "sportmonks:"
+
+_stats_lock = threading.Lock()
+_CACHE_STATS = {"hits": 0, "misses": 0, "negative_hits": 0}
+
+
+def _contar(clave):
+    with _stats_lock:
+        _CACHE_STATS[clave] += 1
+
+
+def get_cache_stats():
+    """Contadores de la cache de respuestas en este proceso: hits, misses y negative_hits."""
+    with _stats_lock:
+        return dict(_CACHE_STATS)
+
+
+def _cache_key(path, params):
+    """Clave por path + params (sin api_token, que se añade después)."""
+    crudo = json.dumps([path.strip("/"), sorted((str(k), str(v)) for k, v in params.items())])
+    return CACHE_PREFIX + hashlib.sha1(crudo.encode("utf-8")).hexdigest()
+
+
+def _cache_ttl(path):
+    path = path.strip("/")
+    if path.startswith("fixtures/date/"):
+        fecha = path.split("/")[2]
+        if fecha < date.today().strftime("%Y-%m-%d"):
+            return CACHE_TTL_FECHA_PASADA
+    for prefijo, ttl in CACHE_TTL_POR_ENDPOINT:
+        if path.startswith(prefijo):
+            return ttl
+    return 0
+
+
+def _get(path, params=None, timeout=None, use_cache=True):
+    """
+    GET a la API con api_token en query. Devuelve (json, None) o (None, mensaje_error).
+    Las respuestas correctas se cachean según CACHE_TTL_POR_ENDPOINT y los 403/404 durante
+    CACHE_TTL_NEGATIVO; use_cache=False fuerza la llamada (y no guarda nada).
+    """
     token = _token()
     if not token:
         return None, "SPORTMONKS_API_TOKEN no configurada"
     url = BASE_URL.rstrip("/") + "/" + path.lstrip("/")
     params = dict(params or {})
+    ttl = _cache_ttl(path) if use_cache else 0
+    key = _cache_key(path, params)
+    if ttl:
+        cacheado = cache.get(key)
+        if cacheado is not None:
+            if cacheado.get("error"):
+                _contar("negative_hits")
+                return None, cacheado["error"]
+            _contar("hits")
+            return cacheado["data"], None
+        _contar("misses")
     params["api_token"] = token
     try:
-        r = requests.get(url, params=params, timeout=timeout)
+        r = http_client.get(url, params=params, timeout=timeout)
         r.raise_for_status()
-        return r.json(), None
+        data = r.json()
+        if ttl:
+            cache.set(key, {"data": data}, timeout=ttl)
+        return data, None
     except requests.HTTPError as e:
-        if e.response.status_code == 403:
-            return None, (
+        status = e.response.status_code
+        if status == 403:
+            err = (
                 "Sportmonks API: acceso denegado (403). "
                 "El endpoint de Predictions/Probabilidades puede no estar incluido en tu plan. "
                 "Revisa en MySportmonks qué endpoints incluye tu suscripción."
             )
-        if e.response.status_code == 401:
+        elif status == 401:
             return None, "Sportmonks API: API key inválida o expirada (401). Comprueba SPORTMONKS_API_TOKEN."
-        return None, f"Sportmonks API: error HTTP {e.response.status_code}."
+        else:
+            err = f"Sportmonks API: error HTTP {status}."
+        if ttl and status in (403, 404):
+            cache.set(key, {"error": err}, timeout=min(ttl, CACHE_TTL_NEGATIVO))
+        return None, err
     except requests.RequestException as e:
         return None, f"Sportmonks API: error de conexión ({type(e).__name__})."
 
@@ -59,10 +144,11 @@ def _get(path, params=None, timeout=15):
 # ------ Fixtures ------
 
 
-def get_fixtures_by_date(fixture_date, league_ids=None):
+def get_fixtures_by_date(fixture_date, league_ids=None, include=None):
     """
     Partidos por fecha. Formato fecha: YYYY-MM-DD.
     league_ids: opcional, lista de IDs de liga (ej. [8] para Premier) para filtrar.
+    include: opcional, ej. 'participants'.
     """
     if isinstance(fixture_date, date):
         fixture_date = fixture_date.strftime("%Y-%m-%d")
@@ -70,6 +156,8 @@ def get_fixtures_by_date(fixture_date, league_ids=None):
     params = {}
     if league_ids:
         params["filters"] = f"fixtureLeagues:{','.join(map(str, league_ids))}"
+    if include:
+        params["include"] = include
     data, err = _get(path, params)
     if err:
         return None, err
@@ -166,10 +254,158 @@ def get_schedules_by_season(season_id=None, page=1, per_page=50):
     path = f"schedules/seasons/{sid}"
     data, err = _get(path, params={"page": page, "per_page": per_page})
     if err:
-        return None, err
+        return None, None, err
     return data.get("data") or [], data.get("pagination"), None
 
 
+def get_round_by_id(round_id, include="fixtures.participants"):
+    """Una jornada (round) por ID, por defecto con sus partidos y participantes."""
+    path = f"rounds/{round_id}"
+    data, err = _get(path, params={"include": include} if include else None)
+    if err:
+        return None, err
+    return data.get("data"), None
+
+
+# ------ Índice local de partidos de la temporada (FixtureSportmonks) ------
+
+# state_id de partidos terminados (FT, AET, FT_PEN): sus jornadas ya no cambian
+ESTADOS_FINALIZADOS = (5, 7, 8)
+# Partidos de los últimos días se refrescan aunque figuren terminados (correcciones de resultado/estado)
+DIAS_REFRESCO_RECIENTE = 3
+
+
+def _parse_starting_at(valor):
+    """'2025-08-15 19:00:00' (UTC) -> datetime con tz UTC, o None."""
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor).replace("Z", "+00:00")).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _fixtures_anidados(nodo):
+    """Recorre la respuesta de schedules/rounds (stages -> rounds -> fixtures) y devuelve los fixtures."""
+    if isinstance(nodo, list):
+        for item in nodo:
+            yield from _fixtures_anidados(item)
+    elif isinstance(nodo, dict):
+        fixtures = nodo.get("fixtures")
+        if isinstance(fixtures, dict):
+            fixtures = fixtures.get("data")
+        if isinstance(fixtures, list):
+            for f in fixtures:
+                if isinstance(f, dict):
+                    yield {**f, "round_id": f.get("round_id") or nodo.get("id")}
+        for clave in ("rounds", "stages"):
+            if clave in nodo:
+                yield from _fixtures_anidados(nodo[clave])
+
+
+def _fila_fixture(f, season_id):
+    """Fixture de la API -> FixtureSportmonks (sin guardar) o None si faltan local/visitante."""
+    from .models import FixtureSportmonks
+
+    local = visitante = None
+    for p in f.get("participants") or []:
+        location = ((p.get("meta") or {}).get("location") or "").lower()
+        if location == "home":
+            local = p.get("id")
+        elif location == "away":
+            visitante = p.get("id")
+    starting_at = _parse_starting_at(f.get("starting_at"))
+    if not f.get("id") or not local or not visitante or starting_at is None:
+        return None
+    return FixtureSportmonks(
+        fixture_id=f["id"],
+        season_id=f.get("season_id") or season_id,
+        round_id=f.get("round_id"),
+        home_team_id=local,
+        away_team_id=visitante,
+        fecha=starting_at.date(),
+        starting_at=starting_at,
+        state_id=f.get("state_id"),
+        nombre=(f.get("name") or "")[:150],
+    )
+
+
+def _guardar_fixtures(fixtures, season_id):
+    from .models import FixtureSportmonks
+
+    filas = {}
+    for f in fixtures:
+        fila = _fila_fixture(f, season_id)
+        if fila:
+            filas[fila.fixture_id] = fila
+    FixtureSportmonks.objects.bulk_create(
+        filas.values(),
+        batch_size=200,
+        update_conflicts=True,
+        unique_fields=["fixture_id"],
+        update_fields=[
+            "season_id", "round_id", "home_team_id", "away_team_id", "fecha",
+            "starting_at", "state_id", "nombre", "fecha_actualizacion",
+        ],
+    )
+    return len(filas)
+
+
+def _jornadas_pendientes(season_id):
+    """round_id de jornadas que aún pueden cambiar: con partidos sin terminar o jugados hace poco."""
+    from .models import FixtureSportmonks
+
+    desde = date.today() - timedelta(days=DIAS_REFRESCO_RECIENTE)
+    qs = FixtureSportmonks.objects.filter(season_id=season_id, round_id__isnull=False)
+    pendientes = qs.exclude(state_id__in=ESTADOS_FINALIZADOS) | qs.filter(fecha__gte=desde)
+    return sorted(set(pendientes.values_list("round_id", flat=True)))
+
+
+def sincronizar_fixtures(season_id=None, completo=False):
+    """
+    Sincroniza FixtureSportmonks con la temporada.
+    - completo (o índice vacío): todas las páginas de schedules/seasons.
+    - incremental: solo las jornadas que aún pueden cambiar (rounds/{id}).
+    Devuelve (num_partidos_guardados, None) o (0, error).
+    """
+    from .models import FixtureSportmonks
+
+    sid = season_id or _season_id()
+    if completo or not FixtureSportmonks.objects.filter(season_id=sid).exists():
+        fixtures = []
+        page = 1
+        while True:
+            data, pagination, err = get_schedules_by_season(sid, page=page)
+            if err:
+                return 0, err
+            fixtures.extend(_fixtures_anidados(data))
+            if not (pagination or {}).get("has_more"):
+                break
+            page += 1
+        return _guardar_fixtures(fixtures, sid), None
+    guardados = 0
+    for round_id in _jornadas_pendientes(sid):
+        ronda, err = get_round_by_id(round_id)
+        if err or not ronda:
+            continue
+        guardados += _guardar_fixtures(_fixtures_anidados(ronda), sid)
+    return guardados, None
+
+
+def _fixture_id_desde_indice(home_name, away_name, fixture_date):
+    """fixture_id desde el índice local (sin red) o None si no está indexado."""
+    from .models import FixtureSportmonks
+
+    id_home, id_away = get_team_id(home_name), get_team_id(away_name)
+    if not id_home or not id_away:
+        return None
+    qs = FixtureSportmonks.objects.filter(fecha=fixture_date)
+    return (
+        qs.filter(home_team_id=id_home, away_team_id=id_away).values_list("fixture_id", flat=True).first()
+        or qs.filter(home_team_id=id_away, away_team_id=id_home).values_list("fixture_id", flat=True).first()
+    )
+
+
 # ------ Head2Head (enfrentamientos históricos) ------
 
 
@@ -187,18 +423,85 @@ def get_head2head(team_id_1, team_id_2, per_page=10):
     return fixtures, None
 
 
-def _normalize_team_name(name):
-    if not name:
-        return ""
-    return (name or "").strip().lower().replace("&", "and")
+# ------ Índice equipo del selector -> team_id de Sportmonks ------
 
+# Cache en memoria del índice por temporada: {season_id: {equipo: team_id}}
+_IDS_EQUIPOS = {}
+# Si la sincronización falla, no se reintenta en cada búsqueda: {season_id: time.monotonic() del fallo}
+_SYNC_EQUIPOS_FALLIDA = {}
+SYNC_EQUIPOS_REINTENTO_SEGUNDOS = 5 * 60
 
-def _team_name_matches(our_name, api_name):
-    """True si nuestro nombre del selector coincide con el nombre de la API."""
-    if not our_name or not api_name:
-        return False
-    o, a = _normalize_team_name(our_name), _normalize_team_name(api_name)
-    return o in a or a in o or o.replace(" ", "") == a.replace(" ", "")
+
+def _equipo_desde_nombre_api(api_name, equipos):
+    """
+    Nombre de Sportmonks -> nombre del selector (solo si está en equipos). Coincidencia exacta o
+    alias y, si no, el equipo por el que empieza el nombre (ej. "Wolverhampton Wanderers FC").
+    """
+    equipo = nombre_oficial(api_name) or equipo_al_inicio(api_name)
+    return equipo if equipo in equipos else None
+
+
+def sincronizar_ids_equipos(season_id=None):
+    """
+    Descarga los equipos de la temporada y guarda en EquipoSportmonks el team_id de cada
+    equipo del selector. Devuelve (num_equipos_mapeados, None) o (0, error).
+    """
+    from .models import EquipoSportmonks
+    from .utils import obtener_datos_completos_premier
+
+    sid = season_id or _season_id()
+    teams, err = get_teams_by_season(sid)
+    if err or not teams:
+        return 0, err or "No se pudieron cargar equipos"
+    equipos = list(obtener_datos_completos_premier().keys())
+    filas = {}
+    for t in teams:
+        equipo = _equipo_desde_nombre_api(t.get("name"), equipos)
+        if equipo and t.get("id") and equipo not in filas:
+            filas[equipo] = EquipoSportmonks(
+                season_id=sid, equipo=equipo, team_id=t["id"], nombre_api=(t.get("name") or "")[:120]
+            )
+    EquipoSportmonks.objects.bulk_create(
+        filas.values(),
+        update_conflicts=True,
+        unique_fields=["season_id", "equipo"],
+        update_fields=["team_id", "nombre_api", "fecha_actualizacion"],
+    )
+    _IDS_EQUIPOS[sid] = {e: f.team_id for e, f in filas.items()}
+    return len(filas), None
+
+
+def _ids_equipos(season_id=None):
+    """Índice {equipo: team_id} de la temporada: memoria -> DB -> sincronización con la API."""
+    from .models import EquipoSportmonks
+
+    sid = season_id or _season_id()
+    indice = _IDS_EQUIPOS.get(sid)
+    if indice:
+        return indice
+    indice = dict(EquipoSportmonks.objects.filter(season_id=sid).values_list("equipo", "team_id"))
+    if indice:
+        _IDS_EQUIPOS[sid] = indice
+        return indice
+    fallo = _SYNC_EQUIPOS_FALLIDA.get(sid)
+    if fallo is not None and time.monotonic() - fallo < SYNC_EQUIPOS_REINTENTO_SEGUNDOS:
+        return {}
+    num, _ = sincronizar_ids_equipos(sid)
+    if num:
+        _SYNC_EQUIPOS_FALLIDA.pop(sid, None)
+    else:
+        _SYNC_EQUIPOS_FALLIDA[sid] = time.monotonic()
+    return _IDS_EQUIPOS.get(sid, {})
+
+
+def get_team_id(nombre, season_id=None):
+    """team_id de Sportmonks para un equipo del selector (o alias conocido), o None."""
+    indice = _ids_equipos(season_id)
+    tid = indice.get((nombre or "").strip())
+    if tid:
+        return tid
+    equipo = _equipo_desde_nombre_api(nombre, list(indice.keys()))
+    return indice.get(equipo) if equipo else None
 
 
 def get_head2head_by_names(home_name, away_name, limit=8):
@@ -206,22 +509,8 @@ def get_head2head_by_names(home_name, away_name, limit=8):
     Últimos enfrentamientos entre local y visitante (por nombre de equipo).
     Devuelve (lista de dict con name, score_home, score_away, date), None) o (None, error).
     """
-    teams, err = get_teams_by_season()
-    if err or not teams:
-        return None, err or "No se pudieron cargar equipos"
-    team_id_by_name = {}
-    for t in teams:
-        nom = (t.get("name") or "").strip()
-        if nom:
-            team_id_by_name[nom] = t.get("id")
-    # Buscar IDs: nuestro "Arsenal" puede coincidir con "Arsenal" de la API
-    id_home = None
-    id_away = None
-    for api_name, tid in team_id_by_name.items():
-        if _team_name_matches(home_name, api_name):
-            id_home = tid
-        if _team_name_matches(away_name, api_name):
-            id_away = tid
+    id_home = get_team_id(home_name)
+    id_away = get_team_id(away_name)
     if not id_home or not id_away:
         return None, "No se encontraron ambos equipos en la temporada"
     fixtures, err = get_head2head(id_home, id_away, per_page=limit)
@@ -290,11 +579,23 @@ def get_premier_fixture_id_for_teams(home_name, away_name, fixture_date=None):
         fixture_date = date.today()
     if isinstance(fixture_date, date):
         fixture_date = fixture_date.strftime("%Y-%m-%d")
+    # 0) Índice local (sincronizado con sincronizar_fixtures): consulta indexada, sin red
+    fixture_id = _fixture_id_desde_indice(home_name, away_name, fixture_date)
+    if fixture_id:
+        return fixture_id, None
     premier_league_ids = [PREMIER_LEAGUE_ID]
-    fixtures, err = get_fixtures_by_date(fixture_date, league_ids=premier_league_ids)
+    fixtures, err = get_fixtures_by_date(fixture_date, league_ids=premier_league_ids, include="participants")
     if err:
         return None, err
     fixture_list = fixtures[0] if fixtures else []
+    # 1) Por team_id (índice de equipos): sin ambigüedad entre nombres parecidos
+    ids_partido = {get_team_id(home_name), get_team_id(away_name)}
+    if None not in ids_partido:
+        for f in fixture_list:
+            participantes = {p.get("id") for p in (f.get("participants") or []) if isinstance(p, dict)}
+            if participantes and participantes == ids_partido:
+                return f.get("id"), None
+    # 2) Por nombre del partido ("Local vs Visitante")
     home_lower = (home_name or "").strip().lower()
     away_lower = (away_name or "").strip().lower()
     for f in fixture_list:
@@ -0,0 +1,164 @@
+"""
+Cola de tareas en base de datos (TareaRefresco) para sacar los scrapers de la petición web.
+Las vistas solo encolan (encolar) y el worker `python manage.py procesar_tareas` las ejecuta,
+con reintentos y backoff. Un clic repetido mientras hay otra igual pendiente o en curso
+no crea una tarea nueva: devuelve la existente.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TareaRefresco
+
+# Primer reintento a los 30 s, luego 60 s, 120 s...
+BACKOFF_SEGUNDOS = 30
+# Una tarea "en curso" más tiempo que esto se da por colgada (worker muerto) y se reencola
+MINUTOS_TAREA_COLGADA = 30
+
+
+def _ejecutar_bajas():
+    from .scraper import ejecutar_scraper_premier, ejecutar_scraper_sancionados
+    from .scraper_apuestas import ejecutar_scraper_apuestas_lesionados_sancionados
+
+    ok, n_les, n_san = ejecutar_scraper_apuestas_lesionados_sancionados()
+    if ok:
+        return {
+            "lesionados": n_les,
+            "sancionados": n_san,
+            "mensaje": (
+                f"Lesionados y sancionados actualizados desde apuestas-deportivas.es: "
+                f"{n_les} lesionados, {n_san} sancionados."
+            ),
+        }
+    # Fuente alternativa: futbolfantasy.com (lesionados y sancionados por separado)
+    ok_les = ejecutar_scraper_premier()
+    ok_san = ejecutar_scraper_sancionados()
+    if not (ok_les or ok_san):
+        raise RuntimeError("No se pudieron cargar lesionados/sancionados (apuestas-deportivas.es ni futbolfantasy.com).")
+    actualizados = " y ".join(t for t, ok in (("lesionados", ok_les), ("sancionados", ok_san)) if ok)
+    return {"mensaje": f"apuestas-deportivas.es no respondió; {actualizados} actualizados desde futbolfantasy.com."}
+
+
+def _ejecutar_arbitros():
+    from .scraper_arbitros import ejecutar_scraper_arbitros_fichajes
+    from .scraper_livefutbol import obtener_arbitros_livefutbol
+
+    # 1) Lista de árbitros (nombres + tarjetas/partido) desde livefutbol
+    lista_livefutbol = obtener_arbitros_livefutbol(forzar=True)
+    # 2) Designaciones por partido desde fichajes
+    num_partidos, num_designaciones = ejecutar_scraper_arbitros_fichajes(obtener_pagina_partido=True)
+    if lista_livefutbol:
+        msg = f"Lista de árbitros actualizada desde livefutbol.com: {len(lista_livefutbol)} árbitros (tarjetas/partido)."
+        if num_partidos and num_designaciones:
+            msg += f" Designaciones por partido: {num_partidos} partidos, {num_designaciones} con árbitro."
+    elif num_partidos and num_designaciones:
+        msg = (
+            f"Designaciones por partido actualizadas: {num_designaciones} partidos con árbitro. "
+            "La lista del desplegable usa datos guardados."
+        )
+    else:
+        raise RuntimeError("No se pudo conectar con livefutbol ni con la fuente de partidos.")
+    return {
+        "arbitros": len(lista_livefutbol),
+        "partidos": num_partidos,
+        "designaciones": num_designaciones,
+        "mensaje": msg,
+    }
+
+
+# tipo -> función que hace el trabajo y devuelve el dict de resultado (o lanza excepción)
+TAREAS = {
+    "bajas": _ejecutar_bajas,
+    "arbitros": _ejecutar_arbitros,
+}
+
+ESTADOS_ACTIVOS = ("pendiente", "en_curso")
+
+
+def encolar(tipo):
+    """Encola una tarea de tipo; si ya hay una pendiente o en curso, la devuelve. Devuelve (tarea, creada)."""
+    if tipo not in TAREAS:
+        raise ValueError(f"Tipo de tarea desconocido: {tipo}")
+    with transaction.atomic():
+        existente = TareaRefresco.objects.filter(tipo=tipo, estado__in=ESTADOS_ACTIVOS).order_by("creada").first()
+        if existente:
+            return existente, False
+        return TareaRefresco.objects.create(tipo=tipo), True
+
+
+def recuperar_colgadas():
+    """Vuelve a poner pendientes las tareas en curso desde hace demasiado (worker caído). Devuelve cuántas."""
+    limite = timezone.now() - timedelta(minutes=MINUTOS_TAREA_COLGADA)
+    return TareaRefresco.objects.filter(estado="en_curso", iniciada__lt=limite).update(estado="pendiente")
+
+
+def reclamar_siguiente():
+    """Marca como en curso la siguiente tarea pendiente lista para ejecutarse y la devuelve (o None)."""
+    while True:
+        ahora = timezone.now()
+        candidata = (
+            TareaRefresco.objects.filter(estado="pendiente", ejecutar_desde__lte=ahora)
+            .order_by("ejecutar_desde", "creada")
+            .first()
+        )
+        if candidata is None:
+            return None
+        # Update condicionado al estado: si otro worker la reclamó antes, se prueba con la siguiente
+        reclamada = TareaRefresco.objects.filter(pk=candidata.pk, estado="pendiente").update(
+            estado="en_curso", iniciada=ahora, intentos=F("intentos") + 1
+        )
+        if reclamada:
+            candidata.refresh_from_db()
+            return candidata
+
+
+def ejecutar_tarea(tarea):
+    """Ejecuta una tarea ya reclamada y guarda el resultado, o la reprograma con backoff si falla."""
+    try:
+        resultado = TAREAS[tarea.tipo]()
+    except Exception as e:
+        tarea.error = f"{type(e).__name__}: {e}"[:2000]
+        if tarea.intentos < tarea.max_intentos:
+            tarea.estado = "pendiente"
+            tarea.ejecutar_desde = timezone.now() + timedelta(seconds=BACKOFF_SEGUNDOS * 2 ** (tarea.intentos - 1))
+        else:
+            tarea.estado = "error"
+            tarea.finalizada = timezone.now()
+        tarea.save(update_fields=["estado", "error", "ejecutar_desde", "finalizada"])
+        return tarea
+    tarea.estado = "ok"
+    tarea.resultado = resultado or {}
+    tarea.error = ""
+    tarea.finalizada = timezone.now()
+    tarea.save(update_fields=["estado", "resultado", "error", "finalizada"])
+    return tarea
+
+
+def procesar_pendientes(max_tareas=None):
+    """Ejecuta tareas pendientes hasta vaciar la cola (o max_tareas). Devuelve cuántas se ejecutaron."""
+    recuperar_colgadas()
+    n = 0
+    while max_tareas is None or n < max_tareas:
+        tarea = reclamar_siguiente()
+        if tarea is None:
+            break
+        ejecutar_tarea(tarea)
+        n += 1
+    return n
+
+
+def tarea_a_dict(tarea):
+    """Estado de la tarea para la vista JSON que consulta el dashboard."""
+    return {
+        "id": tarea.pk,
+        "tipo": tarea.tipo,
+        "tipo_display": tarea.get_tipo_display(),
+        "estado": tarea.estado,
+        "estado_display": tarea.get_estado_display(),
+        "intentos": tarea.intentos,
+        "mensaje": (tarea.resultado or {}).get("mensaje", ""),
+        "error": tarea.error,
+        "terminada": tarea.estado not in ESTADOS_ACTIVOS,
+    }
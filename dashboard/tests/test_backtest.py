@@ -0,0 +1,50 @@
+"""Reconstrucción de bajas del backtest a partir del historial de CambioBaja."""
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.test import TestCase
+
+from dashboard import backtest
+from dashboard.persistencia import sincronizar_bajas
+
+T1 = datetime(2025, 9, 1, 12, tzinfo=timezone.utc)
+T2 = datetime(2025, 9, 15, 12, tzinfo=timezone.utc)
+HORA = timedelta(hours=1)
+
+
+def _sincronizar(instante, lesionados):
+    with mock.patch("dashboard.persistencia.timezone.now", return_value=instante):
+        sincronizar_bajas(lesionados=lesionados)
+
+
+def _lesionados(bajas):
+    return {(b.equipo, b.nombre): b.tipo_lesion for b in bajas[0]}
+
+
+class ReconstruirBajasTests(TestCase):
+    def setUp(self):
+        _sincronizar(T1, [
+            {"nombre": "Saka", "equipo": "Arsenal", "tipo_lesion": "Tobillo"},
+            {"nombre": "White", "equipo": "Arsenal", "tipo_lesion": "Rodilla"},
+        ])
+        # Saka cambia (modificacion), White se recupera (baja) y Rice se lesiona (alta)
+        _sincronizar(T2, [
+            {"nombre": "Saka", "equipo": "Arsenal", "tipo_lesion": "Isquiotibial"},
+            {"nombre": "Rice", "equipo": "Arsenal", "tipo_lesion": "Golpe"},
+        ])
+
+    def test_deshace_alta_baja_y_modificacion(self):
+        antes, entre, despues = backtest.reconstruir_bajas([T1 - HORA, T1 + HORA, T2 + HORA])
+        self.assertEqual(_lesionados(antes), {})
+        self.assertEqual(_lesionados(entre), {("Arsenal", "Saka"): "Tobillo", ("Arsenal", "White"): "Rodilla"})
+        self.assertEqual(_lesionados(despues), {("Arsenal", "Saka"): "Isquiotibial", ("Arsenal", "Rice"): "Golpe"})
+
+    def test_excluye_partidos_anteriores_al_historial(self):
+        jugados = [
+            ("Arsenal", "Chelsea", T1 - HORA, {}, 1, 0),
+            ("Chelsea", "Arsenal", T1 + HORA, {}, 2, 2),
+        ]
+        with mock.patch.object(backtest, "partidos_jugados", return_value=jugados):
+            partidos, _, _, sin_historial = backtest.preparar_partidos(con_sportmonks=False)
+        self.assertEqual(sin_historial, 1)
+        self.assertEqual([(p[0], p[1]) for p in partidos], [("Chelsea", "Arsenal")])
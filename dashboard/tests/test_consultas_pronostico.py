@@ -0,0 +1,74 @@
+"""Número de consultas de un pronóstico y de un lote: dos (UNION de bajas + designaciones)."""
+from unittest import mock
+
+from django.test import TestCase
+
+from dashboard import calendar_api
+from dashboard.models import DesignacionArbitro, Equipo, Lesionado, Sancionado
+from dashboard.pronosticos import generar_lote, partidos_jornada
+from dashboard.utils import cargar_datos_pronostico, generar_pronostico_pro
+
+CALENDARIO = [
+    {"HomeTeam": "Arsenal", "AwayTeam": "Chelsea", "DateUtc": "2099-01-10 15:00:00Z", "RoundNumber": 21},
+    {"HomeTeam": "Liverpool", "AwayTeam": "Man City", "DateUtc": "2099-01-10 17:30:00Z", "RoundNumber": 21},
+    {"HomeTeam": "Chelsea", "AwayTeam": "Liverpool", "DateUtc": "2099-01-06 20:00:00Z", "RoundNumber": 20},
+]
+
+
+class ConsultasPronosticoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ids = {e.nombre: e.pk for e in Equipo.objects.all()}
+        Lesionado.objects.create(
+            nombre="Saka", equipo="Arsenal", equipo_ref_id=ids["Arsenal"], estrellas=3,
+            tipo_lesion="Lesión de tobillo", retorno_esperado="Finales de enero",
+        )
+        Lesionado.objects.create(nombre="Rodri", equipo="Man City", equipo_ref_id=ids["Manchester City"])
+        Sancionado.objects.create(
+            nombre="Caicedo", equipo="Chelsea", equipo_ref_id=ids["Chelsea"], motivo="5.ª amarilla", jornada="Jornada 21"
+        )
+        DesignacionArbitro.objects.create(
+            equipo_local="Arsenal", equipo_visitante="Chelsea",
+            local_ref_id=ids["Arsenal"], visitante_ref_id=ids["Chelsea"], arbitro_nombre="Michael Oliver",
+        )
+        # La fuente usa un alias: la designación cuenta por sus FK
+        DesignacionArbitro.objects.create(
+            equipo_local="Liverpool", equipo_visitante="Man City",
+            local_ref_id=ids["Liverpool"], visitante_ref_id=ids["Manchester City"], arbitro_nombre="Anthony Taylor",
+        )
+
+    def setUp(self):
+        parche = mock.patch.object(calendar_api, "_fetch_calendar", return_value=CALENDARIO)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_pronostico_en_dos_consultas(self):
+        with self.assertNumQueries(2):
+            pronostico = generar_pronostico_pro("Arsenal", "Chelsea")
+        self.assertEqual(pronostico["arbitro_nombre"], "Michael Oliver")
+
+    def test_lote_en_dos_consultas(self):
+        partidos = [("Arsenal", "Chelsea", None, 21, CALENDARIO[0]), ("Liverpool", "Manchester City", None, 21, CALENDARIO[1])]
+        with self.assertNumQueries(2):
+            resultados = list(generar_lote(partidos))
+        self.assertEqual(len(resultados), 2)
+
+    def test_bajas_con_todos_sus_campos(self):
+        datos = cargar_datos_pronostico(("Arsenal", "Chelsea"))
+        (saka,) = datos.lesionados_de("Arsenal")
+        self.assertEqual((saka.tipo_lesion, saka.retorno_esperado, saka.estrellas), ("Lesión de tobillo", "Finales de enero", 3))
+        (caicedo,) = datos.sancionados_de("Chelsea")
+        self.assertEqual((caicedo.motivo, caicedo.jornada), ("5.ª amarilla", "Jornada 21"))
+
+    def test_designacion_por_fk_aunque_la_fuente_use_alias(self):
+        datos = cargar_datos_pronostico(("Liverpool", "Manchester City"))
+        self.assertEqual(datos.designacion("Liverpool", "Manchester City"), "Anthony Taylor")
+
+    def test_lote_con_la_fecha_de_cada_partido_y_no_la_de_la_vuelta(self):
+        ida_y_vuelta = [
+            {"HomeTeam": "Arsenal", "AwayTeam": "Chelsea", "DateUtc": "2026-09-18 19:00:00Z", "RoundNumber": 1},
+            {"HomeTeam": "Chelsea", "AwayTeam": "Arsenal", "DateUtc": "2099-10-28 19:00:00Z", "RoundNumber": 20},
+        ]
+        with mock.patch.object(calendar_api, "_fetch_calendar", return_value=ida_y_vuelta):
+            ((_, pronostico),) = generar_lote(partidos_jornada(1))
+        self.assertEqual(pronostico["fixture_date_iso"], "2026-09-18")
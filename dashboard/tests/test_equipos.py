@@ -0,0 +1,24 @@
+"""Resolución de nombres de equipo de las fuentes (dashboard.equipos)."""
+from django.test import SimpleTestCase
+
+from dashboard.equipos import equipo_al_inicio, equipo_en_texto, nombre_oficial
+
+
+class EquiposTests(SimpleTestCase):
+    def test_nombre_oficial_y_alias(self):
+        self.assertEqual(nombre_oficial("Man City"), "Manchester City")
+        self.assertEqual(nombre_oficial("brighton-hove-albion"), "Brighton & Hove Albion")
+        self.assertIsNone(nombre_oficial("Manchester"))
+
+    def test_equipo_al_inicio_exige_palabra_completa(self):
+        self.assertEqual(equipo_al_inicio("Arsenal\n0%\nJugador"), "Arsenal")
+        self.assertEqual(equipo_al_inicio("Arsenal's injuries"), "Arsenal")
+        self.assertEqual(equipo_al_inicio("Man Utd"), "Manchester United")
+        self.assertIsNone(equipo_al_inicio("Arsenalfan"))
+        # Si el alias más largo no acaba en palabra completa vale el más corto que sí
+        self.assertEqual(equipo_al_inicio("West Ham Unitedx"), "West Ham United")
+        self.assertEqual(equipo_al_inicio("Newcastle Unitedx"), "Newcastle United")
+
+    def test_equipo_en_texto(self):
+        self.assertEqual(equipo_en_texto("Lesionados del Tottenham Hotspur"), "Tottenham Hotspur")
+        self.assertIsNone(equipo_en_texto("Spursy y Chelseaa"))
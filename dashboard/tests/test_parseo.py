@@ -0,0 +1,46 @@
+"""Elección del parser y mismas filas con lxml y html.parser sobre las páginas guardadas en tests/fixtures."""
+from pathlib import Path
+from unittest import skipUnless
+
+from bs4 import BeautifulSoup
+from django.test import SimpleTestCase, override_settings
+
+from dashboard.parseo import parser_html, parsers_disponibles
+from dashboard.scraper import extraer_lesionados, extraer_sancionados
+from dashboard.scraper_arbitros import extraer_partidos
+from dashboard.scraper_livefutbol import extraer_arbitros
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+PAGINAS = (
+    ("futbolfantasy_lesionados_sintetica", extraer_lesionados),
+    ("futbolfantasy_sancionados_sintetica", extraer_sancionados),
+    ("futbolfantasy_cabeceras_sintetica", extraer_lesionados),
+    ("livefutbol_arbitros_sintetica", extraer_arbitros),
+    ("fichajes_premier_sintetica", extraer_partidos),
+)
+
+
+class ParserHtmlTests(SimpleTestCase):
+    def setUp(self):
+        parser_html.cache_clear()
+        self.addCleanup(parser_html.cache_clear)
+
+    @override_settings(SCRAPER_PARSER="html.parser")
+    def test_setting_fuerza_el_parser(self):
+        self.assertEqual(parser_html(), "html.parser")
+
+    @override_settings(SCRAPER_PARSER="no-existe")
+    def test_parser_no_instalado_usa_el_preferido(self):
+        self.assertEqual(parser_html(), parsers_disponibles()[0])
+
+
+@skipUnless("lxml" in parsers_disponibles(), "lxml no está instalado")
+class LxmlFrenteAHtmlParserTests(SimpleTestCase):
+    def test_mismas_filas(self):
+        for nombre, extractor in PAGINAS:
+            html = (FIXTURES / f"{nombre}.html").read_bytes()
+            with self.subTest(pagina=nombre):
+                filas = extractor(BeautifulSoup(html, "html.parser"))
+                self.assertTrue(filas)
+                self.assertEqual(extractor(BeautifulSoup(html, "lxml")), filas)
@@ -0,0 +1,39 @@
+"""
+Parseo dirigido (SoupStrainer): mismas filas que con el documento completo en las páginas
+sintéticas de tests/fixtures.
+"""
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from dashboard.parseo import sopa
+from dashboard.scraper_arbitros import extraer_partidos
+from dashboard.scraper_livefutbol import extraer_arbitros
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def pagina(nombre):
+    return (FIXTURES / f"{nombre}.html").read_bytes()
+
+
+class ParseoDirigidoTests(SimpleTestCase):
+    def test_arbitros_livefutbol(self):
+        html = pagina("livefutbol_arbitros_sintetica")
+        arbitros = extraer_arbitros(html)
+        # Pasar el documento ya parseado con sopa() se salta el SoupStrainer
+        self.assertEqual(arbitros, extraer_arbitros(sopa(html)))
+        self.assertEqual(len(arbitros), 16)
+        # Solo la tabla de árbitros; el enlace con imagen toma el nombre del slug
+        self.assertEqual(arbitros[0], {"nombre": "Michael Oliver", "tarjetas_promedio": 3.7, "nota": "20 partidos (livefutbol)"})
+        self.assertIn("Darren England", [a["nombre"] for a in arbitros])
+
+    def test_partidos_fichajes(self):
+        html = pagina("fichajes_premier_sintetica")
+        partidos = extraer_partidos(html)
+        self.assertEqual(partidos, extraer_partidos(sopa(html)))
+        self.assertEqual(len(partidos), 10)
+        self.assertEqual(
+            partidos[2],
+            {"local": "Liverpool", "visitante": "Brighton & Hove Albion", "href": "/directo/540102-liverpool-vs-brighton-hove-albion"},
+        )
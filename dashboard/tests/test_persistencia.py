@@ -0,0 +1,31 @@
+"""Sincronización incremental de lesionados y sancionados (dashboard.persistencia)."""
+from django.test import TestCase
+from django.utils import timezone
+
+from dashboard.models import CambioBaja, Lesionado, Pronostico
+from dashboard.persistencia import sincronizar_lesionados
+
+
+class SincronizarBajasTests(TestCase):
+    def test_solo_fk_de_equipo_no_cuenta_como_modificacion(self):
+        # Fila guardada cuando "Man City" aún no se reconocía como equipo
+        Lesionado.objects.create(nombre="Rodri", equipo="Man City", tipo_lesion="Rodilla")
+        resumen = sincronizar_lesionados([{"nombre": "Rodri", "equipo": "Man City", "tipo_lesion": "Rodilla"}])
+        self.assertEqual(resumen, {"altas": 0, "modificaciones": 0, "bajas": 0})
+        self.assertFalse(CambioBaja.objects.exists())
+        self.assertEqual(Lesionado.objects.get().equipo_ref.nombre, "Manchester City")
+
+    def test_modificacion_real_se_cuenta_y_registra(self):
+        Lesionado.objects.create(nombre="Rodri", equipo="Man City", tipo_lesion="Rodilla")
+        resumen = sincronizar_lesionados([{"nombre": "Rodri", "equipo": "Man City", "tipo_lesion": "Tobillo"}])
+        self.assertEqual(resumen["modificaciones"], 1)
+        self.assertEqual(CambioBaja.objects.get().detalle, {"tipo_lesion": ["Rodilla", "Tobillo"]})
+
+    def test_solo_fk_de_equipo_invalida_sus_pronosticos(self):
+        Lesionado.objects.create(nombre="Rodri", equipo="Man City", tipo_lesion="Rodilla")
+        for local, visitante in (("Manchester City", "Arsenal"), ("Chelsea", "Liverpool")):
+            Pronostico.objects.create(equipo_local=local, equipo_visitante=visitante, version="v", calculado=timezone.now())
+        sincronizar_lesionados([{"nombre": "Rodri", "equipo": "Man City", "tipo_lesion": "Rodilla"}])
+        self.assertEqual(
+            dict(Pronostico.objects.values_list("equipo_local", "vigente")), {"Manchester City": False, "Chelsea": True}
+        )
@@ -0,0 +1,51 @@
+"""
+Extractores de futbolfantasy sobre las páginas sintéticas de tests/fixtures (filas esperadas en el
+.json de al lado) y frente al extractor anterior que benchmark.py conserva como referencia.
+"""
+import json
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from dashboard.benchmark import lesionados_por_ancestros, sancionados_por_ancestros
+from dashboard.scraper import extraer_lesionados, extraer_sancionados
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def pagina(nombre):
+    return (FIXTURES / f"{nombre}.html").read_bytes()
+
+
+def esperado(nombre):
+    return json.loads((FIXTURES / f"{nombre}.json").read_text(encoding="utf-8"))
+
+
+class ExtraerFutbolfantasyTests(SimpleTestCase):
+    def test_lesionados(self):
+        nombre = "futbolfantasy_lesionados_sintetica"
+        self.assertEqual(extraer_lesionados(pagina(nombre)), esperado(nombre))
+
+    def test_sancionados(self):
+        nombre = "futbolfantasy_sancionados_sintetica"
+        self.assertEqual(extraer_sancionados(pagina(nombre)), esperado(nombre))
+
+    def test_lesionados_con_cabeceras_h2(self):
+        nombre = "futbolfantasy_cabeceras_sintetica"
+        self.assertEqual(extraer_lesionados(pagina(nombre)), esperado(nombre))
+
+    def test_rival_en_la_ficha_no_cambia_el_equipo(self):
+        # La ficha de Saka termina con "Próximo rival: Chelsea"; Rice sigue siendo del Arsenal
+        filas = {f["nombre"]: f["equipo"] for f in extraer_lesionados(pagina("futbolfantasy_lesionados_sintetica"))}
+        self.assertEqual((filas["Bukayo Saka"], filas["Declan Rice"]), ("Arsenal", "Arsenal"))
+
+    def test_mismas_filas_que_el_extractor_anterior(self):
+        casos = (
+            ("futbolfantasy_lesionados_sintetica", extraer_lesionados, lesionados_por_ancestros),
+            ("futbolfantasy_sancionados_sintetica", extraer_sancionados, sancionados_por_ancestros),
+            ("futbolfantasy_cabeceras_sintetica", extraer_lesionados, lesionados_por_ancestros),
+        )
+        for nombre, actual, anterior in casos:
+            html = pagina(nombre)
+            with self.subTest(pagina=nombre):
+                self.assertEqual(actual(html), anterior(html))
@@ -0,0 +1,29 @@
+"""Simulación de temporada: cada partido pendiente se pronostica con su propio partido del calendario."""
+from unittest import mock
+
+from django.test import TestCase
+
+from dashboard import calendar_api, utils
+from dashboard.simulacion import preparar_temporada, simular_temporada
+
+IDA_Y_VUELTA = [
+    {"HomeTeam": "Arsenal", "AwayTeam": "Chelsea", "DateUtc": "2099-08-20 19:00:00Z", "RoundNumber": 1},
+    {"HomeTeam": "Chelsea", "AwayTeam": "Arsenal", "DateUtc": "2099-10-28 19:00:00Z", "RoundNumber": 20},
+]
+
+
+class SimulacionTests(TestCase):
+    def setUp(self):
+        parche = mock.patch.object(calendar_api, "_fetch_calendar", return_value=IDA_Y_VUELTA)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_pendientes_con_su_partido(self):
+        _, _, pendientes = preparar_temporada()
+        self.assertEqual(pendientes, [("Arsenal", "Chelsea", IDA_Y_VUELTA[0]), ("Chelsea", "Arsenal", IDA_Y_VUELTA[1])])
+
+    def test_vuelta_con_su_fecha(self):
+        with mock.patch.object(utils, "generar_pronostico_pro", wraps=utils.generar_pronostico_pro) as espia:
+            simular_temporada(simulaciones=10, semilla=1)
+        fechas = [c.kwargs["fixture"]["DateUtc"] for c in espia.call_args_list]
+        self.assertEqual(fechas, ["2099-08-20 19:00:00Z", "2099-10-28 19:00:00Z"])
@@ -6,4 +6,6 @@ urlpatterns = [
     path('estadisticas/', views.estadisticas, name='estadisticas'),
     path('lesionados/', views.lesionados, name='lesionados'),
     path('sancionados/', views.sancionados, name='sancionados'),
+    path('tareas/<int:pk>/', views.estado_tarea, name='estado_tarea'),
+    path('api/pronosticos/', views.api_pronosticos, name='api_pronosticos'),
 ]
\ No newline at end of file
@@ -1,4 +1,11 @@
+import hashlib
 import math
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from . import poisson
 
 # 20 equipos Premier League (temporada 2025/26) con estadísticas base (goles avg, corners, tarjetas)
 _EQUIPOS_PREMIER_STATS = {
@@ -82,6 +89,11 @@ _PROFUNDIDAD_EQUIPO = {
 _GOLES_MINIMOS_POR_EQUIPO = 0.55
 # Penalización máxima por equipo (por muchas bajas no restamos más de esto)
 _PENALIZACION_MAXIMA_GOLES = 1.2
+# Goles que resta cada lesionado según sus estrellas (otros valores cuentan como 1⭐) y cada sancionado
+_PESO_LESIONADO_POR_ESTRELLAS = {3: 0.35, 2: 0.25, 1: 0.15}
+_PESO_SANCIONADO = 0.2
+# Goles que se restan al equipo que jugó entre semana (cansancio)
+_PENALIZACION_ENTRE_SEMANA = 0.2
 
 # Tipo de cancha por equipo: altura (ventaja local, visitante rinde algo menos) vs llano.
 # metros: altitud aprox. del estadio (m s.n.m.) para referencia.
@@ -112,6 +124,18 @@ _ESTADIO_POR_EQUIPO = {
 _FACTOR_VISITANTE_EN_ALTURA = 0.94
 
 
+def firma_modelo():
+    """Huella de los parámetros del pronóstico (stats, profundidad, estadios, árbitros): cambia si se editan."""
+    parametros = (
+        _EQUIPOS_PREMIER_STATS, _ARBITROS_PREMIER, _ARBITRO_POR_PARTIDO, _JUGADORES_POR_EQUIPO,
+        _PROFUNDIDAD_EQUIPO, _GOLES_MINIMOS_POR_EQUIPO, _PENALIZACION_MAXIMA_GOLES,
+        _PESO_LESIONADO_POR_ESTRELLAS, _PESO_SANCIONADO, _PENALIZACION_ENTRE_SEMANA,
+        _ESTADIO_POR_EQUIPO, _FACTOR_VISITANTE_EN_ALTURA,
+        poisson.MAX_GOLES, poisson.LINEAS_GOLES, poisson.LINEAS_HANDICAP, poisson.TOP_MARCADORES,
+    )
+    return hashlib.sha1(repr(parametros).encode()).hexdigest()[:12]
+
+
 def obtener_datos_completos_premier():
     """Devuelve un diccionario equipo -> {g, c, t} para usar en pronósticos."""
     return _EQUIPOS_PREMIER_STATS.copy()
@@ -139,16 +163,16 @@ def obtener_lista_arbitros_premier():
     return get_arbitros_fallback()
 
 
-def _elegir_arbitro_para_partido(home, away):
-    """Elige árbitro: 1) DB (scraper), 2) lista estática, 3) hash. Devuelve (arbitro_dict, es_oficial)."""
-    from .models import DesignacionArbitro
+def _elegir_arbitro_para_partido(home, away, datos=None):
+    """
+    Elige árbitro: 1) DB (scraper), 2) lista estática, 3) hash. Devuelve (arbitro_dict, es_oficial).
+    datos: DatosPronostico ya cargado (si None se cargan las designaciones de estos equipos).
+    """
     key_local, key_visitante = home.strip(), away.strip()
-    designacion = (
-        DesignacionArbitro.objects.filter(equipo_local=key_local, equipo_visitante=key_visitante).first()
-        or DesignacionArbitro.objects.filter(equipo_local=key_visitante, equipo_visitante=key_local).first()
-    )
-    if designacion:
-        nombre = designacion.arbitro_nombre
+    if datos is None:
+        datos = cargar_datos_pronostico((key_local, key_visitante))
+    nombre = datos.designacion(key_local, key_visitante)
+    if nombre:
         for a in _ARBITROS_PREMIER:
             if a["nombre"] == nombre:
                 return a, True
@@ -158,47 +182,167 @@ def _elegir_arbitro_para_partido(home, away):
         for a in _ARBITROS_PREMIER:
             if a["nombre"] == nombre_oficial:
                 return a, True
-    idx = hash((home, away)) % len(_ARBITROS_PREMIER)
+    # crc32 y no hash(): hash() de cadenas cambia con PYTHONHASHSEED y cada proceso elegiría otro árbitro
+    idx = zlib.crc32(f"{home}|{away}".encode()) % len(_ARBITROS_PREMIER)
     return _ARBITROS_PREMIER[idx], False
 
 
-def _buscar_arbitro_por_nombre(nombre):
-    """Busca un árbitro por nombre en la lista de livefutbol o estática."""
+def _normalizar_nombre_arbitro(nombre):
+    """'  Michael  Óliver ' -> 'michael oliver' (sin tildes, minúsculas, espacios simples)."""
+    s = unicodedata.normalize("NFKD", nombre or "")
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return " ".join(s.lower().split())
+
+
+def construir_indice_arbitros(lista=None):
+    """
+    Índice nombre -> árbitro para resolver la selección manual en O(1).
+    Incluye el nombre tal cual y su forma normalizada. lista: la del desplegable
+    (si None se obtiene de la cache de livefutbol o la estática).
+    """
+    if lista is None:
+        lista = obtener_lista_arbitros_premier()
+    indice = {}
+    for a in lista:
+        nombre = (a.get("nombre") or "").strip()
+        if not nombre:
+            continue
+        indice.setdefault(nombre, a)
+        indice.setdefault(_normalizar_nombre_arbitro(nombre), a)
+    return indice
+
+
+def _buscar_arbitro_por_nombre(nombre, indice_arbitros=None):
+    """Busca un árbitro por nombre en el índice (livefutbol o estática); si no está, valores por defecto."""
     if not nombre:
         return None
     nombre = nombre.strip()
-    lista = obtener_lista_arbitros_premier()
-    for a in lista:
-        if (a.get("nombre") or "").strip() == nombre:
-            return a
+    if indice_arbitros is None:
+        indice_arbitros = construir_indice_arbitros()
+    arbitro = indice_arbitros.get(nombre) or indice_arbitros.get(_normalizar_nombre_arbitro(nombre))
+    if arbitro:
+        return arbitro
     return {"nombre": nombre, "tarjetas_promedio": 3.8, "nota": "Selección manual"}
 
 
-def generar_pronostico_pro(home, away, arbitro_manual=None):
+@dataclass(frozen=True)
+class DatosPronostico:
+    """
+    Lesionados, sancionados y designaciones cargados de una vez (cargar_datos_pronostico) para
+    calcular muchos pronósticos sin consultas por partido. Las bajas se asignan a cada equipo por
+    su FK equipo_ref (equipos: nombre del selector -> pk de Equipo), igual que las consultas.
+    """
+    lesionados: tuple
+    sancionados: tuple
+    designaciones: MappingProxyType  # (local, visitante) -> arbitro_nombre
+    equipos: MappingProxyType  # nombre del selector -> pk de Equipo
+
+    def lesionados_de(self, equipo):
+        pk = self.equipos.get(equipo)
+        return [b for b in self.lesionados if pk and b.equipo_ref_id == pk]
+
+    def sancionados_de(self, equipo):
+        pk = self.equipos.get(equipo)
+        return [s for s in self.sancionados if pk and s.equipo_ref_id == pk]
+
+    def designacion(self, local, visitante):
+        return self.designaciones.get((local, visitante)) or self.designaciones.get((visitante, local))
+
+
+def cargar_datos_pronostico(equipos=None):
+    """
+    Carga lesionados, sancionados y designaciones en dos consultas: una UNION de lesionados y
+    sancionados y otra de designaciones. equipos: solo las filas de esos equipos (filtro exacto
+    por las FK a Equipo, con índice); None = todas, para un lote de pronósticos. Las designaciones
+    se indexan por el nombre del selector de sus FK, así cuentan aunque la fuente use un alias.
+    Las bajas traen todos sus campos salvo fecha_actualizacion.
+    """
+    from django.db.models import F, Q, Value
+    from .models import DesignacionArbitro, Lesionado, Sancionado
+
+    filtro_bajas = Q(equipo_ref__isnull=False)
+    filtro_des = Q(local_ref__isnull=False, visitante_ref__isnull=False)
+    if equipos is not None:
+        equipos = [e.strip() for e in equipos]
+        filtro_bajas = Q(equipo_ref__nombre__in=equipos)
+        filtro_des = Q(local_ref__nombre__in=equipos, visitante_ref__nombre__in=equipos)
+    # Mismas columnas en el mismo orden a ambos lados (campos del modelo y luego anotaciones).
+    # texto1/texto2: tipo_lesion/retorno_esperado de lesionados y motivo/jornada de sancionados
+    columnas = ("pk", "nombre", "equipo", "equipo_ref", "tipo", "pos", "est", "texto1", "texto2", "eq")
+    lesionados = Lesionado.objects.filter(filtro_bajas).annotate(
+        tipo=Value("L"), pos=F("posicion"), est=F("estrellas"),
+        texto1=F("tipo_lesion"), texto2=F("retorno_esperado"), eq=F("equipo_ref__nombre"),
+    ).values_list(*columnas).order_by()
+    sancionados = Sancionado.objects.filter(filtro_bajas).annotate(
+        tipo=Value("S"), pos=Value("NA"), est=Value(0),
+        texto1=F("motivo"), texto2=F("jornada"), eq=F("equipo_ref__nombre"),
+    ).values_list(*columnas).order_by()
+    filas_les, filas_san, ids = [], [], {}
+    for pk, nombre, equipo, ref, tipo, pos, est, texto1, texto2, eq in lesionados.union(sancionados, all=True):
+        ids[eq] = ref
+        if tipo == "L":
+            filas_les.append(Lesionado(
+                pk=pk, nombre=nombre, equipo=equipo, equipo_ref_id=ref, posicion=pos, estrellas=est,
+                tipo_lesion=texto1, retorno_esperado=texto2,
+            ))
+        else:
+            filas_san.append(Sancionado(
+                pk=pk, nombre=nombre, equipo=equipo, equipo_ref_id=ref, motivo=texto1, jornada=texto2
+            ))
+    # Mismo orden que las consultas sueltas: lesionados por id, sancionados por Meta.ordering
+    filas_les.sort(key=lambda b: b.pk)
+    filas_san.sort(key=lambda s: (s.equipo, s.nombre))
+    return DatosPronostico(
+        lesionados=tuple(filas_les),
+        sancionados=tuple(filas_san),
+        # De la más antigua a la más reciente: si dos filas son el mismo partido, gana la última
+        designaciones=MappingProxyType({
+            (local, visitante): arbitro
+            for local, visitante, arbitro in DesignacionArbitro.objects.filter(filtro_des)
+            .order_by("fecha_actualizacion")
+            .values_list("local_ref__nombre", "visitante_ref__nombre", "arbitro_nombre")
+        }),
+        # Solo los equipos con alguna baja: al resto no le corresponde ninguna fila
+        equipos=MappingProxyType(ids),
+    )
+
+
+def generar_pronostico_pro(
+    home, away, arbitro_manual=None, indice_arbitros=None, datos=None, con_mercados=True,
+    fixture=None, calendario=None,
+):
+    """
+    Pronóstico local vs visitante. indice_arbitros: índice de construir_indice_arbitros()
+    ya calculado en la petición (evita volver a cargar la lista de árbitros).
+    datos: DatosPronostico precargado para lotes; si None se cargan solo las filas de estos
+    dos equipos (dos consultas en total).
+    con_mercados: añadir 'mercados' (matriz Poisson). En lote se calculan aparte, todos a la vez.
+    fixture / calendario: partido del calendario y CalendarIndex a usar (backtest de partidos ya
+    jugados); por defecto el próximo partido de la pareja y el calendario cacheado.
+    """
     if not home or not away:
         return {}
 
-    from .models import Lesionado, Sancionado
-
     db = obtener_datos_completos_premier()
     stats_h = db.get(home, {"g": 1.5, "c": 5, "t": 2})
     stats_a = db.get(away, {"g": 1.5, "c": 5, "t": 2})
 
-    bajas_h = Lesionado.objects.filter(equipo__icontains=home.split()[0])
-    bajas_a = Lesionado.objects.filter(equipo__icontains=away.split()[0])
-    sanciones_h = Sancionado.objects.filter(equipo__iexact=home)
-    sanciones_a = Sancionado.objects.filter(equipo__iexact=away)
+    if datos is None:
+        datos = cargar_datos_pronostico((home, away))
+    bajas_h, bajas_a = datos.lesionados_de(home), datos.lesionados_de(away)
+    sanciones_h, sanciones_a = datos.sancionados_de(home), datos.sancionados_de(away)
 
-    n_h, n_a = bajas_h.count(), bajas_a.count()
+    n_h, n_a = len(bajas_h), len(bajas_a)
     pct_bajas_h = round((n_h / _JUGADORES_POR_EQUIPO) * 100) if n_h else 0
     pct_bajas_a = round((n_a / _JUGADORES_POR_EQUIPO) * 100) if n_a else 0
 
     # Peso por estrella (lesionados): 3⭐ resta más al equipo que 1⭐
-    peso_bajas_h = sum(0.35 if b.estrellas == 3 else (0.25 if b.estrellas == 2 else 0.15) for b in bajas_h)
-    peso_bajas_a = sum(0.35 if b.estrellas == 3 else (0.25 if b.estrellas == 2 else 0.15) for b in bajas_a)
+    peso_1 = _PESO_LESIONADO_POR_ESTRELLAS[1]
+    peso_bajas_h = sum(_PESO_LESIONADO_POR_ESTRELLAS.get(b.estrellas, peso_1) for b in bajas_h)
+    peso_bajas_a = sum(_PESO_LESIONADO_POR_ESTRELLAS.get(b.estrellas, peso_1) for b in bajas_a)
     # Sancionados: cada uno resta ~0.2 goles
-    peso_sanciones_h = sanciones_h.count() * 0.2
-    peso_sanciones_a = sanciones_a.count() * 0.2
+    peso_sanciones_h = len(sanciones_h) * _PESO_SANCIONADO
+    peso_sanciones_a = len(sanciones_a) * _PESO_SANCIONADO
 
     # Penalización total en bruto (con tope para no castigar en exceso)
     penal_raw_h = min(peso_bajas_h + peso_sanciones_h, _PENALIZACION_MAXIMA_GOLES)
@@ -217,10 +361,10 @@ def generar_pronostico_pro(home, away, arbitro_manual=None):
 
     # Árbitro: si el usuario eligió uno manualmente, usarlo; si no, elegir automático
     if arbitro_manual:
-        arbitro = _buscar_arbitro_por_nombre(arbitro_manual)
+        arbitro = _buscar_arbitro_por_nombre(arbitro_manual, indice_arbitros)
         arbitro_oficial = True  # usuario lo eligió
     else:
-        arbitro, arbitro_oficial = _elegir_arbitro_para_partido(home, away)
+        arbitro, arbitro_oficial = _elegir_arbitro_para_partido(home, away, datos)
     tarjetas_base = stats_h['t'] + stats_a['t']
     factor_arbitro = arbitro["tarjetas_promedio"] / 4.0
     tarjetas_ajustadas = round(tarjetas_base * factor_arbitro, 1)
@@ -233,7 +377,8 @@ def generar_pronostico_pro(home, away, arbitro_manual=None):
         _parse_date_utc,
         _fetch_calendar,
     )
-    fixture = get_fixture_for_match(home, away)
+    if fixture is None:
+        fixture = get_fixture_for_match(home, away)
     fecha_partido = None
     fixture_date_iso = None
     partido_entre_semana_local = False
@@ -243,14 +388,14 @@ def generar_pronostico_pro(home, away, arbitro_manual=None):
         if dt:
             fecha_partido = format_fixture_date(dt)
             fixture_date_iso = dt.strftime("%Y-%m-%d")
-        all_matches = _fetch_calendar()
+        all_matches = calendario if calendario is not None else _fetch_calendar()
         partido_entre_semana_local = had_midweek_match(home, dt, all_matches)
         partido_entre_semana_visitante = had_midweek_match(away, dt, all_matches)
         # Pequeña penalización en goles si jugaron entre semana (cansancio)
         if partido_entre_semana_local:
-            g_h = max(0, g_h - 0.2)
+            g_h = max(0, g_h - _PENALIZACION_ENTRE_SEMANA)
         if partido_entre_semana_visitante:
-            g_a = max(0, g_a - 0.2)
+            g_a = max(0, g_a - _PENALIZACION_ENTRE_SEMANA)
 
     # Cancha local: si es de altura, el visitante rinde algo menos
     estadio_local = _ESTADIO_POR_EQUIPO.get(home, {"tipo": "llano", "metros": 0, "nota": ""})
@@ -276,8 +421,10 @@ def generar_pronostico_pro(home, away, arbitro_manual=None):
     else:
         cancha_local_texto = "Llano" + (f" ({cancha_metros} m)" if cancha_metros else "") + (f" — {cancha_nota}" if cancha_nota else "")
 
-    return {
+    resultado = {
         'marcador': f"{max(0, round(g_h))} - {max(0, round(g_a))}",
+        'goles_esperados_local': round(g_h, 3),
+        'goles_esperados_visitante': round(g_a, 3),
         'bajas_h': [(b.nombre, b.get_posicion_display(), b.estrellas) for b in bajas_h],
         'bajas_a': [(b.nombre, b.get_posicion_display(), b.estrellas) for b in bajas_a],
         'sancionados_h': [s.nombre for s in sanciones_h],
@@ -300,3 +447,6 @@ def generar_pronostico_pro(home, away, arbitro_manual=None):
         'goles_primer_tiempo_esperados': goles_primer_tiempo_esperados,
         'prob_ambos_anotan': prob_ambos_anotan,
     }
+    if con_mercados:
+        resultado['mercados'] = poisson.mercados_partido(g_h, g_a)
+    return resultado
@@ -1,21 +1,84 @@
-from django.shortcuts import render, redirect
+import json
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib import messages
+from django.utils import timezone
 from .utils import (
     generar_pronostico_pro,
     obtener_datos_completos_premier,
     obtener_estadios_premier,
     obtener_lista_arbitros_premier,
     get_arbitros_fallback,
+    construir_indice_arbitros,
 )
-from .scraper_apuestas import ejecutar_scraper_apuestas_lesionados_sancionados
-from .scraper_arbitros import ejecutar_scraper_arbitros_fichajes
-from .scraper_livefutbol import obtener_arbitros_livefutbol, limpiar_cache_arbitros
 from .sportmonks_client import (
     get_prediction_for_match,
     procesar_probabilidades_sportmonks,
     get_head2head_by_names,
 )
-from .models import Lesionado, Sancionado
+from .calendar_api import get_fixture_date_iso
+from .paralelo import ejecutar_en_paralelo
+from .persistencia import cambios_ultima_sincronizacion
+from .pronosticos import generar_lote, obtener_pronostico, partido_a_dict, partidos_jornada, partidos_temporada
+from .tareas import encolar, tarea_a_dict
+from .models import Lesionado, Sancionado, SimulacionTemporada, TareaRefresco
+
+# Tareas mostradas en Inicio: las activas y las terminadas en los últimos minutos
+MINUTOS_TAREAS_RECIENTES = 10
+
+
+def _tareas_recientes():
+    """Última tarea de cada tipo si sigue activa o terminó hace poco (para mostrar y consultar su estado)."""
+    desde = timezone.now() - timedelta(minutes=MINUTOS_TAREAS_RECIENTES)
+    tareas = []
+    for tipo, _ in TareaRefresco.TIPOS:
+        t = TareaRefresco.objects.filter(tipo=tipo).order_by("-creada").first()
+        if t and (t.estado in ("pendiente", "en_curso") or (t.finalizada and t.finalizada >= desde)):
+            tareas.append(tarea_a_dict(t))
+    return tareas
+
+
+def estado_tarea(request, pk):
+    """Estado de una tarea en JSON (la página de Inicio lo consulta periódicamente)."""
+    return JsonResponse(tarea_a_dict(get_object_or_404(TareaRefresco, pk=pk)))
+
+
+def _json_lote(jornada, lote):
+    """Trozos del JSON {"jornada": N, "partidos": [...]}, un partido por trozo según se calcula."""
+    yield json.dumps({"jornada": jornada}, cls=DjangoJSONEncoder)[:-1] + ', "partidos": ['
+    for i, (partido, pronostico) in enumerate(lote):
+        yield ("," if i else "") + json.dumps(partido_a_dict(partido, pronostico), cls=DjangoJSONEncoder)
+    yield "]}"
+
+
+def api_pronosticos(request):
+    """
+    GET /api/pronosticos/?jornada=N: pronósticos (árbitro automático) de todos los partidos de la jornada.
+    Sin jornada: la próxima; jornada=todas: todo el calendario. La respuesta se envía partido a partido.
+    """
+    valor = (request.GET.get("jornada") or "").strip().lower()
+    if valor == "todas":
+        jornada = "todas"
+        partidos = partidos_temporada()
+    else:
+        try:
+            jornada = int(valor) if valor else None
+        except ValueError:
+            return JsonResponse({"error": "jornada debe ser un número o 'todas'."}, status=400)
+        partidos = partidos_jornada(jornada)
+        if partidos and jornada is None:
+            jornada = partidos[0][3]
+    return StreamingHttpResponse(_json_lote(jornada, generar_lote(partidos)), content_type="application/json")
+
+
+def _prediccion_sportmonks(home, away):
+    """Fecha del partido (calendario) + predicción Sportmonks. Devuelve (pred, err)."""
+    return get_prediction_for_match(home, away, get_fixture_date_iso(home, away))
 
 
 def home_dashboard(request):
@@ -24,67 +87,57 @@ def home_dashboard(request):
         arbitros = obtener_lista_arbitros_premier()
     except Exception:
         arbitros = get_arbitros_fallback()
-    context = {"equipos": equipos, "arbitros": arbitros, "head2head": []}
+    context = {"equipos": equipos, "arbitros": arbitros, "head2head": [], "tareas": _tareas_recientes()}
 
     if request.method == "POST":
-        if "update_bajas" in request.POST:
-            ok, n_les, n_san = ejecutar_scraper_apuestas_lesionados_sancionados()
-            if ok:
-                messages.success(
-                    request,
-                    f"Lesionados y sancionados actualizados desde apuestas-deportivas.es: {n_les} lesionados, {n_san} sancionados.",
-                )
-            else:
-                messages.warning(request, "No se pudieron cargar lesionados/sancionados. Reintenta más tarde.")
-            return redirect("home")
-        if "update_arbitros" in request.POST:
-            # 1) Actualizar lista de árbitros (nombres + tarjetas/partido) desde livefutbol
-            limpiar_cache_arbitros()
-            lista_livefutbol = obtener_arbitros_livefutbol()
-            # 2) Opcional: designaciones por partido desde fichajes
-            num_partidos, num_designaciones = ejecutar_scraper_arbitros_fichajes(obtener_pagina_partido=True)
-            if lista_livefutbol:
-                msg = f"Lista de árbitros actualizada desde livefutbol.com: {len(lista_livefutbol)} árbitros (tarjetas/partido)."
-                if num_partidos and num_designaciones:
-                    msg += f" Designaciones por partido: {num_partidos} partidos, {num_designaciones} con árbitro."
-                messages.success(request, msg)
-            elif num_partidos and num_designaciones:
-                messages.success(
-                    request,
-                    f"Designaciones por partido actualizadas: {num_designaciones} partidos con árbitro. "
-                    "La lista del desplegable usa datos guardados.",
-                )
-            else:
-                n_arb = len(arbitros)
-                messages.info(
-                    request,
-                    f"No se pudo conectar con livefutbol ni con la fuente de partidos. "
-                    f"El desplegable sigue con la lista actual ({n_arb} árbitros) para elegir y calcular tarjetas.",
-                )
-            return redirect("home")
-        if "update_sancionados" in request.POST:
-            ok, n_les, n_san = ejecutar_scraper_apuestas_lesionados_sancionados()
-            if ok:
-                messages.success(
-                    request,
-                    f"Lesionados y sancionados actualizados: {n_les} lesionados, {n_san} sancionados.",
-                )
-            else:
-                messages.warning(request, "No se pudieron cargar sancionados. Reintenta más tarde.")
-            return redirect("home")
+        # Los scrapers van a la cola de tareas: la petición vuelve enseguida y la página consulta el estado
+        for boton, tipo in (("update_bajas", "bajas"), ("update_sancionados", "bajas"), ("update_arbitros", "arbitros")):
+            if boton in request.POST:
+                tarea, creada = encolar(tipo)
+                if creada:
+                    messages.info(request, f"Actualización de {tarea.get_tipo_display().lower()} en cola. Se mostrará aquí al terminar.")
+                else:
+                    messages.info(request, f"Ya hay una actualización de {tarea.get_tipo_display().lower()} en marcha.")
+                return redirect("home")
 
         home = request.POST.get("home_team")
         away = request.POST.get("away_team")
         arbitro_manual = (request.POST.get("arbitro_manual") or "").strip() or None
         if home and away:
-            context.update(generar_pronostico_pro(home, away, arbitro_manual=arbitro_manual))
+            # Reutilizar la lista del desplegable: una sola carga de árbitros por petición
+            indice_arbitros = construir_indice_arbitros(arbitros) if arbitro_manual else None
+            # Con árbitro automático el pronóstico está precalculado; con uno elegido se calcula al momento
+            if arbitro_manual:
+                tarea_pronostico = partial(
+                    generar_pronostico_pro, home, away,
+                    arbitro_manual=arbitro_manual, indice_arbitros=indice_arbitros,
+                )
+            else:
+                tarea_pronostico = partial(obtener_pronostico, home, away)
+            # Pronóstico propio, Sportmonks y Head2Head son independientes: se lanzan a la vez
+            resultados = ejecutar_en_paralelo(
+                {
+                    "pronostico": tarea_pronostico,
+                    "sportmonks": partial(_prediccion_sportmonks, home, away),
+                    "head2head": partial(get_head2head_by_names, home, away, limit=8),
+                },
+                plazo=settings.PRONOSTICO_PLAZO_SEGUNDOS,
+            )
+            pronostico, err_pronostico = resultados["pronostico"]
+            if err_pronostico:
+                messages.warning(request, "No se pudo calcular el pronóstico. Reintenta en unos segundos.")
+            context.update(pronostico or {})
             context["home_sel"] = home
             context["away_sel"] = away
             if arbitro_manual:
                 context["arbitro_sel"] = arbitro_manual
             # Datos Sportmonks: marcadores probables, goles totales, ambos anotan
-            fixture_date = context.get("fixture_date_iso")
-            pred, err = get_prediction_for_match(home, away, fixture_date)
+            resultado_sm, err_tarea = resultados["sportmonks"]
+            pred, err = resultado_sm or (None, None)
+            if err_tarea == "timeout":
+                err = "Sportmonks: sin respuesta a tiempo. Reintenta en unos segundos."
+            elif err_tarea:
+                err = f"Sportmonks: error inesperado ({err_tarea})."
             if err or not pred:
                 msg = err or "Sin datos"
                 if "api_token=" in msg or "for url:" in msg.lower() or "403" in msg or "Forbidden" in msg:
@@ -102,8 +155,9 @@ def home_dashboard(request):
                     context["sportmonks"]["fulltime_result"] = pred["fulltime_result"]
                 if pred.get("over_under_25") is not None:
                     context["sportmonks"]["over_under_25"] = pred["over_under_25"]
-            # Head2Head: últimos enfrentamientos (no bloquea si falla)
-            head2head_list, _ = get_head2head_by_names(home, away, limit=8)
+            # Head2Head: últimos enfrentamientos (no bloquea si falla o no llega a tiempo)
+            h2h, _ = resultados["head2head"]
+            head2head_list = h2h[0] if h2h else None
             context["head2head"] = head2head_list or []
 
     return render(request, "dashboard/inicio.html", context)
@@ -123,7 +177,13 @@ def estadisticas(request):
             "cancha_metros": e.get("metros", 0),
             "cancha_nota": e.get("nota", ""),
         })
-    return render(request, "dashboard/estadisticas.html", {"equipos_stats": equipos_stats})
+    # Última simulación Monte Carlo de la temporada (manage.py simular_temporada), si existe
+    simulacion = SimulacionTemporada.objects.first()
+    return render(
+        request,
+        "dashboard/estadisticas.html",
+        {"equipos_stats": equipos_stats, "simulacion": simulacion},
+    )
 
 
 def lesionados(request):
@@ -134,7 +194,11 @@ def lesionados(request):
         if b.equipo not in por_equipo:
             por_equipo[b.equipo] = []
         por_equipo[b.equipo].append(b)
-    return render(request, "dashboard/lesionados.html", {"por_equipo": por_equipo, "total": bajas.count()})
+    return render(request, "dashboard/lesionados.html", {
+        "por_equipo": por_equipo,
+        "total": bajas.count(),
+        "cambios": cambios_ultima_sincronizacion("lesionado"),
+    })
 
 
 def sancionados(request):
@@ -145,4 +209,8 @@ def sancionados(request):
         if s.equipo not in por_equipo:
             por_equipo[s.equipo] = []
         por_equipo[s.equipo].append(s)
-    return render(request, "dashboard/sancionados.html", {"por_equipo": por_equipo, "total": lista.count()})
\ No newline at end of file
+    return render(request, "dashboard/sancionados.html", {
+        "por_equipo": por_equipo,
+        "total": lista.count(),
+        "cambios": cambios_ultima_sincronizacion("sancionado"),
+    })
\ No newline at end of file